@@ -1,7 +1,115 @@
-from flask import Flask, render_template, request, url_for
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+
+from flask import (Flask, jsonify, make_response, render_template, request, send_from_directory,
+                   url_for)
 
 app = Flask(__name__)
 
+# Built assets (see build_assets.py): content-hashed, so cache them forever
+BUILD_DIR      = os.path.join(app.static_folder, 'build')
+MANIFEST_PATH  = os.path.join(BUILD_DIR, 'manifest.json')
+ASSET_MAX_AGE  = 365 * 24 * 3600
+PRECOMPRESSED  = (('br', '.br'), ('gzip', '.gz'))
+
+# The training page hands joystick input from its socket worker to the render
+# loop in a SharedArrayBuffer, which browsers only allow in a cross-origin
+# isolated page. credentialless rather than require-corp: the A-Frame and
+# three.js CDN scripts don't send Cross-Origin-Resource-Policy headers.
+# Browsers without credentialless (Safari) fall back to postMessage.
+ISOLATION_HEADERS = {'Cross-Origin-Opener-Policy': 'same-origin',
+                     'Cross-Origin-Embedder-Policy': 'credentialless'}
+
+mimetypes.add_type('model/gltf-binary', '.glb')
+
+_manifest = {'mtime': None, 'assets': {}}
+
+def asset_manifest():
+    """manifest.json, re-read only when a rebuild changed it."""
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return {}
+    if mtime != _manifest['mtime']:
+        with open(MANIFEST_PATH) as f:
+            _manifest['assets'] = json.load(f)
+        _manifest['mtime'] = mtime
+    return _manifest['assets']
+
+@app.template_global()
+def asset_url(name):
+    """Hashed URL of a built asset, or the plain static file if not built."""
+    hashed = asset_manifest().get(name)
+    if hashed:
+        return url_for('built_asset', filename=hashed)
+    return url_for('static', filename=name)
+
+@app.route('/assets/<path:filename>')
+def built_asset(filename):
+    accepted = {t.split(';')[0].strip() for t in request.headers.get('Accept-Encoding', '').split(',')}
+    if 'Range' in request.headers:
+        # ranges count bytes of the identity file (as in serve.py), never of a .br/.gz
+        accepted = set()
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, ext in PRECOMPRESSED:
+        if encoding in accepted and os.path.exists(os.path.join(BUILD_DIR, filename + ext)):
+            response = send_from_directory(BUILD_DIR, filename + ext, mimetype=mimetype,
+                                           max_age=ASSET_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(BUILD_DIR, filename, mimetype=mimetype,
+                                       max_age=ASSET_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# Joystick calibration written by the bridge (joybridge calibrate / calconv*)
+CALIBRATION_DIR    = os.path.join(app.root_path, 'arduino', 'pythonutils')
+CALIBRATION_FILES  = {'joystick1': 'calibration_data_joy1.json',
+                      'joystick2': 'calibration_data_joy2.json'}
+
+_calibration = {'stamp': None, 'body': None, 'etag': None}
+
+def calibration_state():
+    """Body and ETag of the calibration API, rebuilt only when a file changed."""
+    # The bridge owns the calibration rules (thresholds, response curves); use
+    # its package, from the source tree unless it is installed. Imported here
+    # so the rest of the site doesn't need numpy
+    if CALIBRATION_DIR not in sys.path:
+        sys.path.append(CALIBRATION_DIR)
+    from joybridge.calibration import Calibration
+    from joybridge.mapping import ControlMapping
+
+    paths = {name: os.path.join(CALIBRATION_DIR, f) for name, f in CALIBRATION_FILES.items()}
+    stamp = []
+    for path in paths.values():
+        st = os.stat(path)
+        stamp.append((st.st_mtime_ns, st.st_size))
+    if stamp != _calibration['stamp']:
+        body = ControlMapping(Calibration.load(*paths.values())).page_mapping()
+        raw = json.dumps(body, sort_keys=True).encode()
+        _calibration.update(stamp=stamp, body=body, etag=hashlib.sha256(raw).hexdigest()[:16])
+    return _calibration['body'], _calibration['etag']
+
+# v2: per-axis response curves; v1 (centre and thresholds only) is gone
+@app.route('/api/v2/calibration')
+def calibration():
+    try:
+        body, etag = calibration_state()
+    except ImportError as e:
+        return jsonify(error=f'calibration needs the bridge package and numpy: {e}'), 503
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return jsonify(error=f'calibration unavailable: {e}'), 503
+    response = jsonify(body)
+    response.set_etag(etag)
+    # always revalidate; an unchanged calibration costs a bodiless 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 # Home page
 @app.route('/')
 def home():
@@ -14,9 +122,13 @@ def training():
     control_type = request.args.get('controlType', 'keyboard')
     websocket_url = request.args.get('websocketUrl', '')
     
-    return render_template('training.html', 
-                          control_type=control_type,
-                          websocket_url=websocket_url)
+    response = make_response(render_template('training.html',
+                                             control_type=control_type,
+                                             websocket_url=websocket_url))
+    response.headers.update(ISOLATION_HEADERS)
+    return response
 
 if __name__ == '__main__':
+    # development server; serve.py is the multi-worker production entry point
+    # and the only one that relays the bridge at /ws/joystick
     app.run(ssl_context=('cert.pem', 'key.pem'), host="0.0.0.0")
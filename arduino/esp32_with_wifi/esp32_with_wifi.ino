@@ -1,9 +1,12 @@
 #include <WiFi.h>
+#include <WiFiUdp.h>
 #include <WebServer.h>
 
 // Pin Definitions
 const int VRx = 32; // Joystick X-axis (connected to GPIO32)
 const int VRy = 33; // Joystick Y-axis (connected to GPIO33)
+const int VRx2 = -1; // Second joystick, -1 = not wired (sent as centred)
+const int VRy2 = -1;
 
 // SoftAP credentials
 const char* ssid = "ESP32_Joystick";
@@ -11,6 +14,23 @@ const char* password = "12345678"; // Minimum 8 characters
 
 WebServer server(80);
 
+// UDP streaming to the bridge (pythonutils/joybridge/udp_source.py).
+// The host sends "JB HELLO" to UDP_PORT about once a second; frames go to
+// whoever said it last, until HELLOs stop for SUBSCRIBER_TIMEOUT_MS. Each
+// datagram is one 16-byte frame, the same layout as onlyserial2s's binary
+// frames without the COBS wrapping: type, seq, micros(), 4x12-bit ADC,
+// buttons, CRC-16/CCITT-FALSE.
+const uint16_t UDP_PORT = 4210;
+const unsigned long FRAME_INTERVAL_US = 2000;        // 500 frames/s
+const unsigned long SUBSCRIBER_TIMEOUT_MS = 5000;
+
+WiFiUDP udp;
+IPAddress subscriberIp;
+uint16_t subscriberPort = 0;
+unsigned long lastHelloMs = 0;
+uint16_t frameSeq = 0;
+unsigned long nextFrameUs = 0;
+
 // Variables to store joystick readings
 int xValue = 0;
 int yValue = 0;
@@ -19,6 +39,58 @@ int yValue = 0;
 unsigned long lastSerialPrint = 0;
 const unsigned long serialInterval = 100; // Print every 500 milliseconds
 
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t* data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void pollHello() {
+  int size = udp.parsePacket();
+  if (size <= 0) return;
+  char buf[16];
+  int n = udp.read(buf, sizeof(buf) - 1);
+  buf[n > 0 ? n : 0] = '\0';
+  if (strncmp(buf, "JB HELLO", 8) != 0) return;
+  if (udp.remoteIP() != subscriberIp || udp.remotePort() != subscriberPort) {
+    Serial.print("Streaming to ");
+    Serial.println(udp.remoteIP());
+  }
+  subscriberIp = udp.remoteIP();
+  subscriberPort = udp.remotePort();
+  lastHelloMs = millis();
+}
+
+void sendFrame(int x1, int y1, int x2, int y2) {
+  uint8_t raw[16];
+  uint32_t t = micros();
+  uint64_t adc = (uint64_t)(x1 & 0xFFF)
+               | (uint64_t)(y1 & 0xFFF) << 12
+               | (uint64_t)(x2 & 0xFFF) << 24
+               | (uint64_t)(y2 & 0xFFF) << 36;
+
+  raw[0] = 0x01;                 // frame type: dual stick
+  raw[1] = frameSeq & 0xFF;
+  raw[2] = frameSeq >> 8;
+  for (int i = 0; i < 4; i++) raw[3 + i] = (t >> (8 * i)) & 0xFF;
+  for (int i = 0; i < 6; i++) raw[7 + i] = (adc >> (8 * i)) & 0xFF;
+  raw[13] = 0;                   // no buttons wired
+  uint16_t crc = crc16(raw, 14);
+  raw[14] = crc & 0xFF;
+  raw[15] = crc >> 8;
+
+  udp.beginPacket(subscriberIp, subscriberPort);
+  udp.write(raw, sizeof(raw));
+  udp.endPacket();
+  frameSeq++;
+}
+
 // Handle the main webpage
 void handleRoot() {
   String html = "<!DOCTYPE html><html><head><title>Joystick Monitor</title>"
@@ -51,6 +123,10 @@ void setup() {
   server.on("/", handleRoot);
   server.begin();
   Serial.println("HTTP server started");
+
+  udp.begin(UDP_PORT);
+  Serial.print("UDP frames on port ");
+  Serial.println(UDP_PORT);
 }
 
 void loop() {
@@ -69,5 +145,16 @@ void loop() {
     // Serial.println(yValue);
   }
 
+  pollHello();
+  unsigned long nowUs = micros();
+  if (subscriberPort && millis() - lastHelloMs < SUBSCRIBER_TIMEOUT_MS
+      && (long)(nowUs - nextFrameUs) >= 0) {
+    nextFrameUs += FRAME_INTERVAL_US;
+    if ((long)(nowUs - nextFrameUs) > (long)FRAME_INTERVAL_US) nextFrameUs = nowUs;  // fell behind
+    int x2 = VRx2 >= 0 ? analogRead(VRx2) : 2048;
+    int y2 = VRy2 >= 0 ? analogRead(VRy2) : 2048;
+    sendFrame(xValue, yValue, x2, y2);
+  }
+
   server.handleClient();
 }
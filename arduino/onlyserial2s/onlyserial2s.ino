@@ -3,23 +3,106 @@ const int VRx1 = 36; // Joystick 1 X-axis
 const int VRy1 = 39; // Joystick 1 Y-axis
 const int VRx2 = 25; // Joystick 2 X-axis
 const int VRy2 = 26; // Joystick 2 Y-axis
+const int SW1  = -1; // Joystick 1 push button (-1 = not wired)
+const int SW2  = -1; // Joystick 2 push button (-1 = not wired)
 
-void setup() {
-  Serial.begin(115200);
-  delay(1000);
+// Output format
+// false: legacy text lines "Joystick N -> X: .. | Y: .. | Direction: .."
+// true:  18-byte COBS/CRC frames, decoded by pythonutils/binary_frames.py
+const bool BINARY_FRAMES = false;
 
-  pinMode(VRx1, INPUT);
-  pinMode(VRy1, INPUT);
-  pinMode(VRx2, INPUT);
-  pinMode(VRy2, INPUT);
+// Reporting, set by the host over serial (pythonutils/joybridge/reporting.py).
+// Commands are text lines; each is answered with the current settings as
+// "#JB MODE <mode> <hz> <threshold> <heartbeat_ms> <text|binary>".
+//   MODE FIXED <hz>                    send every sample, <hz> samples/s
+//   MODE CHANGE <hz> <thr> <hb_ms>     send a sample once an axis moved >= thr
+//                                      counts from the last one sent, else every hb_ms
+//   MODE IDLE <hz> <thr> <hb_ms>       send every sample while the sticks move; once
+//                                      they have been still for IDLE_HOLD_MS, every hb_ms
+//   ?                                  just answer
+// <hz> 0 keeps the current rate. Until told otherwise: FIXED, 500 Hz binary / 10 Hz text.
+enum ReportMode { REPORT_FIXED, REPORT_CHANGE, REPORT_IDLE };
+const char* MODE_NAMES[] = { "FIXED", "CHANGE", "IDLE" };
+const unsigned long IDLE_HOLD_MS = 250;
+
+ReportMode reportMode = REPORT_FIXED;
+unsigned long sampleIntervalUs = BINARY_FRAMES ? 2000 : 100000;
+int changeThreshold = 24;
+unsigned long heartbeatMs = 1000;
+
+int refValues[4] = { -1, -1, -1, -1 };   // where the sticks last moved to
+unsigned long lastSendMs = 0;
+unsigned long lastMoveMs = 0;
+char cmdBuf[48];
+size_t cmdLen = 0;
+
+uint16_t frameSeq = 0;
+unsigned long nextFrameUs = 0;
+
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t* data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
 }
 
-void loop() {
-  int xValue1 = analogRead(VRx1);
-  int yValue1 = analogRead(VRy1);
-  int xValue2 = analogRead(VRx2);
-  int yValue2 = analogRead(VRy2);
+// COBS-encode `len` bytes into `out`, returns encoded length (no delimiter)
+size_t cobsEncode(const uint8_t* data, size_t len, uint8_t* out) {
+  size_t codePos = 0, o = 1;
+  uint8_t code = 1;
+  for (size_t i = 0; i < len; i++) {
+    if (data[i]) {
+      out[o++] = data[i];
+      code++;
+    }
+    if (!data[i] || code == 0xFF) {
+      out[codePos] = code;
+      codePos = o++;
+      code = 1;
+    }
+  }
+  out[codePos] = code;
+  return o;
+}
+
+uint8_t readButtons() {
+  uint8_t bits = 0;
+  if (SW1 >= 0 && digitalRead(SW1) == LOW) bits |= 0x01;
+  if (SW2 >= 0 && digitalRead(SW2) == LOW) bits |= 0x02;
+  return bits;
+}
+
+void sendBinaryFrame(int x1, int y1, int x2, int y2) {
+  uint8_t raw[16];
+  uint32_t t = micros();
+  uint64_t adc = (uint64_t)(x1 & 0xFFF)
+               | (uint64_t)(y1 & 0xFFF) << 12
+               | (uint64_t)(x2 & 0xFFF) << 24
+               | (uint64_t)(y2 & 0xFFF) << 36;
+
+  raw[0] = 0x01;                 // frame type: dual stick
+  raw[1] = frameSeq & 0xFF;
+  raw[2] = frameSeq >> 8;
+  for (int i = 0; i < 4; i++) raw[3 + i] = (t >> (8 * i)) & 0xFF;
+  for (int i = 0; i < 6; i++) raw[7 + i] = (adc >> (8 * i)) & 0xFF;
+  raw[13] = readButtons();
+  uint16_t crc = crc16(raw, 14);
+  raw[14] = crc & 0xFF;
+  raw[15] = crc >> 8;
 
+  uint8_t wire[18];
+  size_t n = cobsEncode(raw, sizeof(raw), wire);
+  wire[n++] = 0x00;
+  Serial.write(wire, n);
+  frameSeq++;
+}
+
+void sendTextFrame(int xValue1, int yValue1, int xValue2, int yValue2) {
   // Calculate Direction for Joystick 1
   String direction1 = "Center";
   if (yValue1 < 1200) direction1 = "Up";
@@ -67,6 +150,103 @@ void loop() {
   Serial.print(yValue2);
   Serial.print(" | Direction: ");
   Serial.println(direction2);
+}
+
+void sendSettings() {
+  Serial.print("#JB MODE ");
+  Serial.print(MODE_NAMES[reportMode]);
+  Serial.print(' ');
+  Serial.print(1000000UL / sampleIntervalUs);
+  Serial.print(' ');
+  Serial.print(changeThreshold);
+  Serial.print(' ');
+  Serial.print(heartbeatMs);
+  Serial.println(BINARY_FRAMES ? " binary" : " text");
+}
+
+void runCommand(char* cmd) {
+  char mode[8] = "";
+  unsigned long hz = 0, hb = 0;
+  int thr = 0;
+  int n = sscanf(cmd, "MODE %7s %lu %d %lu", mode, &hz, &thr, &hb);
+  if (n >= 1) {
+    if (!strcmp(mode, "FIXED")) reportMode = REPORT_FIXED;
+    else if (!strcmp(mode, "CHANGE")) reportMode = REPORT_CHANGE;
+    else if (!strcmp(mode, "IDLE")) reportMode = REPORT_IDLE;
+    if (n >= 2 && hz > 0 && hz <= 2000) sampleIntervalUs = 1000000UL / hz;
+    if (n >= 3 && thr > 0) changeThreshold = thr;
+    if (n >= 4 && hb > 0) heartbeatMs = hb;
+    refValues[0] = -1;   // report the next sample whatever it is
+  }
+  sendSettings();
+}
+
+void pollCommands() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (cmdLen) {
+        cmdBuf[cmdLen] = 0;
+        runCommand(cmdBuf);
+        cmdLen = 0;
+      }
+    } else if (cmdLen < sizeof(cmdBuf) - 1) {
+      cmdBuf[cmdLen++] = c;
+    }
+  }
+}
+
+// Whether this sample goes out, per reportMode
+bool shouldReport(const int* v, unsigned long nowMs) {
+  if (reportMode == REPORT_FIXED) return true;
+  bool moved = refValues[0] < 0;
+  for (int i = 0; i < 4; i++) {
+    if (abs(v[i] - refValues[i]) >= changeThreshold) moved = true;
+  }
+  if (moved) {
+    lastMoveMs = nowMs;
+    for (int i = 0; i < 4; i++) refValues[i] = v[i];
+  }
+  if (nowMs - lastSendMs >= heartbeatMs) return true;
+  if (reportMode == REPORT_CHANGE) return moved;
+  return nowMs - lastMoveMs < IDLE_HOLD_MS;
+}
+
+void setup() {
+  Serial.begin(115200);
+  delay(1000);
 
-  delay(100);
+  pinMode(VRx1, INPUT);
+  pinMode(VRy1, INPUT);
+  pinMode(VRx2, INPUT);
+  pinMode(VRy2, INPUT);
+  if (SW1 >= 0) pinMode(SW1, INPUT_PULLUP);
+  if (SW2 >= 0) pinMode(SW2, INPUT_PULLUP);
+}
+
+void loop() {
+  pollCommands();
+
+  int v[4];
+  v[0] = analogRead(VRx1);
+  v[1] = analogRead(VRy1);
+  v[2] = analogRead(VRx2);
+  v[3] = analogRead(VRy2);
+
+  unsigned long nowMs = millis();
+  if (shouldReport(v, nowMs)) {
+    lastSendMs = nowMs;
+    if (BINARY_FRAMES) sendBinaryFrame(v[0], v[1], v[2], v[3]);
+    else sendTextFrame(v[0], v[1], v[2], v[3]);
+  }
+
+  nextFrameUs += sampleIntervalUs;
+  long wait = (long)(nextFrameUs - micros());
+  if (wait <= 0) {
+    nextFrameUs = micros();      // fell behind, don't try to catch up
+    return;
+  }
+  if (wait >= 2000) delay(wait / 1000);   // yield instead of spinning at low rates
+  wait = (long)(nextFrameUs - micros());
+  if (wait > 0) delayMicroseconds(wait);
 }
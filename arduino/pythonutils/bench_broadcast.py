@@ -0,0 +1,167 @@
+"""Stress test for BroadcastHub: many local clients, a few deliberately slow.
+
+    python bench_broadcast.py [--clients 50] [--slow 5] [--rate 100] [--seconds 5]
+                              [--delta] [--legacy]
+
+Publishes joystick-sized payloads at --rate Hz to --clients WebSocket clients
+on localhost. The clients run in a separate process so they don't compete
+with the server's event loop. Slow clients sleep after every message and
+the server sockets get a small send buffer (think congested Wi-Fi), so
+backpressure actually reaches the server. Reports p50/p99 delivery latency
+for fast and slow clients. --legacy runs the old per-frame
+`asyncio.gather(ws.send(...))` broadcast for comparison.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import socket
+import time
+
+import websockets
+
+from joybridge.broadcast_hub import BroadcastHub
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(p / 100 * len(values))) - 1)]
+
+
+class LegacyBroadcast:
+    """What calconv3/calconv4 used to do: one gather over all clients per frame."""
+
+    def __init__(self):
+        self.clients = set()
+        self.pending = set()
+
+    def publish(self, payload):
+        if not self.clients:
+            return
+        msg = json.dumps(payload)
+        t = asyncio.ensure_future(
+            asyncio.gather(*(ws.send(msg) for ws in self.clients), return_exceptions=True))
+        self.pending.add(t)
+        t.add_done_callback(self.pending.discard)
+
+    async def serve_client(self, ws):
+        self.clients.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            self.clients.discard(ws)
+
+    def stats(self):
+        return {'clients': len(self.clients), 'in_flight_gathers': len(self.pending)}
+
+
+async def client(uri, slow_delay, latencies, stop):
+    kwargs = {}
+    if slow_delay:
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2048)
+        sock.setblocking(False)
+        host, port = uri[5:].split(':')
+        await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+        kwargs = dict(sock=sock, max_queue=1)
+    async with websockets.connect(uri, compression=None, **kwargs) as ws:
+        while not stop.is_set():
+            try:
+                msg = await asyncio.wait_for(ws.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            ts = json.loads(msg).get('ts')
+            if ts is not None:
+                latencies.append(time.monotonic() - ts)
+            if slow_delay:
+                await asyncio.sleep(slow_delay)
+
+
+async def run_clients(uri, args, conn):
+    stop = asyncio.Event()
+    fast_lat, slow_lat = [], []
+    tasks = []
+    for i in range(args.clients):
+        slow = i < args.slow
+        tasks.append(asyncio.create_task(client(
+            uri, args.slow_delay if slow else 0,
+            slow_lat if slow else fast_lat, stop)))
+    conn.send('connected')
+    await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+    stop.set()
+    await asyncio.sleep(0.6)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    conn.send((fast_lat, slow_lat))
+
+
+def client_process(uri, args, conn):
+    asyncio.run(run_clients(uri, args, conn))
+
+
+async def main(args):
+    fanout = LegacyBroadcast() if args.legacy else BroadcastHub(delta=args.delta)
+
+    async def handler(ws):
+        sock = ws.transport.get_extra_info('socket')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        await fanout.serve_client(ws)
+
+    async with websockets.serve(handler, '127.0.0.1', 0, compression=None,
+                                write_limit=4096) as server:
+        port = server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+        conn, child_conn = multiprocessing.Pipe()
+        proc = multiprocessing.Process(
+            target=client_process, args=(f'ws://127.0.0.1:{port}', args, child_conn))
+        proc.start()
+        await loop.run_in_executor(None, conn.recv)
+        await asyncio.sleep(1.0)     # let everyone connect
+
+        interval = 1.0 / args.rate
+        start = time.monotonic()
+        n = 0
+        while time.monotonic() - start < args.seconds:
+            n += 1
+            fanout.publish({
+                'mode': '2',
+                'joystick1': {'dx': n % 200 - 100, 'dy': 0, 'x': (n % 200 - 100) / 1000,
+                              'y': 0.0, 'direction': 'center'},
+                'joystick2': {'dx': 0, 'dy': (n // 3) % 200 - 100, 'x': 0.0,
+                              'y': ((n // 3) % 200 - 100) / 1000, 'direction': 'center'},
+                'ts': time.monotonic(),
+            })
+            await asyncio.sleep(max(0.0, start + n * interval - time.monotonic()))
+        elapsed = time.monotonic() - start
+        stats = fanout.stats()
+        conn.send('stop')
+        fast_lat, slow_lat = await loop.run_in_executor(None, conn.recv)
+        proc.join()
+
+    mode = 'legacy gather' if args.legacy else f"hub{' +delta' if args.delta else ''}"
+    print(f"{mode}: {n} frames in {elapsed:.1f}s to {args.clients} clients "
+          f"({args.slow} slow, {args.slow_delay * 1000:.0f} ms/message)")
+    fast = args.clients - args.slow
+    for name, lat, count in (('fast', fast_lat, fast), ('slow', slow_lat, args.slow)):
+        if not count:
+            continue
+        ms = [v * 1000 for v in lat]
+        print(f"  {name}: p50 {percentile(ms, 50):8.2f} ms   p99 {percentile(ms, 99):8.2f} ms   "
+              f"{len(lat) / count:7.1f} msgs/client")
+    print(f"  server: {stats}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--clients', type=int, default=50)
+    ap.add_argument('--slow', type=int, default=5)
+    ap.add_argument('--slow-delay', type=float, default=0.1)
+    ap.add_argument('--rate', type=float, default=100)
+    ap.add_argument('--seconds', type=float, default=5)
+    ap.add_argument('--delta', action='store_true')
+    ap.add_argument('--legacy', action='store_true')
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,196 @@
+"""Lag vs jitter of the smoothing filters over a serial capture.
+
+    python bench_filters.py [--capture session.jbcap] [--calibration1 FILE --calibration2 FILE]
+
+Without --capture a synthetic one is written first: 500 Hz text lines of
+sticks that rest, flick to the rails and sweep, plus Gaussian ADC noise
+(--noise counts) and the odd glitch, so this runs on any box. Record a
+real one with `python -m joybridge record --out FILE` (wiggle the sticks,
+then leave them alone for a while).
+
+For each setting it reports, over all four axes:
+  lag     ms the output trails the raw signal while the sticks move (the
+          shift that best lines the two up)
+  jitter  RMS wobble in ADC counts once the sticks have settled at rest
+          (deviation from the 100 ms local mean), and as a share of the
+          raw jitter
+  cost    µs per sample in the filter step
+
+With calibration files, their own "filter" parameters are included too.
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from joybridge.binary_frames import StreamDecoder
+from joybridge.calibration import Calibration
+from joybridge.capture import CaptureWriter, read_capture
+from joybridge.joystick_parser import JoystickFrame, parse_line
+from joybridge.smoothing import KINDS, axis_params, build
+
+# ————— CONFIG —————
+RATE          = 500       # Hz, synthetic capture
+WINDOW        = 0.1       # s, local mean for jitter / motion detection
+STILL_SPEED   = 100       # counts/s of the local mean below which a stick is "still"
+SETTLE        = 0.3       # s a stick must have been still before its jitter counts
+MAX_LAG       = 0.25      # s searched for the lag
+
+# Kalman's r (measurement variance) is taken from the capture's own raw jitter
+SETTINGS = [
+    ('one-euro', {'min_cutoff': 0.3, 'beta': 0.001, 'd_cutoff': 1.0}),
+    ('one-euro', {'min_cutoff': 1.0, 'beta': 0.002, 'd_cutoff': 1.0}),
+    ('one-euro', {'min_cutoff': 1.0, 'beta': 0.005, 'd_cutoff': 1.0}),
+    ('one-euro', {'min_cutoff': 3.0, 'beta': 0.005, 'd_cutoff': 1.0}),
+    ('kalman',   {'q': 1e4}),
+    ('kalman',   {'q': 1e5}),
+    ('kalman',   {'q': 1e6}),
+    ('kalman',   {'q': 1e7}),
+]
+
+def synth_capture(path, seconds, noise, seed=0):
+    """Rest / flick / hold / sweep on each axis with its own phase, plus noise."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE)
+    t = np.arange(n) / RATE
+    axes = []
+    for k in range(4):
+        phase = (t + 1.7 * k) % 8.0
+        v = np.zeros(n)
+        flick = (phase >= 1.0) & (phase < 2.5)
+        v[flick] = 1500 * np.clip((phase[flick] - 1.0) / 0.08, 0, 1)
+        back = (phase >= 2.5) & (phase < 2.6)
+        v[back] = 1500 * (1 - (phase[back] - 2.5) / 0.1)
+        sweep = (phase >= 4.0) & (phase < 6.0)
+        v[sweep] = 900 * np.sin(math.pi * (phase[sweep] - 4.0))
+        axes.append(v)
+    truth = np.stack(axes, 1) + 2048
+    raw = truth + rng.normal(0, noise, truth.shape)
+    glitch = rng.random(truth.shape) < 0.002
+    raw[glitch] += rng.choice([-1, 1], glitch.sum()) * 8 * noise
+    raw = np.clip(np.rint(raw), 0, 4095).astype(int)
+    interval_ns = int(1e9 / RATE)
+    with CaptureWriter(path) as rec:
+        for i, (x1, y1, x2, y2) in enumerate(raw):
+            rec.write((f"Joystick 1 -> X: {x1} | Y: {y1} | Direction: Center\r\n"
+                       f"Joystick 2 -> X: {x2} | Y: {y2} | Direction: Center\r\n").encode(),
+                      i * interval_ns)
+
+
+def load_samples(path):
+    """(N, 4) raw codes and their arrival times, one row per joystick-2 line."""
+    _, records = read_capture(path)
+    frame = JoystickFrame()
+    rows, times, last1, now = [], [], None, [0.0]
+
+    def on_line(raw):
+        nonlocal last1
+        if parse_line(raw, frame) is None:
+            return
+        if frame.joystick == 1:
+            last1 = (frame.x, frame.y)
+        elif last1 is not None:
+            rows.append(last1 + (frame.x, frame.y))
+            times.append(now[0])
+
+    def on_frame(f):
+        rows.append((f.x1, f.y1, f.x2, f.y2))
+        times.append(now[0])
+
+    decoder = StreamDecoder(on_line, on_frame)
+    for t, chunk in records:
+        now[0] = t
+        decoder.feed(chunk)
+    return np.array(rows, dtype=np.float64).reshape(-1, 4), np.array(times)
+
+
+def local_mean(x, w):
+    kernel = np.ones(w) / w
+    pad = np.pad(x, ((w // 2, w - 1 - w // 2), (0, 0)), mode='edge')
+    return np.stack([np.convolve(pad[:, i], kernel, mode='valid') for i in range(x.shape[1])], 1)
+
+
+def measure(raw, out, dt):
+    """(lag ms, jitter counts) of `out` against `raw`, pooled over the axes."""
+    w = max(3, int(round(WINDOW / dt)))
+    mean = local_mean(raw, w)
+    # speed of the local mean across ±w samples: at rest that's noise / √w
+    speed = np.zeros_like(mean)
+    speed[w:-w] = (mean[2 * w:] - mean[:-2 * w]) / (2 * w * dt)
+    still = np.abs(speed) < STILL_SPEED
+    still[:w] = still[-w:] = False
+    moving = ~still
+    # jitter only once a stick has been still for SETTLE (not the overshoot after a flick)
+    s = int(SETTLE / dt)
+    run = np.cumsum(still, axis=0)
+    settled = still.copy()
+    settled[s:] &= run[s:] - run[:-s] == s
+    settled[:s] = False
+    jitter = math.sqrt(np.mean((out - local_mean(out, w))[settled] ** 2))
+    errs = []
+    for k in range(int(MAX_LAG / dt)):
+        m = moving[k:]
+        d = out[k:] - raw[:len(raw) - k]
+        errs.append(np.mean(d[m] ** 2) if m.any() else 0.0)
+    k = int(np.argmin(errs))
+    if 0 < k < len(errs) - 1:       # parabolic refinement
+        a, b, c = errs[k - 1], errs[k], errs[k + 1]
+        k += 0.5 * (a - c) / (a - 2 * b + c) if a - 2 * b + c else 0
+    return k * dt * 1000, jitter
+
+
+def describe(kind, params):
+    def fmt(v):
+        v = np.unique(np.asarray(v))     # per-axis arrays from a calibration
+        return '/'.join(f'{x:g}' for x in v)
+    return kind + ' ' + ', '.join(f"{k}={fmt(v)}" for k, v in params.items())
+
+
+def main(args):
+    path = args.capture
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.jbcap')
+        os.close(fd)
+        synth_capture(path, args.seconds, args.noise)
+    try:
+        raw, times = load_samples(path)
+    finally:
+        if args.capture is None:
+            os.unlink(path)
+    if not len(raw):
+        print("[!] no joystick samples in the capture")
+        return
+    dt = float(np.median(np.diff(times))) or 1 / RATE
+    centre = np.median(raw, axis=0)
+    centred = raw - centre
+    print(f"{len(raw)} samples over {times[-1] - times[0]:.1f}s, {1 / dt:.0f} Hz")
+    _, raw_jitter = measure(centred, centred, dt)
+    r = round(raw_jitter ** 2, 1)
+    settings = [(kind, dict(params, r=r) if kind == 'kalman' else params)
+                for kind, params in SETTINGS]
+    if args.calibration1:
+        cal = Calibration.load(args.calibration1, args.calibration2 or args.calibration1)
+        settings += [(f'{kind} (calibration)', axis_params(cal, kind)) for kind in KINDS]
+    print(f"{'setting':58s} {'lag ms':>7s} {'jitter':>7s} {'of raw':>7s} {'µs/sample':>10s}")
+    print(f"{'off':58s} {0:7.1f} {raw_jitter:7.2f} {100:6.0f}% {0:10.1f}")
+    for kind, params in settings:
+        f = build(kind.split()[0], **params)
+        t0 = time.perf_counter()
+        out = f.run(centred, times)
+        cost = (time.perf_counter() - t0) / len(raw) * 1e6
+        lag, jitter = measure(centred, out, dt)
+        print(f"{describe(kind, params):58s} {lag:7.1f} {jitter:7.2f} "
+              f"{jitter / raw_jitter * 100:6.0f}% {cost:10.1f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--capture')
+    ap.add_argument('--seconds', type=float, default=24)
+    ap.add_argument('--noise', type=float, default=6, help='ADC noise sigma, synthetic capture')
+    ap.add_argument('--calibration1')
+    ap.add_argument('--calibration2')
+    main(ap.parse_args())
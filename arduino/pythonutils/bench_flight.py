@@ -0,0 +1,142 @@
+"""Speed and fidelity of joybridge.flight_model.
+
+    python bench_flight.py [--streams 256] [--seconds 60] [--rate 120] [--fps 72]
+
+Flies --streams synthetic input streams (sticks that rest, flick and sweep
+at --rate frames/s, with late frames and gaps) through the vectorized
+model and reports simulated seconds per wall-clock second, split into
+sampling (the page's jitter buffer) and integration. A per-frame loop
+written like the page's JavaScript flies the first streams too, for the
+speed-up and the largest difference in position and heading (both should
+be 0: the model does the same float operations in the same order).
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+from joybridge import flight_model as fm
+
+
+def synth_stream(seconds, rate, seed):
+    """Flicks, holds and sweeps per axis, ~2% late frames, the odd 150 ms gap."""
+    rng = np.random.default_rng(seed)
+    dt = np.full(int(seconds * rate), 1000 / rate)
+    dt[rng.random(len(dt)) < 0.01] = 150
+    t = np.cumsum(dt)
+    recv = t + np.where(rng.random(len(t)) < 0.02, rng.exponential(40, len(t)), 0.3)
+    recv = np.maximum.accumulate(recv)
+    axes = np.zeros((len(t), 4))
+    for k in range(4):
+        phase = (t / 1000 + rng.uniform(0, 8)) % 8.0
+        flick = (phase >= 1.0) & (phase < 2.5)
+        axes[flick, k] = rng.choice([-1, 1]) * np.clip((phase[flick] - 1.0) / 0.15, 0, 1)
+        sweep = (phase >= 4.0) & (phase < 6.0)
+        axes[sweep, k] = np.sin(math.pi * (phase[sweep] - 4.0))
+    axes = np.round(axes * fm.Q15) / fm.Q15
+    return fm.InputStream(t, axes, recv)
+
+
+def fly_per_frame(stream, fps, frames):
+    """sampleInput / processJoystickInput / tick, one frame at a time; (frames, 4) pose."""
+    delta = 1000 / fps
+    t, x, recv, offset = stream.t, stream.axes, stream.recv, stream.offset
+    depth, max_ext = fm.JITTER_BUFFER, fm.MAX_EXTRAPOLATION
+    inp = [0.0] * 4
+    heading, pos = 0.0, list(fm.START)
+    out = np.empty((frames, 4))
+
+    def extrapolate(a, b, f):
+        if b == 0:
+            return 0
+        v = b + (b - a) * f
+        if v * b <= 0:
+            return 0
+        return 1 if v > 1 else -1 if v < -1 else v
+
+    for i in range(frames):
+        now = recv[0] + i * delta
+        n = int(np.searchsorted(recv, now, 'right'))
+        if n:
+            newest = n - 1
+            target = now - offset[newest] - depth
+            if depth <= 0 or target >= t[newest]:
+                f = 0
+                prev = n - 2 if n > 1 else -1
+                span = t[newest] - t[prev] if prev >= 0 else 0
+                if depth > 0 and 0 < span < fm.INPUT_MAX_GAP:
+                    late = target - t[newest]
+                    f = (late if late < max_ext else max(2 * max_ext - late, 0)) / span
+                if f > 0:
+                    inp = [extrapolate(x[prev][c], x[newest][c], f) for c in range(4)]
+                else:
+                    inp = list(x[newest])
+            else:
+                stop = max(0, n - fm.INPUT_BUFFER_SIZE + 1)
+                k = n - 1
+                while k > stop and t[k - 1] > target:
+                    k -= 1
+                a = k - 1 if k > stop else k
+                span = t[k] - t[a]
+                if a == k or span > fm.INPUT_MAX_GAP:
+                    inp = list(x[a])
+                else:
+                    f = (target - t[a]) / span
+                    inp = [x[a][c] + (x[k][c] - x[a][c]) * f for c in range(4)]
+        move_speed, rotate_speed = 0.01 * delta, 0.005 * delta
+        move_z = move_speed * inp[1] * 2
+        move_x = move_speed * inp[0] * 2
+        move_y = -move_speed * inp[3] * 2
+        rot_y = -rotate_speed * 20 * inp[2]
+        heading += rot_y * fm.DEG2RAD
+        sin, cos = math.sin(heading), math.cos(heading)
+        pos[0] += move_z * sin + move_x * cos
+        pos[2] += move_z * cos - move_x * sin
+        pos[1] += move_y
+        out[i] = pos[0], pos[1], pos[2], heading
+    return out
+
+
+def main(args):
+    streams = [synth_stream(args.seconds, args.rate, seed) for seed in range(args.streams)]
+    delta = 1000 / args.fps
+    t0 = time.perf_counter()
+    flight = fm.simulate(streams, args.fps)
+    wall = time.perf_counter() - t0
+    count = len(flight.times)
+    t0 = time.perf_counter()
+    fm.integrate(flight.inputs, delta)
+    integrate = time.perf_counter() - t0
+    flown = sum(flight.times[n - 1] for n in flight.frames if n)
+    print(f"{os.cpu_count()} CPU(s); {args.streams} streams × {args.seconds:g}s at "
+          f"{args.rate:g} frames/s, rendered at {args.fps:g} fps ({count} frames each)")
+    print(f"vectorized   {wall * 1000:8.1f} ms  {flown / wall:10.0f}x real time "
+          f"(sampling {(wall - integrate) * 1000:.1f} ms, integration {integrate * 1000:.1f} ms)")
+
+    check = min(args.check, len(streams))
+    t0 = time.perf_counter()
+    loops = [fly_per_frame(s, args.fps, int(n)) for s, n in zip(streams[:check], flight.frames)]
+    loop_wall = time.perf_counter() - t0
+    loop_flown = sum(flight.times[n - 1] for n in flight.frames[:check] if n)
+    err_pos = max(np.abs(p[:, :3] - flight.positions[i, :len(p)]).max() for i, p in enumerate(loops))
+    err_yaw = max(np.abs(p[:, 3] - flight.headings[i, :len(p)]).max() for i, p in enumerate(loops))
+    print(f"per frame    {loop_wall * 1000:8.1f} ms  {loop_flown / loop_wall:10.0f}x real time "
+          f"({check} streams; vectorized is {loop_wall / loop_flown * flown / wall:.0f}x faster)")
+    print(f"max difference: position {err_pos:.3g} m, heading {err_yaw:.3g} rad")
+
+    metrics = fm.summarize(flight)
+    for key in ('path', 'drift', 'overshoot', 'time_to_target'):
+        values = np.array([m[key] for m in metrics])
+        print(f"{key:15s} median {np.nanmedian(values):9.3f}  max {np.nanmax(values):9.3f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--streams', type=int, default=256)
+    ap.add_argument('--seconds', type=float, default=60)
+    ap.add_argument('--rate', type=float, default=120, help='input frames/s')
+    ap.add_argument('--fps', type=float, default=fm.FPS, help='rendered frames/s')
+    ap.add_argument('--check', type=int, default=4, help='streams also flown frame by frame')
+    main(ap.parse_args())
@@ -0,0 +1,95 @@
+"""Micro-benchmark: joystick_parser vs the regexes the scripts used to run.
+
+    python bench_parser.py [--lines 1000000] [--capture FILE]
+
+Without --capture a deterministic dual-stick stream in the onlyserial2s
+format is generated. With --capture, lines are taken from a raw serial dump
+(one sample per line) and repeated up to --lines.
+"""
+import argparse
+import random
+import re
+import time
+
+from joybridge.joystick_parser import JoystickFrame, parse_line
+
+DIRECTIONS = ['Center', 'Up', 'Down', 'Left', 'Right',
+              'Up-Left', 'Up-Right', 'Down-Left', 'Down-Right']
+
+
+def synthetic_lines(n, seed=1):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        out.append(b"Joystick %d -> X: %d | Y: %d | Direction: %s\r\n" % (
+            i % 2 + 1, rnd.randint(0, 4095), rnd.randint(0, 4095),
+            rnd.choice(DIRECTIONS).encode()))
+    return out
+
+
+def capture_lines(path, n):
+    with open(path, 'rb') as f:
+        lines = [l for l in f.read().splitlines(keepends=True) if l.strip()]
+    return (lines * (n // len(lines) + 1))[:n]
+
+
+# — what calconv4/calconv5 read_joystick_lines() did per line —
+def legacy_calconv(raw):
+    line = raw.decode(errors='replace').strip()
+    if line.startswith("Joystick 1") or line.startswith("Joystick 2"):
+        m = re.match(r'.*X:\s*(-?\d+).*Y:\s*(-?\d+).*Direction:\s*(\w+)', line)
+        if m: return (int(m[1]), int(m[2]), m[3])
+    return None
+
+
+# — what controller.py / calconv3.py did per line (three searches) —
+def legacy_controller(raw):
+    line = raw.decode('utf-8', errors='ignore').strip()
+    x_m = re.search(r'X:\s*(-?\d+)', line)
+    y_m = re.search(r'Y:\s*(-?\d+)', line)
+    d_m = re.search(r'Direction:\s*(\w+)', line)
+    if x_m and y_m and d_m:
+        return int(x_m.group(1)), int(y_m.group(1)), d_m.group(1)
+    return None
+
+
+def shared_parser(lines):
+    frame = JoystickFrame()
+    for raw in lines:
+        parse_line(raw, frame)
+
+
+def run(name, fn, lines):
+    t0 = time.perf_counter()
+    fn(lines)
+    dt = time.perf_counter() - t0
+    rate = len(lines) / dt
+    print(f"  {name:<22} {dt:7.3f} s  {rate/1e6:6.2f} M lines/s")
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--lines', type=int, default=1_000_000)
+    ap.add_argument('--capture', help='raw serial capture to replay')
+    args = ap.parse_args()
+
+    lines = capture_lines(args.capture, args.lines) if args.capture \
+        else synthetic_lines(args.lines)
+    print(f"Parsing {len(lines):,} lines")
+
+    # sanity: all parsers agree on the numbers
+    for raw in lines[:1000]:
+        f = parse_line(raw)
+        old = legacy_calconv(raw)
+        if old is not None:
+            assert (f.x, f.y) == old[:2], raw
+
+    base  = run('calconv re.match(.*)', lambda ls: [legacy_calconv(l) for l in ls], lines)
+    base2 = run('controller 3x search', lambda ls: [legacy_controller(l) for l in ls], lines)
+    new   = run('joystick_parser', shared_parser, lines)
+    print(f"  speed-up: {new/base:.1f}x vs calconv, {new/base2:.1f}x vs controller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""Hardware-free benchmarks driven by a serial capture.
+
+    python bench_replay.py [--capture session.jbcap] [--seconds 10] [--rate 100]
+                           [--speed 1] [--binary]
+
+Without --capture a synthetic one is written first (two text lines per
+sample at --rate Hz, or COBS frames with --binary), so this runs on any
+box. Record a real one with `python -m joybridge record --out FILE`.
+
+Reports:
+  parser       decoder + parser throughput over the whole capture
+  calibration  per-frame cost of turning raw codes into the payload: the
+               ControlMapping tables in Pipeline vs the old per-frame
+               centre/threshold/direction arithmetic plus normalization
+  broadcast    bytes-off-the-port → WebSocket client latency, replaying the
+               capture at --speed through the full pipeline
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import websockets
+
+from joybridge.binary_frames import DualFrame, StreamDecoder, pack_frame
+from joybridge.calibration import Calibration, resolve_direction
+from joybridge.capture import CaptureWriter, ReplaySerial, read_capture
+from joybridge.joystick_parser import JoystickFrame, parse_line
+from joybridge.pipeline import Pipeline
+from joybridge.sinks import Sink, WebSocketSink
+
+CAL = {
+    'center': {'x': 2048, 'y': 2048, 'err_x': 10, 'err_y': 10},
+    'up':     {'x': 2048, 'y': 0},
+    'down':   {'x': 2048, 'y': 4095},
+    'left':   {'x': 0,    'y': 2048},
+    'right':  {'x': 4095, 'y': 2048},
+}
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(p / 100 * len(values))) - 1)]
+
+
+def synth_capture(path, seconds, rate, binary):
+    """Write a capture of a slow circle on both sticks."""
+    interval_ns = int(1e9 / rate)
+    with CaptureWriter(path) as rec:
+        for i in range(int(seconds * rate)):
+            a  = i / rate
+            x1 = int(2048 + 1500 * math.cos(a))
+            y1 = int(2048 + 1500 * math.sin(a))
+            x2, y2 = 4095 - x1, 4095 - y1
+            if binary:
+                data = pack_frame(DualFrame(i, i * interval_ns // 1000, x1, y1, x2, y2))
+            else:
+                data = (f"Joystick 1 -> X: {x1} | Y: {y1} | Direction: Center\r\n"
+                        f"Joystick 2 -> X: {x2} | Y: {y2} | Direction: Center\r\n").encode()
+            rec.write(data, i * interval_ns)
+
+
+def bench_parser(records):
+    data  = [chunk for _, chunk in records]
+    total = sum(len(c) for c in data)
+    frame = JoystickFrame()
+    count = [0]
+
+    def on_line(raw):
+        if parse_line(raw, frame) is not None:
+            count[0] += 1
+
+    def on_frame(f):
+        count[0] += 1
+
+    decoder = StreamDecoder(on_line, on_frame)
+    t0 = time.perf_counter()
+    for chunk in data:
+        decoder.feed(chunk)
+    dt = time.perf_counter() - t0
+    print(f"parser:      {count[0]} samples, {total / 1e6:.2f} MB in {dt * 1000:.1f} ms "
+          f"→ {count[0] / dt:,.0f} samples/s, {total / dt / 1e6:.1f} MB/s")
+
+
+class NullSink(Sink):
+    def send(self, payload):
+        pass
+
+
+def legacy_payload(cal, raw):
+    """What Pipeline._emit computed per frame before ControlMapping."""
+    cx1, cy1, cx2, cy2 = cal.center
+    dx1, dy1, dx2, dy2 = raw[0]-cx1, raw[1]-cy1, raw[2]-cx2, raw[3]-cy2
+    thr1, thr2 = cal.thresholds
+    x1, y1, x2, y2 = cal.normalize(raw[0], raw[1], raw[2], raw[3])
+    return {
+        'mode': '2',
+        'joystick1': {'dx': dx1, 'dy': dy1, 'x': x1, 'y': y1,
+                      'direction': resolve_direction(dx1, dy1, thr1)},
+        'joystick2': {'dx': dx2, 'dy': dy2, 'x': x2, 'y': y2,
+                      'direction': resolve_direction(dx2, dy2, thr2)},
+    }
+
+
+def per_frame(fn, raws, n, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(raws[i % 1000])
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e9
+
+
+def bench_calibration(n=100_000):
+    cal = Calibration(CAL, CAL)
+    pipeline = Pipeline(cal, sinks=[NullSink()])
+    raws = [(2048 + (i % 3000) - 1500, 2048, 2048, 2048 - (i % 3000) + 1500, 0.0, 0.0)
+            for i in range(1000)]
+    mapping = pipeline.mapping
+    legacy = per_frame(lambda raw: legacy_payload(cal, raw), raws, n)
+    mapped = per_frame(lambda raw: mapping.payload(raw[0], raw[1], raw[2], raw[3]), raws, n)
+    emit = per_frame(pipeline._emit, raws, n)
+    print(f"calibration: payload {mapped:,.0f} ns/frame from the mapping tables vs "
+          f"{legacy:,.0f} ns/frame computed per frame; whole Pipeline._emit "
+          f"{emit:,.0f} ns/frame ({n} frames, best of 5)")
+
+
+class StampedWebSocketSink(WebSocketSink):
+    """Adds the time the triggering bytes left the port to each payload."""
+
+    last_feed = 0.0
+
+    def send(self, payload):
+        payload['ts'] = self.last_feed
+        super().send(payload)
+
+
+class GatedReplay(ReplaySerial):
+    """Holds the capture back until `ready` is set (the client is connected)."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.ready = threading.Event()
+
+    @property
+    def in_waiting(self):
+        return super().in_waiting if self.ready.is_set() else 0
+
+    def read(self, size=1):
+        if not self.ready.wait(self.timeout):
+            return b''
+        return super().read(size)
+
+
+async def bench_broadcast(path, speed):
+    sink = StampedWebSocketSink('127.0.0.1', 0)
+    pipeline = Pipeline(Calibration(CAL, CAL), sinks=[sink], max_rate=0)
+    ser = GatedReplay(path, speed)
+
+    def tap(data):
+        sink.last_feed = time.perf_counter()
+
+    latencies = []
+
+    async def client(port):
+        async with websockets.connect(f'ws://127.0.0.1:{port}') as ws:
+            ser.ready.set()
+            async for msg in ws:
+                latencies.append(time.perf_counter() - json.loads(msg)['ts'])
+
+    run = asyncio.create_task(pipeline.run(ser, tap=tap))
+    while sink.server is None:
+        await asyncio.sleep(0.01)
+    port = sink.server.sockets[0].getsockname()[1]
+    reader = asyncio.create_task(client(port))
+    await run
+    reader.cancel()
+    ms = [v * 1000 for v in latencies]
+    pace = f"{speed:g}x" if speed > 0 else "max speed (latest-value hub coalesces)"
+    print(f"broadcast:   {len(ms)} messages at {pace}, "
+          f"p50 {percentile(ms, 50):.3f} ms  p99 {percentile(ms, 99):.3f} ms  "
+          f"max {max(ms, default=float('nan')):.3f} ms")
+
+
+def main(args):
+    path = args.capture
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.jbcap')
+        os.close(fd)
+        synth_capture(path, args.seconds, args.rate, args.binary)
+    try:
+        _, records = read_capture(path)
+        span = records[-1][0] if records else 0
+        print(f"capture: {path}, {len(records)} chunks over {span:.1f}s")
+        bench_parser(records)
+        bench_calibration()
+        asyncio.run(bench_broadcast(path, args.speed))
+    finally:
+        if args.capture is None:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--capture')
+    ap.add_argument('--seconds', type=float, default=10)
+    ap.add_argument('--rate', type=float, default=100)
+    ap.add_argument('--speed', type=float, default=1.0)
+    ap.add_argument('--binary', action='store_true')
+    main(ap.parse_args())
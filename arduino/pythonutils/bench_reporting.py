@@ -0,0 +1,180 @@
+"""What each firmware report mode costs and what it hides.
+
+    python bench_reporting.py [--seconds 60] [--rate 500] [--noise 6]
+
+A synthetic session at --rate Hz: all four axes rest for a few seconds,
+then flick and sweep for two, over and over, with Gaussian ADC noise. The
+onlyserial2s reporting policy (shouldReport) is replayed over it in
+Python for each mode, the samples it would send are written as text-line
+captures, and those are run through a Pipeline as fast as possible.
+
+For each mode it reports:
+  frames/s  reports per second while every stick rests / while they move
+            (idle's rest figure is mostly the IDLE_HOLD_MS tail after motion)
+  bytes/s   serial traffic, text lines
+  CPU       host pipeline CPU per second of session (one core = 100%)
+  onset     ms the host sees a stick leave rest (a report more than the
+            threshold from centre) after the stick itself got there
+  error     RMS counts between the last report and the noiseless
+            position, at rest and while moving (what the host doesn't see)
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from bench_replay import CAL
+from joybridge.calibration import Calibration
+from joybridge.capture import CaptureWriter, ReplaySerial
+from joybridge.pipeline import Pipeline
+from joybridge.reporting import DEFAULT_HEARTBEAT
+from joybridge.sinks import Sink
+
+# ————— CONFIG —————
+CYCLE        = 6.0      # s, rest then motion
+MOTION       = 2.0      # s of motion at the end of each cycle
+IDLE_HOLD_MS = 250      # as in onlyserial2s.ino
+
+MODES = ['fixed', 'change', 'idle']
+
+
+class CountSink(Sink):
+    def __init__(self):
+        self.count = 0
+
+    def send(self, payload):
+        self.count += 1
+
+
+def synth_session(seconds, rate, noise, seed=0):
+    """(N, 4) integer samples, the noiseless positions, their times, and a motion mask."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    phase = t % CYCLE
+    moving = phase >= CYCLE - MOTION
+    truth = np.full((len(t), 4), 2048.0)
+    m = phase[moving] - (CYCLE - MOTION)
+    for k in range(4):
+        sweep = 1200 * np.sin(math.pi * m / MOTION * (1 + k % 2)) * np.clip(m / 0.08, 0, 1)
+        truth[moving, k] += sweep if k < 2 else -sweep
+    raw = truth + rng.normal(0, noise, truth.shape)
+    raw = np.clip(np.rint(raw), 0, 4095).astype(int)
+    return raw, truth, t, moving
+
+
+def firmware_policy(samples, times, mode, threshold, heartbeat):
+    """Indices onlyserial2s would send in `mode` (a copy of shouldReport)."""
+    if mode == 'fixed':
+        return np.arange(len(samples))
+    sent = []
+    ref = None
+    last_send = last_move = -1e9
+    for i, (v, t) in enumerate(zip(samples, times)):
+        now = int(t * 1000)
+        moved = ref is None or np.any(np.abs(v - ref) >= threshold)
+        if moved:
+            last_move = now
+            ref = v
+        if now - last_send >= heartbeat:
+            send = True
+        elif mode == 'change':
+            send = moved
+        else:
+            send = now - last_move < IDLE_HOLD_MS
+        if send:
+            last_send = now
+            sent.append(i)
+    return np.array(sent, dtype=int)
+
+
+def write_capture(path, samples, times, sent):
+    size = 0
+    with CaptureWriter(path) as rec:
+        for i in sent:
+            x1, y1, x2, y2 = samples[i]
+            line = (f"Joystick 1 -> X: {x1} | Y: {y1} | Direction: Center\r\n"
+                    f"Joystick 2 -> X: {x2} | Y: {y2} | Direction: Center\r\n").encode()
+            rec.write(line, int(times[i] * 1e9))
+            size += len(line)
+    return size
+
+
+def pipeline_cpu(path, cal):
+    sink = CountSink()
+    pipeline = Pipeline(cal, sinks=[sink], max_rate=0, pair_timeout=0.02)
+    t0 = time.process_time()
+    asyncio.run(pipeline.run(ReplaySerial(path, 0)))
+    return time.process_time() - t0, sink.count
+
+
+def onset_delays(samples, truth, moving, times, sent, threshold):
+    """ms between the stick and the host crossing `threshold` from centre, per motion."""
+    away = np.any(np.abs(truth - 2048) >= threshold, axis=1)
+    seen = np.zeros(len(samples), dtype=bool)
+    seen[sent] = np.any(np.abs(samples[sent] - 2048) >= threshold, axis=1)
+    delays = []
+    for edge in np.flatnonzero(moving[1:] & ~moving[:-1]) + 1:
+        stick = edge + np.argmax(away[edge:])
+        host = edge + np.argmax(seen[edge:])
+        if away[stick] and seen[host]:
+            delays.append(max(times[host] - times[stick], 0) * 1000)
+    return np.array(delays)
+
+
+def hold_error(truth, samples, sent):
+    """Last report minus the noiseless position, per sample."""
+    held = np.searchsorted(sent, np.arange(len(samples)), side='right') - 1
+    held[held < 0] = 0
+    return samples[sent[held]] - truth
+
+
+def main(args):
+    samples, truth, times, moving = synth_session(args.seconds, args.rate, args.noise)
+    threshold = args.threshold or max(8, 6 * args.noise)     # 2 × the 3-sigma noise
+    tmp = tempfile.mkdtemp()
+    try:
+        cal_path = os.path.join(tmp, 'cal.json')
+        with open(cal_path, 'w') as f:
+            json.dump(CAL, f)
+        cal = Calibration.load(cal_path, cal_path)
+        duration = times[-1] - times[0]
+        rest_s = np.count_nonzero(~moving) / args.rate
+        move_s = np.count_nonzero(moving) / args.rate
+        print(f"{args.seconds:g}s at {args.rate:g} Hz, noise σ={args.noise:g}, "
+              f"threshold {threshold:g} counts, heartbeat {args.heartbeat} ms; "
+              f"{rest_s:.0f}s at rest, {move_s:.0f}s moving")
+        print(f"{'mode':8s} {'frames/s rest':>13s} {'moving':>7s} {'bytes/s':>8s} {'CPU':>6s} "
+              f"{'onset ms':>9s} {'err rest':>9s} {'moving':>7s}")
+        for mode in MODES:
+            sent = firmware_policy(samples, times, mode, threshold, args.heartbeat)
+            path = os.path.join(tmp, f'{mode}.jbcap')
+            size = write_capture(path, samples, times, sent)
+            cpu, _ = pipeline_cpu(path, cal)
+            sent_moving = np.count_nonzero(moving[sent])
+            onset = onset_delays(samples, truth, moving, times, sent, threshold)
+            err = hold_error(truth, samples, sent)
+            rest_err = math.sqrt(np.mean(err[~moving] ** 2))
+            move_err = math.sqrt(np.mean(err[moving] ** 2))
+            print(f"{mode:8s} {(len(sent) - sent_moving) / rest_s:13.1f} "
+                  f"{sent_moving / move_s:7.1f} {size / duration:8,.0f} "
+                  f"{cpu / duration * 100:5.2f}% {np.mean(onset):9.1f} "
+                  f"{rest_err:9.1f} {move_err:7.1f}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--seconds', type=float, default=60)
+    ap.add_argument('--rate', type=float, default=500, help='firmware samples/s')
+    ap.add_argument('--noise', type=float, default=6, help='ADC noise sigma, counts')
+    ap.add_argument('--threshold', type=int, default=0,
+                    help='change threshold, 0 = twice the 3-sigma noise')
+    ap.add_argument('--heartbeat', type=int, default=DEFAULT_HEARTBEAT, help='ms')
+    main(ap.parse_args())
@@ -0,0 +1,88 @@
+"""Per-frame cost of handing payloads from a worker to the supervisor.
+
+    python bench_ring.py [--frames 200000]
+
+  pipe   the old transport: Connection.send(payload) / recv() (pickle both ways)
+  ring   write_payload into a FrameRing, RingReader.latest + frame_payload
+         on the other side; the worker side allocates nothing per frame
+
+Both run producer and consumer in one process, so the figures are the
+serialization and copy cost without any scheduling noise.
+"""
+import argparse
+import multiprocessing
+import time
+import tracemalloc
+
+from bench_replay import CAL
+from joybridge.calibration import Calibration
+from joybridge.mapping import ControlMapping
+from joybridge.ring import FrameRing, RingReader, frame_payload, write_payload
+
+
+def payloads(n):
+    mapping = ControlMapping(Calibration(CAL, CAL))
+    return [mapping.payload(1000 + i % 2000, 3000 - i % 2000, 2048, 2048 + i % 700)
+            for i in range(n)]
+
+
+def bench_pipe(frames):
+    parent, child = multiprocessing.Pipe(duplex=False)
+    t0 = time.perf_counter()
+    for p in frames:
+        child.send(p)
+        parent.recv()
+    dt = time.perf_counter() - t0
+    parent.close()
+    child.close()
+    return dt
+
+
+def bench_ring(frames, write_only=False):
+    ring = FrameRing(capacity=256, create=True)
+    reader = RingReader(ring)
+    now = time.perf_counter
+    try:
+        t0 = now()
+        for p in frames:
+            write_payload(ring, p, t0)
+            if not write_only:
+                frame_payload(reader.latest())
+        return now() - t0
+    finally:
+        ring.close()
+
+
+def write_allocations(frames):
+    """Net blocks still allocated after writing every frame (i.e. per-frame garbage kept)."""
+    ring = FrameRing(capacity=256, create=True)
+    try:
+        write_payload(ring, frames[0], 0.0)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for p in frames:
+            write_payload(ring, p, 0.0)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return sum(s.count_diff for s in after.compare_to(before, 'lineno'))
+    finally:
+        ring.close()
+
+
+def main(args):
+    frames = payloads(args.frames)
+    best = lambda f, *a: min(f(*a) for _ in range(3))
+    pipe = best(bench_pipe, frames)
+    ring = best(bench_ring, frames)
+    write = best(bench_ring, frames, True)
+    n = len(frames)
+    print(f"pipe (pickle)      {pipe / n * 1e6:6.2f} µs/frame")
+    print(f"ring write+read    {ring / n * 1e6:6.2f} µs/frame")
+    print(f"ring write only    {write / n * 1e6:6.2f} µs/frame")
+    print(f"blocks kept after {min(n, 20000):,} ring writes: {write_allocations(frames[:20000])}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--frames', type=int, default=200000)
+    main(ap.parse_args())
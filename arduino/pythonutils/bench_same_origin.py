@@ -0,0 +1,207 @@
+"""Joystick WebSocket on its own port against serve.py's same-origin /ws/joystick.
+
+    python bench_same_origin.py [--rate 120] [--seconds 10] [--connects 50]
+
+One bridge process publishes the same payloads at --rate to both a
+WebSocketSink (ws://, its own port, what the page used to open) and an
+IpcSink, which a single serve.py worker relays at wss://…/ws/joystick.
+A blocking client measures, per path:
+
+  connect   TCP connect → 101 Switching Protocols (TLS handshake included),
+            and → the first frame, over --connects fresh connections
+  latency   bridge publish → frame read by the client, steady state, from
+            the frame's own sample time (same machine, same clock)
+
+The same-origin path is measured cold (full TLS handshake) and resumed
+(the TLS session from loading the page, which is what a browser has).
+The separate port is plain ws: the bridge has no TLS of its own, so a page
+served over https can only reach it through a tunnel or proxy.
+"""
+import argparse
+import base64
+import math
+import multiprocessing
+import os
+import socket
+import ssl
+import struct
+import subprocess
+import sys
+import time
+
+from joybridge.ws_frames import BINARY_SUBPROTOCOL, unpack_payload
+
+# ————— CONFIG —————
+HERE      = os.path.dirname(os.path.abspath(__file__))
+SITE      = os.path.normpath(os.path.join(HERE, '..', '..'))    # serve.py, cert.pem
+HOST      = '127.0.0.1'
+SITE_PORT = 5083
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def bridge(ws_port, ipc_port, rate):
+    """Publish two sticks moving in circles to both sinks, forever."""
+    import asyncio
+    import contextlib
+    import io
+
+    from joybridge.sinks import IpcSink, WebSocketSink
+
+    async def main():
+        sinks = [WebSocketSink(HOST, ws_port), IpcSink(HOST, ipc_port)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for s in sinks:
+                await s.start()
+        t0 = time.perf_counter()
+        n = 0
+        while True:
+            n += 1
+            a = 2 * math.pi * 0.5 * n / rate
+            payload = {'joystick1': {'x': math.cos(a), 'y': math.sin(a), 'direction': 'up'},
+                       'joystick2': {'x': math.sin(a), 'y': -math.cos(a), 'direction': 'down'},
+                       't': time.perf_counter() * 1000}
+            for s in sinks:
+                s.send(payload)
+            await asyncio.sleep(max(t0 + n / rate - time.perf_counter(), 0))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(main())
+
+
+def wait_listening(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), 0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+class WsClient:
+    """Just enough of an RFC 6455 client to time the upgrade and read server frames."""
+
+    def __init__(self, port, path, tls=None, session=None):
+        self.buf = b''
+        t0 = time.perf_counter()
+        sock = socket.create_connection((HOST, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if tls is not None:
+            sock = tls.wrap_socket(sock, session=session)
+        self.sock = sock
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {HOST}:{port}\r\nUpgrade: websocket\r\n"
+                     f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                     f"Sec-WebSocket-Version: 13\r\n"
+                     f"Sec-WebSocket-Protocol: {BINARY_SUBPROTOCOL}\r\n\r\n".encode())
+        while b'\r\n\r\n' not in self.buf:
+            self._fill()
+        head, _, self.buf = self.buf.partition(b'\r\n\r\n')
+        if not head.startswith(b'HTTP/1.1 101'):
+            raise ConnectionError(head.split(b'\r\n')[0].decode())
+        self.opened = time.perf_counter() - t0
+        self.t0 = t0
+
+    def _fill(self):
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError('closed')
+        self.buf += data
+
+    def frame(self):
+        """Payload of the next data frame."""
+        while True:
+            while len(self.buf) < 2:
+                self._fill()
+            opcode, n = self.buf[0] & 0x0F, self.buf[1] & 0x7F
+            head = 2
+            if n == 126:
+                while len(self.buf) < 4:
+                    self._fill()
+                n, head = struct.unpack_from('!H', self.buf, 2)[0], 4
+            while len(self.buf) < head + n:
+                self._fill()
+            data, self.buf = self.buf[head:head + n], self.buf[head + n:]
+            if opcode in (0x1, 0x2):
+                return data
+
+    def close(self):
+        self.sock.close()
+
+
+def percentiles(values, *qs):
+    values = sorted(values)
+    return [values[min(int(q * len(values)), len(values) - 1)] for q in qs] if values else \
+        [float('nan')] * len(qs)
+
+
+def measure(name, port, path, tls, resume, args):
+    session = None
+    if resume:      # what the page load left behind
+        c = WsClient(port, path, tls)
+        c.frame()
+        session = c.sock.session
+        c.close()
+    opened, first = [], []
+    for _ in range(args.connects):
+        c = WsClient(port, path, tls, session)
+        c.frame()
+        opened.append(c.opened * 1000)
+        first.append((time.perf_counter() - c.t0) * 1000)
+        c.close()
+    c = WsClient(port, path, tls, session)
+    lat = []
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        data = c.frame()
+        now_us = int(time.perf_counter() * 1e6)
+        sample_us = int(unpack_payload(data)['t'] * 1000)
+        lat.append(((now_us - sample_us) & 0xFFFFFFFF) / 1000)
+    c.close()
+    o50, o95 = percentiles(opened, 0.5, 0.95)
+    f50, = percentiles(first, 0.5)
+    l50, l95, l99 = percentiles(lat, 0.5, 0.95, 0.99)
+    print(f"{name:26s} {o50:7.2f} {o95:7.2f} {f50:8.2f} │ {len(lat) / args.seconds:7.1f} "
+          f"{l50:7.3f} {l95:7.3f} {l99:7.3f}")
+
+
+def main(args):
+    ws_port, ipc_port = free_port(), free_port(socket.SOCK_DGRAM)
+    board = multiprocessing.Process(target=bridge, args=(ws_port, ipc_port, args.rate), daemon=True)
+    board.start()
+    site = subprocess.Popen([sys.executable, 'serve.py', '--host', HOST, '--port', str(SITE_PORT),
+                             '--workers', '1', '--joystick-ipc', f'{HOST}:{ipc_port}'],
+                            cwd=SITE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not (wait_listening(ws_port) and wait_listening(SITE_PORT)):
+            print("[!] bridge or serve.py didn't start")
+            return 1
+        tls = ssl.create_default_context()
+        tls.check_hostname = False
+        tls.verify_mode = ssl.CERT_NONE
+        print(f"{os.cpu_count()} CPU(s); {args.rate:g} frames/s, {args.connects} connects, "
+              f"{args.seconds:g}s steady state per path; times in ms")
+        print(f"{'path':26s} {'open p50':>7s} {'p95':>7s} {'1st frame':>8s} │ {'frames/s':>7s} "
+              f"{'lat p50':>7s} {'p95':>7s} {'p99':>7s}")
+        measure('separate port ws://', ws_port, '/', None, False, args)
+        measure('same origin wss:// cold', SITE_PORT, '/ws/joystick', tls, False, args)
+        measure('same origin wss:// resumed', SITE_PORT, '/ws/joystick', tls, True, args)
+    finally:
+        site.terminate()
+        site.wait()
+        board.terminate()
+    return 0
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--rate', type=float, default=120, help='frames/s, the bridge default --max-rate')
+    ap.add_argument('--seconds', type=float, default=10)
+    ap.add_argument('--connects', type=int, default=50)
+    sys.exit(main(ap.parse_args()))
@@ -0,0 +1,124 @@
+"""Scaling benchmark for `joybridge serve` with N replayed devices.
+
+    python bench_supervisor.py [--devices 1,2,4,8,16] [--rate 500] [--seconds 4]
+
+Each device replays its own synthetic capture (bench_replay.synth_capture,
+two text lines per sample at --rate Hz) through a Supervisor worker.
+
+  realtime  captures played at 1x: every device should keep its full rate
+            while N grows; reports the CPU each device costs (worker +
+            its share of the supervisor), i.e. how many fit on one core
+  flat-out  captures played as fast as possible (output capped at
+            --max-rate per device, as `serve` does): aggregate samples/s
+            parsed across all workers, against the same N pipelines
+            sharing one process (and one GIL)
+
+Scaling past one core needs as many cores: the worker processes are
+independent, so flat-out throughput grows with min(N, cores).
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from bench_replay import CAL, synth_capture
+from joybridge.calibration import Calibration
+from joybridge.capture import ReplaySerial
+from joybridge.pipeline import Pipeline
+from joybridge.sinks import Sink
+from joybridge.supervisor import DeviceSpec, Supervisor
+
+
+class NullSink(Sink):
+    def send(self, payload):
+        pass
+
+
+def children_cpu():
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+async def run_supervised(specs, speed, max_rate):
+    sup = Supervisor(specs, '127.0.0.1', 0,
+                     options={'speed': speed, 'max_rate': max_rate, 'quiet': True})
+    first = []
+
+    def on_payload(device_id, payload):
+        if not first:
+            first.append(time.perf_counter())
+
+    sup.on_payload = on_payload
+    cpu0, child0 = time.process_time(), children_cpu()
+    await sup.start()
+    try:
+        await sup.wait()
+    finally:
+        await sup.stop()
+    wall = time.perf_counter() - first[0] if first else float('nan')
+    received = sum(d.reader.received for d in sup.devices.values())
+    return {
+        'received': received,
+        'wall': wall,
+        'parent_cpu': time.process_time() - cpu0,
+        'worker_cpu': children_cpu() - child0,
+    }
+
+
+async def run_inprocess(paths, cal, max_rate):
+    sinks = [NullSink() for _ in paths]
+    pipelines = [Pipeline(cal, sinks=[s], max_rate=max_rate) for s in sinks]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(p.run(ReplaySerial(path, 0)) for p, path in zip(pipelines, paths)))
+    return time.perf_counter() - t0
+
+
+def main(args):
+    counts = [int(n) for n in args.devices.split(',')]
+    tmp = tempfile.mkdtemp()
+    try:
+        cal_path = os.path.join(tmp, 'cal.json')
+        with open(cal_path, 'w') as f:
+            json.dump(CAL, f)
+        paths, flat = [], []
+        for i in range(max(counts)):
+            paths.append(os.path.join(tmp, f'dev{i}.jbcap'))
+            synth_capture(paths[-1], args.seconds, args.rate, False)
+            flat.append(os.path.join(tmp, f'flat{i}.jbcap'))
+            synth_capture(flat[-1], args.flat_samples / args.rate, args.rate, False)
+        print(f"{os.cpu_count()} CPU(s); realtime {args.seconds:g}s at {args.rate:g} Hz, "
+              f"flat-out {args.flat_samples:,} samples per device")
+        # worker start-up (interpreter, numpy import) isn't per-sample cost
+        empty = os.path.join(tmp, 'empty.jbcap')
+        synth_capture(empty, 0, args.rate, False)
+        print("devices  realtime: Hz/device  CPU/device   flat-out: workers    one process")
+        for n in counts:
+            specs = [DeviceSpec(f'dev{i}', paths[i], cal_path, cal_path) for i in range(n)]
+            flat_specs = [DeviceSpec(f'dev{i}', flat[i], cal_path, cal_path) for i in range(n)]
+            idle = asyncio.run(run_supervised(
+                [DeviceSpec(f'dev{i}', empty, cal_path, cal_path) for i in range(n)], 1.0, 0))
+            rt = asyncio.run(run_supervised(specs, 1.0, 0))
+            ff = asyncio.run(run_supervised(flat_specs, 0, args.max_rate))
+            ip_wall = asyncio.run(run_inprocess(flat[:n], Calibration(CAL, CAL), args.max_rate))
+            per_dev_hz = rt['received'] / n / rt['wall']
+            cpu = rt['worker_cpu'] - idle['worker_cpu'] + rt['parent_cpu'] - idle['parent_cpu']
+            print(f"{n:7d}  {per_dev_hz:18,.0f}  {cpu / n / rt['wall'] * 100:9.1f}%   "
+                  f"{n * args.flat_samples / ff['wall']:12,.0f}/s  "
+                  f"{n * args.flat_samples / ip_wall:12,.0f}/s")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--devices', default='1,2,4,8,16')
+    ap.add_argument('--rate', type=float, default=500)
+    ap.add_argument('--seconds', type=float, default=4)
+    ap.add_argument('--flat-samples', type=int, default=40000)
+    ap.add_argument('--max-rate', type=float, default=120,
+                    help='per-device output cap in the flat-out runs, as in `serve`')
+    main(ap.parse_args())
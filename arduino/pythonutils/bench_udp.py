@@ -0,0 +1,171 @@
+"""UDP transport check against a stand-in for the ESP32, on localhost.
+
+    python bench_udp.py [--rate 500] [--seconds 5]
+    python bench_udp.py --serve [--port 4210]     # stand-in board for manual runs:
+    python -m joybridge run --udp 127.0.0.1 --sink print
+
+The stand-in answers HELLO like esp32_with_wifi.ino and streams 16-byte
+frames of two sticks moving in circles. It can drop (--loss), duplicate
+and delay datagrams (exponential extra delay with mean --jitter ms, which
+also reorders them once it exceeds the frame interval), so the receiver's
+figures can be checked against what was actually done to the stream.
+
+For each scenario the bench reports what the stand-in did, what
+LinkStats measured (loss, late, duplicates, RFC 3550 jitter), the frames
+per second the pipeline delivered and the host CPU per frame.
+"""
+import argparse
+import asyncio
+import contextlib
+import heapq
+import io
+import math
+import multiprocessing
+import os
+import random
+import socket
+import time
+
+from bench_replay import CAL
+from joybridge.binary_frames import DualFrame, pack_raw
+from joybridge.calibration import Calibration
+from joybridge.pipeline import Pipeline
+from joybridge.sinks import Sink
+from joybridge.udp_source import HELLO, UDP_PORT, UdpFrameReceiver
+
+# ————— CONFIG —————
+SUBSCRIBER_TIMEOUT = 5.0    # s, as in the firmware
+
+#   name        loss  dup   jitter ms
+SCENARIOS = [
+    ('clean',    0.0,  0.0,  0.0),
+    ('lossy',    0.05, 0.0,  0.0),
+    ('jittery',  0.0,  0.0,  1.0),
+    ('reorder',  0.0,  0.01, 5.0),
+    ('bad wifi', 0.1,  0.01, 8.0),
+]
+
+
+class CountSink(Sink):
+    def __init__(self):
+        self.count = 0
+
+    def send(self, payload):
+        self.count += 1
+
+
+def stand_in(port, rate, seconds, loss, dup, jitter, seed=0, report=None):
+    """Serve frames like the board would; `report` (a Queue) gets the tallies at the end."""
+    rng = random.Random(seed)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', port))
+    sock.setblocking(False)
+    subscriber, last_hello = None, 0.0
+    interval = 1 / rate
+    frame = DualFrame()
+    pending = []        # (send time, order, datagram)
+    sent = dropped = duplicated = 0
+    t0 = time.perf_counter()
+    next_frame = None
+    end = t0 + seconds if seconds > 0 else float('inf')
+    while True:
+        now = time.perf_counter()
+        try:
+            while True:
+                data, addr = sock.recvfrom(64)
+                if data.startswith(HELLO.strip()):
+                    subscriber, last_hello = addr, now
+        except BlockingIOError:
+            pass
+        if subscriber and now - last_hello > SUBSCRIBER_TIMEOUT:
+            subscriber = None
+        if subscriber and next_frame is None:
+            next_frame = now
+        while next_frame is not None and next_frame <= now and next_frame < end:
+            a = 2 * math.pi * 0.5 * (next_frame - t0)
+            frame.timestamp = int((next_frame - t0) * 1e6)
+            frame.x1 = 2048 + int(1500 * math.cos(a))
+            frame.y1 = 2048 + int(1500 * math.sin(a))
+            frame.x2 = 2048 + int(1000 * math.sin(2 * a))
+            frame.y2 = 2048 + int(1000 * math.cos(2 * a))
+            raw = pack_raw(frame)
+            frame.seq = (frame.seq + 1) & 0xFFFF
+            for copy in range(2 if rng.random() < dup else 1):
+                if rng.random() < loss:
+                    dropped += 1
+                    continue
+                delay = rng.expovariate(1000 / jitter) if jitter else 0.0
+                heapq.heappush(pending, (next_frame + delay, sent + copy, raw))
+                duplicated += copy
+            sent += 1
+            next_frame += interval
+        while pending and pending[0][0] <= now:
+            sock.sendto(heapq.heappop(pending)[2], subscriber)
+        if next_frame is not None and next_frame >= end and not pending:
+            break
+        wake = next_frame if next_frame is not None and next_frame < end else now + 0.01
+        if pending:
+            wake = min(wake, pending[0][0])
+        if wake > now:
+            time.sleep(min(wake - now, 0.01))
+    sock.close()
+    if report is not None:
+        report.put({'frames': sent, 'dropped': dropped, 'duplicated': duplicated})
+
+
+async def receive(port, cal):
+    """Run the stream through a Pipeline until it stops; (frames out, CPU s, receiver)."""
+    sink = CountSink()
+    pipeline = Pipeline(cal, sinks=[sink], max_rate=0)
+    receiver = UdpFrameReceiver(pipeline.on_frame, f'127.0.0.1:{port}', idle_timeout=1.0)
+    cpu0 = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):      # "no UDP frames" at the end
+        await (await receiver.start())
+    return sink.count, time.process_time() - cpu0, receiver
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main(args):
+    if args.serve:
+        print(f"[+] Stand-in board on 127.0.0.1:{args.port}, {args.rate:g} frames/s. Ctrl-C to stop.")
+        try:
+            stand_in(args.port, args.rate, 0, args.loss, 0, args.jitter)
+        except KeyboardInterrupt:
+            pass
+        return
+    cal = Calibration(CAL, CAL)
+    print(f"{os.cpu_count()} CPU(s); {args.rate:g} frames/s for {args.seconds:g}s per scenario")
+    print(f"{'scenario':9s} {'sent':>6s} {'dropped':>8s} {'dup':>4s} {'jitter':>7s} │ "
+          f"{'lost':>6s} {'loss%':>6s} {'late':>5s} {'dup':>4s} {'jitter ms':>9s} "
+          f"{'out/s':>6s} {'µs/frame':>9s}")
+    for name, loss, dup, jitter in SCENARIOS:
+        port = free_port()
+        tallies = multiprocessing.Queue()
+        board = multiprocessing.Process(target=stand_in, daemon=True,
+                                        args=(port, args.rate, args.seconds, loss, dup, jitter,
+                                              0, tallies))
+        board.start()
+        count, cpu, receiver = asyncio.run(receive(port, cal))
+        sent = tallies.get()
+        board.join()
+        snap = receiver.stats.snapshot()
+        print(f"{name:9s} {sent['frames']:6d} {sent['dropped']:8d} {sent['duplicated']:4d} "
+              f"{jitter:5.1f}ms │ {snap['lost']:6d} {snap['loss_pct']:6.2f} {snap['late']:5d} "
+              f"{snap['duplicates']:4d} {snap['jitter_ms']:9.3f} "
+              f"{count / args.seconds:6.0f} {cpu / max(count, 1) * 1e6:9.1f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--rate', type=float, default=500)
+    ap.add_argument('--seconds', type=float, default=5)
+    ap.add_argument('--serve', action='store_true', help='just run the stand-in board')
+    ap.add_argument('--port', type=int, default=UDP_PORT, help='stand-in port with --serve')
+    ap.add_argument('--loss', type=float, default=0.0, help='drop probability with --serve')
+    ap.add_argument('--jitter', type=float, default=0.0, help='mean extra delay ms with --serve')
+    main(ap.parse_args())
@@ -7,6 +7,7 @@ import asyncio
 import websockets
 from pynput.mouse import Controller as MouseController, Button
 from pynput.keyboard import Controller as KeyboardController, Key
+from joybridge.broadcast_hub import BroadcastHub
 
 # CONFIG
 serial_port       = 'COM10'
@@ -15,7 +16,7 @@ calibration_file  = 'calibration_data.json'
 websocket_port    = 8765  # port for WebSocket clients
 
 # Globals for WebSocket
-connected_clients = set()
+hub              = BroadcastHub()
 ws_loop          = None  # will hold the asyncio loop
 
 # Initialize serial + controllers
@@ -71,12 +72,10 @@ def calibrate():
 
 async def websocket_handler(ws, path=None):
     print("WS Client connected")
-    connected_clients.add(ws)
     try:
-        await ws.wait_closed()
+        await hub.serve_client(ws)
     finally:
         print("WS Client disconnected")
-        connected_clients.remove(ws)
 
 def start_ws_server():
     global ws_loop
@@ -100,13 +99,10 @@ def start_ws_server():
         ws_loop.close()
 
 def broadcast_to_clients(payload: dict):
-    """Schedules a broadcast of JSON payload to all WS clients."""
-    if not connected_clients:
+    """Hands the payload to the hub on the WS loop; never blocks on clients."""
+    if ws_loop is None:
         return
-    msg = json.dumps(payload)
-    async def _bcast():
-        await asyncio.gather(*(ws.send(msg) for ws in connected_clients))
-    asyncio.run_coroutine_threadsafe(_bcast(), ws_loop)
+    ws_loop.call_soon_threadsafe(hub.publish, payload)
 
 # ————— Controller Modes (now broadcasting over WS instead of local input) —————
 
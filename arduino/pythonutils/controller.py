@@ -2,8 +2,8 @@ import serial
 from pynput.mouse import Controller as MouseController
 from pynput.keyboard import Controller as KBController
 import time
-import re
 import msvcrt  # Windows‐only
+from joybridge.joystick_parser import parse_line as parse_joystick_line
 
 # ————— CONFIG —————
 SERIAL_PORT        = 'COM10'      # change as needed
@@ -52,6 +52,17 @@ def map_joystick_value(val, offset):
         return int(v * 0.5)
     return int(v)
 
+def build_lut(offset, dead=10):
+    """map_joystick_value() plus the dead-zone for every 12-bit ADC code."""
+    lut = []
+    for v in range(4096):
+        m = map_joystick_value(v, offset)
+        lut.append(0 if abs(m) < dead else m)
+    return lut
+
+x_lut = build_lut(x_center_offset)
+y_lut = build_lut(y_center_offset)
+
 def start_calibration():
     global is_calibrating, calibration_samples, calibration_start_time
     print("[*] Calibration start — keep joystick centered…")
@@ -60,11 +71,13 @@ def start_calibration():
     calibration_start_time = time.time()
 
 def finish_calibration():
-    global is_calibrating, x_center_offset, y_center_offset
+    global is_calibrating, x_center_offset, y_center_offset, x_lut, y_lut
     if calibration_samples:
         xs, ys = zip(*calibration_samples)
         x_center_offset = sum(xs) // len(xs)
         y_center_offset = sum(ys) // len(ys)
+        x_lut = build_lut(x_center_offset)
+        y_lut = build_lut(y_center_offset)
         print(f"[+] Calibration done. Offsets: X={x_center_offset}, Y={y_center_offset}")
     else:
         print("[!] Calibration failed — no samples.")
@@ -72,13 +85,10 @@ def finish_calibration():
 
 def parse_line(line):
     """Expect lines like: 'Raw X: 1954, Y: 1887 | … Direction: Center'"""
-    m = re.search(r'X:\s*(-?\d+),\s*Y:\s*(-?\d+).*Direction:\s*(\w+)', line)
-    if not m:
+    f = parse_joystick_line(line)
+    if f is None or f.direction is None:
         return None
-    x_raw = int(m.group(1))
-    y_raw = int(m.group(2))
-    direction = m.group(3)
-    return x_raw, y_raw, direction
+    return f.x, f.y, f.direction
 
 # ————— MAIN LOOP —————
 print("Press 'c' to calibrate. Ctrl-C to quit.")
@@ -98,7 +108,7 @@ while True:
             continue
 
     # Read one line
-    raw = ser.readline().decode('utf-8', errors='ignore').strip()
+    raw = ser.readline().strip()
     if raw:
         parsed = parse_line(raw)
         if parsed:
@@ -114,12 +124,9 @@ while True:
                 # skip control actions while calibrating
                 continue
 
-            # map & deadzone
-            x_m = map_joystick_value(x_raw, x_center_offset)
-            y_m = map_joystick_value(y_raw, y_center_offset)
-            dead = 10
-            if abs(x_m) < dead: x_m = 0
-            if abs(y_m) < dead: y_m = 0
+            # map & deadzone: one table lookup per axis
+            x_m = x_lut[min(max(x_raw, 0), 4095)]
+            y_m = y_lut[min(max(y_raw, 0), 4095)]
 
             # feedback
             print(f"Raw X:{x_raw:4d} Y:{y_raw:4d} → Cal X:{x_m:4d} Y:{y_m:4d} Dir:{direction}")
@@ -0,0 +1,7 @@
+"""Serial joystick → WebSocket / keyboard bridge for the FPV drone sim.
+
+The pipeline is source → parser → calibration → filter → sinks; see
+`joybridge.pipeline`. Run it with `python -m joybridge run` (or the
+`joybridge` script once installed).
+"""
+__version__ = '0.1.0'
@@ -0,0 +1,222 @@
+"""Compact binary joystick frames (COBS + CRC-16) and a mixed-stream decoder.
+
+Frame layout before COBS encoding, little-endian, 16 bytes:
+
+    0   u8   frame type (FRAME_DUAL = 0x01)
+    1   u16  sequence number
+    3   u32  firmware timestamp, micros()
+    7   6B   X1, Y1, X2, Y2 as 12-bit values packed LSB first
+    13  u8   button bits (bit 0 = joystick 1, bit 1 = joystick 2)
+    14  u16  CRC-16/CCITT-FALSE over bytes 0..13
+
+On the wire each frame is COBS-encoded and terminated by a 0x00 byte, 18
+bytes per dual-stick sample against ~110 for the two text lines. COBS output
+never contains 0x00 and text lines never do either, so StreamDecoder can tell
+the two formats apart on the same port.
+"""
+import binascii
+import struct
+
+FRAME_DUAL = 0x01
+RAW_SIZE   = 16
+WIRE_SIZE  = RAW_SIZE + 1        # COBS-encoded, without the 0x00 delimiter
+
+_HEADER = struct.Struct('<BHI')
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), as in the firmware."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data):
+    out  = bytearray(b'\x00')
+    code_pos, code = 0, 1
+    for b in data:
+        if b:
+            out.append(b)
+            code += 1
+        if not b or code == 0xFF:
+            out[code_pos] = code
+            code_pos, code = len(out), 1
+            out.append(0)
+    out[code_pos] = code
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """Decode one COBS block (no delimiter). Returns None if malformed."""
+    out = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n + 1:
+            return None
+        out += data[i + 1:i + code]
+        i += code
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+class DualFrame:
+    """Both sticks from one firmware cycle."""
+
+    __slots__ = ('seq', 'timestamp', 'x1', 'y1', 'x2', 'y2', 'buttons')
+
+    def __init__(self, seq=0, timestamp=0, x1=0, y1=0, x2=0, y2=0, buttons=0):
+        self.seq       = seq
+        self.timestamp = timestamp
+        self.x1, self.y1 = x1, y1
+        self.x2, self.y2 = x2, y2
+        self.buttons   = buttons
+
+    def __repr__(self):
+        return (f"DualFrame(seq={self.seq}, timestamp={self.timestamp}, "
+                f"x1={self.x1}, y1={self.y1}, x2={self.x2}, y2={self.y2}, "
+                f"buttons={self.buttons})")
+
+
+def pack_raw(frame):
+    """The 16 frame bytes before COBS, CRC included (UDP datagrams carry these)."""
+    adc = (frame.x1 & 0xFFF) | (frame.y1 & 0xFFF) << 12 \
+        | (frame.x2 & 0xFFF) << 24 | (frame.y2 & 0xFFF) << 36
+    body = _HEADER.pack(FRAME_DUAL, frame.seq & 0xFFFF, frame.timestamp & 0xFFFFFFFF) \
+        + adc.to_bytes(6, 'little') + bytes((frame.buttons & 0xFF,))
+    return body + struct.pack('<H', crc16(body))
+
+
+def pack_frame(frame):
+    """Encode a DualFrame to its on-wire bytes, delimiter included."""
+    return cobs_encode(pack_raw(frame)) + b'\x00'
+
+
+def unpack_frame(block, frame=None):
+    """Decode one COBS block into `frame`. Returns None on any corruption."""
+    if len(block) != WIRE_SIZE:
+        return None
+    raw = cobs_decode(block)
+    if raw is None:
+        return None
+    return unpack_raw(raw, frame)
+
+
+def unpack_raw(raw, frame=None):
+    """Decode 16 un-encoded frame bytes into `frame`. Returns None on any corruption."""
+    if len(raw) != RAW_SIZE or raw[0] != FRAME_DUAL:
+        return None
+    if crc16(raw[:-2]) != raw[-2] | raw[-1] << 8:
+        return None
+    if frame is None:
+        frame = DualFrame()
+    _, frame.seq, frame.timestamp = _HEADER.unpack_from(raw)
+    adc = int.from_bytes(raw[7:13], 'little')
+    frame.x1 = adc & 0xFFF
+    frame.y1 = adc >> 12 & 0xFFF
+    frame.x2 = adc >> 24 & 0xFFF
+    frame.y2 = adc >> 36 & 0xFFF
+    frame.buttons = raw[13]
+    return frame
+
+
+class StreamDecoder:
+    """Split a serial byte stream into text lines and binary frames.
+
+    Text lines go to `on_line(bytes)` without CR/LF. Valid binary frames go
+    to `on_frame(DualFrame)`; the same DualFrame instance is reused, so copy
+    what you need. While in text mode the bytes of a line are still offered
+    as a binary frame if a 0x00 follows them (a frame may contain 0x0A).
+    After the first good frame the decoder stays in binary mode, and drops
+    back to text when a corrupt block contains a newline or more than a
+    frame's worth of bytes arrives without a delimiter, e.g. boot messages
+    after a reset.
+    """
+
+    MAX_PENDING = 256   # runaway data without a delimiter is dropped past this
+
+    def __init__(self, on_line, on_frame=None):
+        self.on_line   = on_line
+        self.on_frame  = on_frame
+        self.binary    = False
+        self.frames    = 0
+        self.errors    = 0
+        self.lost      = 0
+        self._frame    = DualFrame()
+        self._next_seq = None
+        self._buf      = bytearray()
+        self._text     = 0      # first byte not yet emitted as a line
+        self._block    = 0      # first byte after the last 0x00
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        if self.binary:
+            self._feed_binary()
+        else:
+            self._feed_text()
+        if len(buf) - self._text > self.MAX_PENDING:
+            buf.clear()
+            self._text = self._block = 0
+
+    def _feed_binary(self):
+        buf, start = self._buf, 0
+        while self.binary:
+            z = buf.find(b'\x00', start)
+            if z < 0:
+                break
+            self._block_done(buf[start:z])
+            start = z + 1
+        if self.binary and len(buf) - start > WIRE_SIZE:
+            self.binary = False     # too long for a frame: text again
+        del buf[:start]
+        self._text = self._block = 0
+        if not self.binary:
+            self._feed_text()
+
+    def _feed_text(self):
+        buf = self._buf
+        while True:
+            n = buf.find(b'\n', self._text)
+            z = buf.find(b'\x00', self._block)
+            if n >= 0 and (z < 0 or n < z):
+                line = bytes(buf[self._text:n]).rstrip(b'\r')
+                self._text = n + 1
+                if line:
+                    self.on_line(line)
+            elif z >= 0:
+                block = buf[max(self._block, z - WIRE_SIZE):z]
+                self._text = max(self._text, z + 1)
+                self._block = z + 1
+                if self._block_done(block):
+                    del buf[:z + 1]
+                    self._text = self._block = 0
+                    self._feed_binary()
+                    return
+            else:
+                break
+        keep = min(self._text, max(self._block, len(buf) - WIRE_SIZE))
+        if keep > 0:
+            del buf[:keep]
+            self._text  -= keep
+            self._block -= keep
+
+    def _block_done(self, block):
+        frame = unpack_frame(block, self._frame)
+        if frame is None:
+            self.errors += 1
+            if self.binary and b'\n' in block:
+                self.binary = False
+                for line in bytes(block).splitlines():
+                    if line.strip(b'\r'):
+                        self.on_line(line.rstrip(b'\r'))
+            return False
+        self.binary  = True
+        self.frames += 1
+        if self._next_seq is not None:
+            gap = (frame.seq - self._next_seq) & 0xFFFF
+            if gap < 0x8000:        # larger jumps are a firmware restart
+                self.lost += gap
+        self._next_seq = (frame.seq + 1) & 0xFFFF
+        if self.on_frame is not None:
+            self.on_frame(frame)
+        return True
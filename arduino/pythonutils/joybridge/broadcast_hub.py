@@ -0,0 +1,142 @@
+"""WebSocket fan-out with one latest-value slot per client.
+
+`publish()` never awaits: it encodes the payload once and drops it into each
+client's slot, overwriting whatever that client hasn't sent yet. A sender
+task per client drains its own slot, so a slow browser tab only ever falls
+behind by skipping frames and can't stall the serial loop or other clients.
+Unchanged payloads are not re-sent, and with `delta=True` a client that got
+the previous frame receives only the fields that changed. Clients served
+with `binary=True` get `encode_binary(payload, seq)` instead of JSON.
+JSON frames also carry `t`, the host's monotonic clock in ms: the
+payload's own `t` (when the pipeline read the sample) or else the time of
+publish. `t` alone changing doesn't make a payload new.
+"""
+import asyncio
+import json
+import time
+
+from websockets.exceptions import ConnectionClosed
+
+
+def same_payload(a, b):
+    """Equal apart from the `t` timestamp."""
+    if b is None or len(a) != len(b):
+        return False
+    for k, v in a.items():
+        if k != 't' and b.get(k) != v:
+            return False
+    return True
+
+
+def payload_delta(prev, cur):
+    """Fields of `cur` that differ from `prev`, one level into nested dicts."""
+    out = {}
+    for k, v in cur.items():
+        pv = prev.get(k)
+        if v == pv:
+            continue
+        if isinstance(v, dict) and isinstance(pv, dict):
+            out[k] = {kk: vv for kk, vv in v.items() if pv.get(kk) != vv}
+        else:
+            out[k] = v
+    return out
+
+
+class _Client:
+    __slots__ = ('ws', 'binary', 'slot', 'ready', 'sent', 'dropped')
+
+    def __init__(self, ws, binary):
+        self.ws      = ws
+        self.binary  = binary
+        self.slot    = None          # (seq, full, delta, binary) waiting to be sent
+        self.ready   = asyncio.Event()
+        self.sent    = None          # seq of the last frame sent
+        self.dropped = 0
+
+
+class BroadcastHub:
+    """Latest-value broadcast to every connected WebSocket."""
+
+    def __init__(self, delta=False, encode_binary=None):
+        self.delta         = delta
+        self.encode_binary = encode_binary
+        self.clients       = {}
+        self.seq           = 0
+        self.last          = None
+        self.current       = None
+        self.suppressed    = 0
+        self.on_sent       = None    # on_sent(seq) once a frame is on a client's socket
+        self.on_message    = None    # on_message(msg) for anything a client sends
+
+    def publish(self, payload):
+        """Queue `payload` (a dict) for every client. Call on the hub's loop."""
+        if same_payload(payload, self.last):
+            self.suppressed += 1
+            return
+        self.seq += 1
+        t     = payload.get('t')
+        if t is None:
+            t = round(time.perf_counter() * 1000, 3)
+        full  = json.dumps(dict(payload, seq=self.seq, t=t))
+        delta = None
+        if self.delta and self.last is not None:
+            delta = json.dumps(dict(payload_delta(self.last, payload),
+                                    seq=self.seq, t=t, delta=True))
+        binary = None
+        if self.encode_binary is not None and any(
+                c.binary for c in self.clients.values()):
+            binary = self.encode_binary(payload, self.seq)
+        self.last    = payload
+        self.current = (self.seq, full, delta, binary)
+        for c in self.clients.values():
+            if c.ready.is_set():
+                c.dropped += 1
+            c.slot = self.current
+            c.ready.set()
+
+    async def serve_client(self, ws, binary=False):
+        """Run for the lifetime of one connection (use as/inside a handler)."""
+        client = self.clients[ws] = _Client(ws, binary and self.encode_binary is not None)
+        if self.current is not None and not client.binary:
+            client.slot = self.current
+            client.ready.set()
+        sender = asyncio.create_task(self._sender(client))
+        try:
+            async for msg in ws:
+                if self.on_message is not None:
+                    self.on_message(msg)
+        except ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            del self.clients[ws]
+
+    async def _sender(self, client):
+        ws = client.ws
+        while True:
+            await client.ready.wait()
+            client.ready.clear()
+            seq, full, delta, binary = client.slot
+            if client.binary:
+                if binary is None:
+                    continue     # joined after this frame was encoded
+                msg = binary
+            elif delta is not None and client.sent == seq - 1:
+                msg = delta
+            else:
+                msg = full
+            try:
+                await ws.send(msg)
+            except Exception:
+                return           # connection closing; serve_client cleans up
+            client.sent = seq
+            if self.on_sent is not None:
+                self.on_sent(seq)
+
+    def stats(self):
+        return {
+            'clients':    len(self.clients),
+            'published':  self.seq,
+            'suppressed': self.suppressed,
+            'dropped':    sum(c.dropped for c in self.clients.values()),
+        }
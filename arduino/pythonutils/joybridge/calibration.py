@@ -0,0 +1,142 @@
+"""Per-joystick calibration: capture, load/save, thresholds and direction.
+
+Calibration files are the JSON written by the old calconv scripts:
+
+    {"center": {"x": .., "y": .., "err_x": .., "err_y": ..},
+     "up": {..}, "down": {..}, "left": {..}, "right": {..}}
+
+`err_x`/`err_y` are optional (calconv4 didn't record them). Files written
+by `calibrate_joystick` also hold a fitted "response" curve per axis (see
+joybridge.response; older files get one fitted on load) and the noise
+"filter" parameters (joybridge.smoothing).
+"""
+import json
+import time
+
+import numpy as np
+
+from .binary_frames import StreamDecoder
+from .joystick_parser import JoystickFrame, parse_line
+from .response import axis_lut, fit_stick, position_stats
+from .smoothing import default_params
+
+POSITIONS = ['Center', 'Up', 'Down', 'Left', 'Right']
+
+
+def load_calibration(filename):
+    """Read one stick's file; ValueError if it isn't a complete calibration."""
+    with open(filename) as f:
+        try:
+            cal = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{filename}: not valid JSON ({e})") from None
+    for pos in POSITIONS:
+        p = cal.get(pos.lower()) if isinstance(cal, dict) else None
+        if not isinstance(p, dict) or 'x' not in p or 'y' not in p:
+            raise ValueError(f"{filename}: no {pos} position, run `joybridge calibrate` again")
+    return cal
+
+
+def compute_thresholds(cal):
+    """From center and direction data compute dx/dy thresholds."""
+    cx, cy = cal['center']['x'], cal['center']['y']
+    # halfway to each extreme, minus the measured noise at rest
+    ex = cal['center'].get('err_x', 0)
+    ey = cal['center'].get('err_y', 0)
+    return {
+        'left':  abs(cx - cal['left']['x'])  // 2 - ex,
+        'right': abs(cal['right']['x'] - cx) // 2 - ex,
+        'up':    abs(cy - cal['up']['y'])    // 2 - ey,
+        'down':  abs(cal['down']['y'] - cy)  // 2 - ey,
+    }
+
+
+def resolve_direction(dx, dy, thr):
+    vert = horiz = ''
+    if dy < -thr['up']:     vert = 'up'
+    elif dy >  thr['down']: vert = 'down'
+    if dx < -thr['left']:    horiz = 'left'
+    elif dx >  thr['right']: horiz = 'right'
+    if vert and horiz:
+        return f'{vert}-{horiz}'
+    return vert or horiz or 'center'
+
+
+class Calibration:
+    """Centre offsets, direction thresholds and response LUTs for both sticks.
+
+    `lut_arrays` holds one float32 table per axis (x1, y1, x2, y2) for
+    vectorized use; `luts` are the same tables as lists, which is the
+    fastest thing to index one sample at a time.
+    """
+
+    def __init__(self, cal1, cal2):
+        self.raw        = (cal1, cal2)
+        self.center     = (cal1['center']['x'], cal1['center']['y'],
+                           cal2['center']['x'], cal2['center']['y'])
+        self.thresholds = (compute_thresholds(cal1), compute_thresholds(cal2))
+        self.response   = tuple(c.get('response') or fit_stick(c) for c in (cal1, cal2))
+        self.lut_arrays = tuple(axis_lut(r[axis]) for r in self.response for axis in 'xy')
+        self.luts       = tuple(a.tolist() for a in self.lut_arrays)
+
+    def normalize(self, x1, y1, x2, y2):
+        """Raw ADC readings → normalized [-1, 1] values, one lookup per axis."""
+        lx1, ly1, lx2, ly2 = self.luts
+        return lx1[x1], ly1[y1], lx2[x2], ly2[y2]
+
+    def normalize_block(self, raw):
+        """Same for an (N, 4) integer array of samples at once."""
+        raw = np.asarray(raw)
+        return np.stack([lut[raw[:, i]] for i, lut in enumerate(self.lut_arrays)], axis=1)
+
+    @classmethod
+    def load(cls, file1, file2):
+        return cls(load_calibration(file1), load_calibration(file2))
+
+
+# ————— Interactive capture —————
+
+def collect_samples(ser, num, seconds=2.0):
+    """Read (x, y) samples of joystick `num` for `seconds` at the full serial
+    rate, text or binary. Returns an (N, 2) int array."""
+    samples = []
+    frame   = JoystickFrame()
+
+    def on_line(raw):
+        if parse_line(raw, frame) is not None and frame.joystick == num:
+            samples.append((frame.x, frame.y))
+
+    def on_frame(f):
+        samples.append((f.x1, f.y1) if num == 1 else (f.x2, f.y2))
+
+    decoder = StreamDecoder(on_line, on_frame)
+    ser.reset_input_buffer()     # drop whatever queued up while we waited
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < seconds:
+        decoder.feed(ser.read(ser.in_waiting or 1))
+    return np.array(samples, dtype=np.int32).reshape(-1, 2)
+
+
+def calibrate_joystick(ser, num, filename):
+    """Walk the user through the positions; False (and nothing saved) if one got no samples."""
+    data = {}
+    for pos in POSITIONS:
+        input(f"Move joystick {num} to {pos}. Press ENTER when steady.")
+        samples = collect_samples(ser, num)
+        if len(samples):
+            st = data[pos.lower()] = position_stats(samples)
+            print(f"  {pos}: X={st['x']}±{st['err_x']}, Y={st['y']}±{st['err_y']}  "
+                  f"({st['n']} samples, {st['rejected']} outliers dropped)")
+        else:
+            print(f"[!] No samples for {pos}")
+    missing = [p for p in POSITIONS if p.lower() not in data]
+    if missing:
+        print(f"[!] Joystick {num}: nothing read at {', '.join(missing)}; {filename} left "
+              f"unchanged. Check the stick's wiring and calibrate again.\n")
+        return False
+    data['response'] = fit_stick(data)
+    data['filter'] = default_params(data)
+    with open(filename,'w') as f:
+        json.dump(data, f, indent=4)
+    print(f"[+] Saved → {filename}\n")
+    return True
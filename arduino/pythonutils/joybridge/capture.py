@@ -0,0 +1,180 @@
+"""Record raw serial bytes and replay them without hardware.
+
+Capture file layout, little-endian:
+
+    header  6B   magic b'JBCAP' + format version (1)
+            f64  wall-clock start, time.time() (informational)
+    record  u64  arrival time in ns since the first record
+            u16  chunk length
+            ...  chunk bytes, exactly as read from the port
+
+Records are appended in arrival order and never rewritten, so a capture
+cut short by Ctrl-C or a crash is still readable up to its last whole
+record. Replay feeds the chunks back at the recorded pace (`speed=1`),
+N times faster, or as fast as possible (`speed=0`), either in-process
+through ReplaySerial or to other programs through a pseudo-terminal.
+"""
+import os
+import struct
+import threading
+import time
+
+MAGIC    = b'JBCAP\x01'
+_START   = struct.Struct('<d')
+_RECORD  = struct.Struct('<QH')
+MAX_CHUNK = 0xFFFF
+
+
+class CaptureWriter:
+    """Append serial chunks with their arrival time to `path`."""
+
+    def __init__(self, path):
+        self.f       = open(path, 'wb')
+        self.t0      = None
+        self.records = 0
+        self.bytes   = 0
+        self.f.write(MAGIC + _START.pack(time.time()))
+
+    def write(self, data, t_ns=None):
+        if not data:
+            return
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        if self.t0 is None:
+            self.t0 = t_ns
+        offset = t_ns - self.t0
+        for i in range(0, len(data), MAX_CHUNK):
+            chunk = data[i:i + MAX_CHUNK]
+            self.f.write(_RECORD.pack(offset, len(chunk)))
+            self.f.write(chunk)
+            self.records += 1
+        self.bytes += len(data)
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_capture(path):
+    """Return (start_time, [(t_seconds, chunk), ...]) from a capture file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path}: not a joybridge capture")
+    pos = len(MAGIC)
+    start, = _START.unpack_from(data, pos)
+    pos += _START.size
+    records = []
+    while pos + _RECORD.size <= len(data):
+        t_ns, n = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        chunk = data[pos:pos + n]
+        if len(chunk) < n:
+            break        # truncated tail, keep what we have
+        records.append((t_ns / 1e9, chunk))
+        pos += n
+    return start, records
+
+
+class ReplaySerial:
+    """Serial-port stand-in that plays a capture back.
+
+    Implements the part of the pyserial API the bridge uses (read,
+    in_waiting, timeout, reset_input_buffer, close, is_open). It has no
+    file descriptor, so SerialLineReader drives it from its reader thread.
+    `is_open` goes False when the capture runs out.
+    """
+
+    def __init__(self, path, speed=1.0, loop_count=1):
+        _, self.records = read_capture(path)
+        self.speed      = speed
+        self.loop_count = loop_count
+        self.timeout    = None
+        self.is_open    = True
+        self._idx       = 0
+        self._pass      = 0
+        self._pending   = b''
+        self._t0        = None
+
+    def _due(self):
+        """Seconds until the next record is due (<= 0 means now)."""
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        if self.speed <= 0:
+            return 0.0
+        t = self.records[self._idx][0] / self.speed
+        return self._t0 + t - time.perf_counter()
+
+    def _advance(self):
+        if self._idx >= len(self.records):
+            self._pass += 1
+            if self._pass >= self.loop_count or not self.records:
+                self.is_open = False
+                return False
+            self._idx = 0
+            self._t0  = None
+        return True
+
+    @property
+    def in_waiting(self):
+        if self._pending:
+            return len(self._pending)
+        if self.is_open and self._advance() and self._due() <= 0:
+            return len(self.records[self._idx][1])
+        return 0
+
+    def read(self, size=1):
+        if not self._pending:
+            if not self.is_open or not self._advance():
+                return b''
+            wait = self._due()
+            if wait > 0:
+                if self.timeout is not None and wait > self.timeout:
+                    time.sleep(self.timeout)
+                    return b''
+                time.sleep(wait)
+            self._pending = self.records[self._idx][1]
+            self._idx += 1
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+    def reset_input_buffer(self):
+        self._pending = b''
+
+    def close(self):
+        self.is_open = False
+
+
+def replay_to_pty(path, speed=1.0, loop_count=1):
+    """Play a capture into a new pseudo-terminal (POSIX only).
+
+    Returns (device_name, thread); open device_name as the serial port in
+    any of the scripts. The thread ends when the capture is exhausted.
+    """
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    src = ReplaySerial(path, speed, loop_count)
+
+    def pump():
+        try:
+            while src.is_open:
+                data = src.read(MAX_CHUNK)
+                if data:
+                    os.write(master, data)
+        except OSError:
+            pass            # reader went away
+        finally:
+            time.sleep(0.2)  # let the reader drain before hanging up
+            os.close(master)
+
+    t = threading.Thread(target=pump, daemon=True)
+    t.start()
+    return os.ttyname(slave), t
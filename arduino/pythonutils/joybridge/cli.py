@@ -0,0 +1,405 @@
+"""Command line front end for the bridge.
+
+    joybridge run [--sink ws|ipc|keys|print ...] [--port COM10 | --udp 192.168.4.1] ...
+    joybridge serve --device rig1=/dev/ttyUSB0 --device rig2=... | --discover
+    joybridge calibrate [--joystick 1|2|both]
+    joybridge record --out session.jbcap [--seconds 30]
+    joybridge replay session.jbcap [--speed 1]
+    joybridge fly session.jbcap ... [--save run.npz] [--against run.npz]
+    joybridge ports
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import serial
+import serial.tools.list_ports
+
+from . import __version__
+from .calibration import Calibration, calibrate_joystick
+from .capture import CaptureWriter, ReplaySerial, replay_to_pty
+from .flight_model import (FPS, JITTER_BUFFER, MAX_EXTRAPOLATION, Flight, load_capture, simulate,
+                           summarize)
+from .metrics import LatencyTracker, MetricsServer
+from .pipeline import Pipeline, build_filters
+from .reporting import DEFAULT_HEARTBEAT, MODES, ReportMode, report_mode, request_mode
+from .sinks import SINKS, IpcSink, WebSocketSink
+from .smoothing import KINDS
+from .supervisor import DeviceSpec, Supervisor, discover_ports
+from .udp_source import DEVICE_ADDR
+
+# ————— CONFIG defaults —————
+DEFAULT_PORT = 'COM10' if sys.platform == 'win32' else '/dev/ttyUSB0'
+DEFAULT_BAUD = 115200
+CAL_FILE_1   = 'calibration_data_joy1.json'
+CAL_FILE_2   = 'calibration_data_joy2.json'
+
+
+def open_serial(args, timeout=1):
+    try:
+        return serial.Serial(args.port, args.baud, timeout=timeout)
+    except serial.SerialException as e:
+        print(f"[!] Cannot open {args.port}: {e}")
+        sys.exit(1)
+
+
+def build_sinks(args, tracker=None):
+    sinks = []
+    for name in args.sink or ['ws']:
+        if name == 'ws':
+            sinks.append(WebSocketSink(args.ws_host, args.ws_port, delta=args.delta,
+                                       tracker=tracker))
+        elif name == 'ipc':
+            sinks.append(IpcSink(port=args.ipc_port, tracker=tracker))
+        else:
+            sinks.append(SINKS[name]())
+    return sinks
+
+
+async def run_pipeline(pipeline, ser, recorder=None, metrics=None, report=None):
+    if metrics:
+        await metrics.start()
+    try:
+        await pipeline.run(ser, tap=recorder.write if recorder else None, report=report)
+    finally:
+        if metrics:
+            await metrics.stop()
+            print(f"[+] Latency (ms): {metrics.tracker.snapshot()}")
+
+
+def cmd_run(args):
+    try:
+        cal = Calibration.load(args.calibration1, args.calibration2)
+    except FileNotFoundError as e:
+        print(f"[!] {e.filename} not found, run `joybridge calibrate` first")
+        return 1
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 1
+    try:
+        filters = build_filters(cal, args.smoothing, args.deadzone)
+        report = report_mode(args.report, args.report_rate, args.report_threshold,
+                             args.heartbeat, cal)
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 2
+    tracker = LatencyTracker() if args.metrics_port else None
+    pipeline = Pipeline(cal, filters, build_sinks(args, tracker),
+                        max_rate=args.max_rate, pair_timeout=args.pair_timeout,
+                        tracker=tracker)
+    metrics = MetricsServer(tracker, args.metrics_host, args.metrics_port) if tracker else None
+    if args.udp:
+        return run_udp(pipeline, args, metrics)
+    if args.replay:
+        ser = ReplaySerial(args.replay, args.speed)
+        print(f"[+] Replaying {args.replay} ({len(ser.records)} chunks) at "
+              f"{'max speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+    else:
+        ser = open_serial(args)
+    recorder = CaptureWriter(args.record) if args.record else None
+    print("[+] Running bridge. Ctrl-C to exit.")
+    try:
+        asyncio.run(run_pipeline(pipeline, ser, recorder, metrics, report))
+    except KeyboardInterrupt:
+        pass
+    except (serial.SerialException, OSError) as e:
+        print(f"[!] Serial port lost: {e}")
+        return 1
+    finally:
+        ser.close()
+        print("[+] Serial closed")
+        if recorder:
+            recorder.close()
+            print(f"[+] Recorded {recorder.bytes} bytes → {args.record}")
+    return 0
+
+
+def run_udp(pipeline, args, metrics=None):
+    async def main():
+        if metrics:
+            await metrics.start()
+        try:
+            await pipeline.run_udp(args.udp, port=args.udp_port, idle_timeout=args.udp_timeout)
+        finally:
+            if metrics:
+                await metrics.stop()
+                print(f"[+] Latency (ms): {metrics.tracker.snapshot()}")
+
+    print("[+] Running bridge over UDP. Ctrl-C to exit.")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"[!] UDP socket: {e}")
+        return 1
+    return 0
+
+
+async def run_supervisor(supervisor):
+    await supervisor.start()
+    try:
+        await supervisor.wait()
+    finally:
+        await supervisor.stop()
+
+
+def cmd_serve(args):
+    try:
+        specs = [DeviceSpec.parse(d, args.calibration1, args.calibration2)
+                 for d in args.device or []]
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 2
+    if args.discover:
+        for port in discover_ports():
+            specs.append(DeviceSpec(os.path.basename(port), port,
+                                    args.calibration1, args.calibration2))
+    if not specs:
+        print("[!] No devices: pass --device ID=PORT or --discover")
+        return 1
+    options = {'baud': args.baud, 'max_rate': args.max_rate, 'pair_timeout': args.pair_timeout,
+               'deadzone': args.deadzone, 'smoothing': args.smoothing,
+               'report': args.report, 'report_rate': args.report_rate,
+               'report_threshold': args.report_threshold, 'heartbeat': args.heartbeat,
+               'speed': args.speed, 'loop': args.loop}
+    try:
+        supervisor = Supervisor(specs, args.ws_host, args.ws_port, args.delta, options)
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 2
+    try:
+        asyncio.run(run_supervisor(supervisor))
+    except KeyboardInterrupt:
+        pass
+    for device_id, stats in supervisor.stats().items():
+        print(f"[+] {device_id}: {stats}")
+    return 0
+
+
+def cmd_calibrate(args):
+    ser = open_serial(args)
+    # calibration wants every sample, whatever the firmware was left in
+    if request_mode(ser, ReportMode('fixed')) is None:
+        print("[!] Firmware didn't answer the report mode request, calibrating its stream as is")
+    ok = True
+    try:
+        if args.joystick in ('1', 'both'):
+            ok = calibrate_joystick(ser, 1, args.calibration1) and ok
+        if args.joystick in ('2', 'both'):
+            ok = calibrate_joystick(ser, 2, args.calibration2) and ok
+    finally:
+        ser.close()
+    return 0 if ok else 1
+
+
+def cmd_record(args):
+    ser = open_serial(args, timeout=0.1)
+    print(f"[+] Recording {args.port} → {args.out}. Ctrl-C to stop.")
+    t_end = time.monotonic() + args.seconds if args.seconds > 0 else float('inf')
+    with CaptureWriter(args.out) as rec:
+        try:
+            while time.monotonic() < t_end:
+                data = ser.read(ser.in_waiting or 1)
+                if data:
+                    rec.write(data)
+        except KeyboardInterrupt:
+            pass
+        except (serial.SerialException, OSError) as e:
+            print(f"[!] Serial port lost: {e}")
+        finally:
+            ser.close()
+    print(f"[+] {rec.records} chunks, {rec.bytes} bytes")
+    return 0
+
+
+def cmd_replay(args):
+    name, pump = replay_to_pty(args.capture, args.speed, args.loop)
+    print(f"[+] Replaying {args.capture} on {name} (Ctrl-C to stop)")
+    try:
+        pump.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_fly(args):
+    try:
+        cal = Calibration.load(args.calibration1, args.calibration2)
+    except FileNotFoundError as e:
+        print(f"[!] {e.filename} not found, run `joybridge calibrate` first")
+        return 1
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 1
+    reference = None
+    if args.against:
+        try:
+            reference = Flight.load(args.against)
+        except OSError as e:
+            print(f"[!] Cannot read {args.against}: {e}")
+            return 1
+        if len(reference.names) != len(args.captures):
+            print(f"[!] {args.against} flew {len(reference.names)} capture(s), not {len(args.captures)}")
+            return 2
+    streams = []
+    try:
+        for path in args.captures:
+            filters = build_filters(cal, args.smoothing, args.deadzone)   # fresh state per capture
+            streams.append(load_capture(path, cal, filters, args.max_rate, args.pair_timeout))
+    except (OSError, ValueError) as e:
+        print(f"[!] {e}")
+        return 2
+    t0 = time.perf_counter()
+    flight = simulate(streams, args.fps, args.jitter_buffer, args.max_extrapolation)
+    elapsed = time.perf_counter() - t0
+    flown = sum(flight.times[n - 1] for n in flight.frames if n)
+    print(f"[+] {flown:.1f}s of flight in {elapsed * 1000:.1f} ms "
+          f"({flown / max(elapsed, 1e-9):.0f}x real time)")
+    print(f"{'capture':24s} {'frames':>7s} {'path m':>8s} {'drift m':>8s} {'yaw °':>7s} "
+          f"{'final m':>8s} {'over m':>7s} {'arrive s':>8s} {'rms m':>7s}")
+    for name, n, m in zip(flight.names, flight.frames, summarize(flight, reference)):
+        print(f"{os.path.basename(name)[-24:]:24s} {n:7d} {m['path']:8.2f} {m['drift']:8.3f} "
+              f"{m['yaw_drift']:7.1f} {m['final_error']:8.3f} {m['overshoot']:7.3f} "
+              f"{m['time_to_target']:8.2f} {m['rms']:7.3f}")
+    if args.save:
+        flight.save(args.save)
+        print(f"[+] Trajectories → {args.save}")
+    return 0
+
+
+def cmd_ports(args):
+    for p in serial.tools.list_ports.comports():
+        print(f"{p.device}\t{p.description}")
+    return 0
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog='joybridge', description='Joystick serial bridge.')
+    ap.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    def serial_args(p):
+        p.add_argument('--port', default=DEFAULT_PORT)
+        p.add_argument('--baud', type=int, default=DEFAULT_BAUD)
+        p.add_argument('--calibration1', default=CAL_FILE_1)
+        p.add_argument('--calibration2', default=CAL_FILE_2)
+
+    def report_args(p):
+        p.add_argument('--report', choices=['keep', *MODES], default='keep',
+                       help="leave the firmware's reporting alone (keep, the default: other "
+                            'readers of the board see the same stream) or ask it to send every '
+                            'sample (fixed), only changes (change) or nothing but a heartbeat '
+                            'while the sticks rest (idle)')
+        p.add_argument('--report-rate', type=int, default=0,
+                       help="firmware samples/s, 0 = keep the firmware's rate")
+        p.add_argument('--report-threshold', type=int, default=0,
+                       help='ADC counts that count as movement, 0 = from the calibration noise')
+        p.add_argument('--heartbeat', type=int, default=DEFAULT_HEARTBEAT,
+                       help='ms between reports while nothing changes')
+
+    run = sub.add_parser('run', help='bridge the serial port to one or more sinks')
+    serial_args(run)
+    run.add_argument('--sink', action='append', choices=sorted(SINKS),
+                     help='output stage, repeatable (default: ws)')
+    run.add_argument('--ws-host', default='0.0.0.0')
+    run.add_argument('--ws-port', type=int, default=8765)
+    run.add_argument('--delta', action='store_true',
+                     help='send only changed fields to WebSocket clients')
+    run.add_argument('--ipc-port', type=int, default=8766,
+                     help="loopback UDP port serve.py's /ws/joystick subscribes to (--sink ipc)")
+    run.add_argument('--max-rate', type=float, default=120,
+                     help='cap on frames/s handed to the sinks, 0 = unlimited')
+    run.add_argument('--pair-timeout', type=float, default=0.02,
+                     help='seconds to wait for the other stick before sending a stale pair')
+    run.add_argument('--deadzone', type=int, default=0,
+                     help='zero offsets smaller than this many ADC counts')
+    run.add_argument('--smoothing', choices=['auto', 'off', *KINDS], default='auto',
+                     help="noise filter; auto = the calibration files' filter.kind")
+    report_args(run)
+    run.add_argument('--record', metavar='FILE',
+                     help='also save the raw serial stream to a capture file')
+    run.add_argument('--replay', metavar='FILE',
+                     help='read from a capture file instead of the serial port')
+    run.add_argument('--speed', type=float, default=1.0,
+                     help='replay speed multiplier, 0 = as fast as possible')
+    run.add_argument('--udp', nargs='?', const=DEVICE_ADDR, metavar='HOST[:PORT]',
+                     help=f'read frames from a WiFi board over UDP instead (default {DEVICE_ADDR})')
+    run.add_argument('--udp-port', type=int, default=0,
+                     help='local UDP port, 0 = any (the board answers wherever HELLO came from)')
+    run.add_argument('--udp-timeout', type=float, default=0,
+                     help='stop after this many seconds without a frame, 0 = never')
+    run.add_argument('--metrics-port', type=int, default=0,
+                     help='serve per-stage latency histograms over HTTP, 0 = off')
+    run.add_argument('--metrics-host', default='127.0.0.1')
+    run.set_defaults(func=cmd_run)
+
+    srv = sub.add_parser('serve', help='one worker process per device, one WebSocket server')
+    srv.add_argument('--device', action='append', metavar='ID=PORT[,CAL1,CAL2]',
+                     help='repeatable; a PORT ending in .jbcap replays that capture, '
+                          'udp://HOST[:PORT] streams from a WiFi board')
+    srv.add_argument('--discover', action='store_true',
+                     help='also add every USB serial port, named after the port')
+    srv.add_argument('--baud', type=int, default=DEFAULT_BAUD)
+    srv.add_argument('--calibration1', default=CAL_FILE_1,
+                     help='default for devices without their own files')
+    srv.add_argument('--calibration2', default=CAL_FILE_2)
+    srv.add_argument('--ws-host', default='0.0.0.0')
+    srv.add_argument('--ws-port', type=int, default=8765)
+    srv.add_argument('--delta', action='store_true')
+    srv.add_argument('--max-rate', type=float, default=120,
+                     help='per-device cap on frames/s, 0 = unlimited')
+    srv.add_argument('--pair-timeout', type=float, default=0.02)
+    srv.add_argument('--deadzone', type=int, default=0)
+    srv.add_argument('--smoothing', choices=['auto', 'off', *KINDS], default='auto')
+    report_args(srv)
+    srv.add_argument('--speed', type=float, default=1.0, help='replay speed for .jbcap devices')
+    srv.add_argument('--loop', type=int, default=1, help='replay passes for .jbcap devices')
+    srv.set_defaults(func=cmd_serve)
+
+    cal = sub.add_parser('calibrate', help='record calibration files')
+    serial_args(cal)
+    cal.add_argument('--joystick', choices=['1', '2', 'both'], default='both')
+    cal.set_defaults(func=cmd_calibrate)
+
+    rec = sub.add_parser('record', help='save the raw serial stream to a capture file')
+    serial_args(rec)
+    rec.add_argument('--out', required=True)
+    rec.add_argument('--seconds', type=float, default=0, help='0 = until Ctrl-C')
+    rec.set_defaults(func=cmd_record)
+
+    rep = sub.add_parser('replay', help='play a capture into a pseudo-terminal')
+    rep.add_argument('capture')
+    rep.add_argument('--speed', type=float, default=1.0,
+                     help='speed multiplier, 0 = as fast as possible')
+    rep.add_argument('--loop', type=int, default=1, help='number of passes')
+    rep.set_defaults(func=cmd_replay)
+
+    fly = sub.add_parser('fly', help="fly captures through the training page's flight model")
+    fly.add_argument('captures', nargs='+', metavar='capture')
+    fly.add_argument('--calibration1', default=CAL_FILE_1)
+    fly.add_argument('--calibration2', default=CAL_FILE_2)
+    fly.add_argument('--max-rate', type=float, default=120, help='as for run')
+    fly.add_argument('--pair-timeout', type=float, default=0.02)
+    fly.add_argument('--deadzone', type=int, default=0)
+    fly.add_argument('--smoothing', choices=['auto', 'off', *KINDS], default='auto')
+    fly.add_argument('--fps', type=float, default=FPS, help='headset frames/s')
+    fly.add_argument('--jitter-buffer', type=float, default=JITTER_BUFFER,
+                     help="ms, the page's jitterBuffer")
+    fly.add_argument('--max-extrapolation', type=float, default=MAX_EXTRAPOLATION,
+                     help="ms, the page's maxExtrapolation")
+    fly.add_argument('--save', metavar='FILE.npz', help='write the trajectories')
+    fly.add_argument('--against', metavar='FILE.npz',
+                     help='an earlier --save of the same captures to compare with')
+    fly.set_defaults(func=cmd_fly)
+
+    ports = sub.add_parser('ports', help='list serial ports')
+    ports.set_defaults(func=cmd_ports)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
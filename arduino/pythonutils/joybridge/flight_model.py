@@ -0,0 +1,364 @@
+"""Headless replica of the training page's flight model, for regression runs.
+
+The drone in templates/training.html is flown by `drone-controls`: every
+rendered frame `sampleInput` plays the joystick frames back jitterBuffer ms
+behind the newest one (interpolating between frames, following the trend
+for up to maxExtrapolation ms when one is late), `processJoystickInput`
+turns the four intensities into moves scaled by the frame time and `tick`
+adds them up, turning the X/Z move by the heading. This module does the
+same arithmetic with NumPy, for many input streams at once:
+
+    streams = [load_capture(path, cal, filters) for path in paths]
+    flight  = simulate(streams)           # times, inputs, positions, headings
+    for name, m in zip(flight.names, summarize(flight)):
+        print(name, m['drift'], m['overshoot'], m['time_to_target'])
+
+Fly the same captures before and after a calibration or filter change and
+pass the first run as `reference` to see what the change does to the
+flight (`joybridge fly` does this from the command line).
+
+Captures go through the real Pipeline on the capture's own clock, so
+filters, the throttle and the pair timeout see the recorded timing. The
+network is taken to be perfect: a frame reaches the page the moment the
+bridge sends it. Frames are rendered at a fixed rate. Keep the constants
+below in sync with drone-controls and the joystick-layout script.
+"""
+import heapq
+import math
+
+import numpy as np
+
+from .binary_frames import StreamDecoder
+from .broadcast_hub import same_payload
+from .capture import read_capture
+from .pipeline import Pipeline
+from .sinks import Sink
+from .ws_frames import Q15
+
+# ————— CONFIG (templates/training.html) —————
+MOVE_SPEED        = 0.01      # per ms of frame time, × intensity × MOVE_GAIN
+MOVE_GAIN         = 2
+ROTATE_SPEED      = 0.005     # degrees per ms of frame time, × intensity × ROTATE_GAIN
+ROTATE_GAIN       = 20
+DEG2RAD           = math.pi / 180
+START             = (0.0, 1.6, -5.0)    # the #drone entity's position
+JITTER_BUFFER     = 60        # ms, drone-controls jitterBuffer
+MAX_EXTRAPOLATION = 50        # ms, drone-controls maxExtrapolation
+INPUT_MAX_GAP     = 100       # ms, a longer gap between frames is held, not interpolated
+INPUT_BUFFER_SIZE = 32        # frames in the page's input ring
+FPS               = 72        # headset refresh rate
+SETTLE            = 1.0       # s flown after the last frame arrives
+
+# ————— CONFIG (metrics) —————
+TOLERANCE         = 0.25      # m from the target that counts as arrived
+REST              = 0.05      # intensity below which a stick counts as released
+
+
+class InputStream:
+    """Joystick frames as the page's input ring holds them.
+
+    `t` is each frame's sample time (ms), `axes` the (M, 4) intensities x1,
+    y1, x2, y2 and `recv` when it reached the page (ms, same clock; defaults
+    to `t`). Frames are stored like the joystick worker's store(): one
+    older than the newest is dropped, and `offset` is the page's clock
+    offset estimate after each frame.
+    """
+
+    def __init__(self, t, axes, recv=None, name=''):
+        t    = np.asarray(t, dtype=np.float64)
+        axes = np.asarray(axes, dtype=np.float64).reshape(-1, 4)
+        recv = t if recv is None else np.asarray(recv, dtype=np.float64)
+        keep, offset = [], []
+        current = math.inf
+        for i in range(len(t)):
+            source = t[i]
+            if keep:
+                newest = t[keep[-1]]
+                if source < newest - 1000 or source > newest + 10000:
+                    current = math.inf      # restarted bridge: the worker starts over
+                elif source < newest:
+                    continue
+            d = recv[i] - source
+            current = d if d < current else current + (d - current) * 0.002
+            keep.append(i)
+            offset.append(current)
+        self.name   = name
+        self.t      = t[keep]
+        self.axes   = axes[keep]
+        self.recv   = recv[keep]
+        self.offset = np.array(offset)
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def duration(self):
+        """ms from the first frame reaching the page to the last."""
+        return float(self.recv[-1] - self.recv[0]) if len(self.t) else 0.0
+
+
+class _Timer:
+    __slots__ = ('callback', 'cancelled')
+
+    def __init__(self, callback):
+        self.callback  = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _CaptureClock:
+    """The bit of an event loop Throttle and FrameAssembler use, on capture time.
+
+    time() is the capture's clock; timers fire in order as advance() moves it.
+    """
+
+    def __init__(self):
+        self.now     = 0.0
+        self._timers = []
+        self._seq    = 0
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        timer = _Timer(callback)
+        heapq.heappush(self._timers, (when, self._seq, timer))
+        self._seq += 1
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.now + delay, callback)
+
+    def advance(self, t):
+        while self._timers and self._timers[0][0] <= t:
+            when, _, timer = heapq.heappop(self._timers)
+            if not timer.cancelled:
+                self.now = when
+                timer.callback()
+        if t < math.inf:
+            self.now = t
+
+
+class _CollectSink(Sink):
+    """What the page would receive: intensities, sample time and delivery time."""
+
+    name = 'collect'
+
+    def __init__(self, clock, suppress=True):
+        self.clock    = clock
+        self.suppress = suppress
+        self.last     = None
+        self.t        = []
+        self.recv     = []
+        self.axes     = []
+
+    def send(self, payload):
+        # the WebSocket hub and the IPC relay don't resend unchanged sticks
+        if self.suppress and same_payload(payload, self.last):
+            return
+        self.last = payload
+        j1, j2 = payload['joystick1'], payload['joystick2']
+        self.t.append(payload['t'])
+        self.recv.append(self.clock.now * 1000)
+        self.axes.append((j1['x'], j1['y'], j2['x'], j2['y']))
+
+
+def load_capture(path, calibration, filters=(), max_rate=120, pair_timeout=0.02,
+                 quantize=True, suppress=True):
+    """Run a capture file through the Pipeline and return what the page gets.
+
+    Arguments are those of `joybridge run`; the filters must be fresh
+    (build_filters), they keep state. With `quantize` the intensities are
+    rounded to the binary protocol's Q15 steps, as the page decodes them;
+    `suppress` drops unchanged payloads like the WebSocket hub does.
+    """
+    clock = _CaptureClock()
+    sink = _CollectSink(clock, suppress)
+    pipeline = Pipeline(calibration, filters, [sink], max_rate, pair_timeout)
+    pipeline.clock = clock.time
+    pipeline.throttle.loop = pipeline.assembler.loop = clock
+    decoder = StreamDecoder(pipeline.on_line, pipeline.on_frame)
+    _, records = read_capture(path)
+    for t, chunk in records:
+        clock.advance(t)
+        decoder.feed(chunk)
+    clock.advance(math.inf)     # a held throttle value or an unpaired half
+    axes = np.array(sink.axes, dtype=np.float64).reshape(-1, 4)
+    if quantize:
+        axes = np.clip(np.round(axes * Q15), -Q15, Q15) / Q15
+    return InputStream(sink.t, axes, sink.recv, name=str(path))
+
+
+def sample_inputs(stream, now, jitter_buffer=JITTER_BUFFER, max_extrapolation=MAX_EXTRAPOLATION):
+    """Intensities drone-controls' sampleInput() yields at page times `now` (ms), (F, 4)."""
+    now = np.asarray(now, dtype=np.float64)
+    out = np.zeros((len(now), 4))
+    n = np.searchsorted(stream.recv, now, 'right')     # frames the page has by then
+    live = n > 0                                        # before the first one input stays 0
+    if not live.any():
+        return out
+    t, x = stream.t, stream.axes
+    n = n[live]
+    newest = n - 1
+    target = now[live] - stream.offset[newest] - jitter_buffer
+    late = target - t[newest]
+
+    # target at or past the newest frame: hold it, or follow the trend from
+    # the one before for max_extrapolation ms and ease back
+    prev = np.maximum(newest - 1, 0)
+    span = t[newest] - t[prev]
+    f = np.where(late < max_extrapolation, late, np.maximum(2 * max_extrapolation - late, 0))
+    f = f / np.where(span > 0, span, 1)
+    trend = (jitter_buffer > 0) & (span > 0) & (span < INPUT_MAX_GAP) & (f > 0)
+    a, b = x[prev], x[newest]
+    v = b + (b - a) * f[:, None]
+    v = np.where((b != 0) & (v * b > 0), np.clip(v, -1, 1), 0.0)
+    past = np.where(trend[:, None], v, b)
+
+    # target between frames: interpolate, unless the gap says the stick sat still
+    stop = np.maximum(n - INPUT_BUFFER_SIZE + 1, 0)
+    k = np.minimum(np.maximum(np.searchsorted(t, target, 'right'), stop), newest)
+    j = np.where(k > stop, k - 1, k)
+    span = t[k] - t[j]
+    hold = (j == k) | (span > INPUT_MAX_GAP)
+    f = (target - t[j]) / np.where(hold | (span <= 0), 1, span)    # 0 only on rows that use `past`
+    between = np.where(hold[:, None], x[j], x[j] + (x[k] - x[j]) * f[:, None])
+
+    ahead = (late < 0) if jitter_buffer > 0 else np.zeros(len(n), dtype=bool)
+    out[live] = np.where(ahead[:, None], between, past)
+    return out
+
+
+def integrate(inputs, delta):
+    """drone-controls' tick() over (N, F, 4) intensities at `delta` ms per frame.
+
+    Returns positions (N, F, 3) and headings (N, F, radians) after each frame.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    x1, y1, x2, y2 = inputs[..., 0], inputs[..., 1], inputs[..., 2], inputs[..., 3]
+    move_speed = MOVE_SPEED * delta
+    rotate_speed = ROTATE_SPEED * delta
+    # same operations in the same order as the JS, so the sums match it
+    move_z = move_speed * y1 * MOVE_GAIN
+    move_x = move_speed * x1 * MOVE_GAIN
+    move_y = -move_speed * y2 * MOVE_GAIN
+    rot_y = -rotate_speed * ROTATE_GAIN * x2
+    headings = np.cumsum(rot_y * DEG2RAD, axis=1)
+    sin, cos = np.sin(headings), np.cos(headings)
+    steps = np.empty(inputs.shape[:2] + (3,))
+    steps[..., 0] = move_z * sin + move_x * cos
+    steps[..., 1] = move_y
+    steps[..., 2] = move_z * cos - move_x * sin
+    start = np.broadcast_to(np.array(START), (len(inputs), 1, 3))
+    positions = np.cumsum(np.concatenate([start, steps], axis=1), axis=1)[:, 1:]
+    return positions, headings
+
+
+class Flight:
+    """Simulated flights of N streams on a common frame grid.
+
+    times (F,) s since each stream's first frame reached the page, inputs
+    (N, F, 4), positions (N, F, 3), headings (N, F) radians; frames (N,) is
+    how many frames of each belong to it (up to SETTLE after its last
+    frame), the rest pad the grid.
+    """
+
+    def __init__(self, names, times, inputs, positions, headings, frames):
+        self.names     = list(names)
+        self.times     = times
+        self.inputs    = inputs
+        self.positions = positions
+        self.headings  = headings
+        self.frames    = frames
+
+    def save(self, path):
+        np.savez_compressed(path, names=np.array(self.names), times=self.times,
+                            inputs=self.inputs, positions=self.positions,
+                            headings=self.headings, frames=self.frames)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            return cls(d['names'].tolist(), d['times'], d['inputs'], d['positions'],
+                       d['headings'], d['frames'])
+
+
+def simulate(streams, fps=FPS, jitter_buffer=JITTER_BUFFER, max_extrapolation=MAX_EXTRAPOLATION,
+             settle=SETTLE):
+    """Fly every stream from the moment its first frame arrives; returns a Flight."""
+    delta = 1000 / fps
+    frames = np.array([int((s.duration + settle * 1000) // delta) + 1 if len(s) else 0
+                       for s in streams])
+    count = int(frames.max()) if len(streams) else 0
+    grid = np.arange(count) * delta
+    inputs = np.zeros((len(streams), count, 4))
+    for i, s in enumerate(streams):
+        if len(s):
+            inputs[i] = sample_inputs(s, s.recv[0] + grid, jitter_buffer, max_extrapolation)
+    positions, headings = integrate(inputs, delta)
+    return Flight([s.name for s in streams], grid / 1000, inputs, positions, headings, frames)
+
+
+def summarize(flight, reference=None, tolerance=TOLERANCE, rest=REST):
+    """Per-stream metrics, a list of dicts.
+
+    The target is the reference's final position, or the stream's own
+    without a reference; times are s, distances m, angles degrees.
+
+      path            distance flown
+      drift           distance flown while the sticks rest (all |intensity|
+                      < rest in the reference if given, else in the stream)
+      yaw_drift       turn over the same frames
+      final_error     end position → target
+      overshoot       furthest past the target along the start → target line
+      time_to_target  until the drone comes within tolerance of the target
+                      and stays there (nan if it never does)
+      rms             RMS distance to the reference's position, frame by frame
+    """
+    out = []
+    for i in range(len(flight.names)):
+        m = int(flight.frames[i])
+        pos = np.concatenate([np.array(START)[None], flight.positions[i, :m]])
+        yaw = np.concatenate([[0.0], flight.headings[i, :m]])
+        steps = np.linalg.norm(np.diff(pos, axis=0), axis=1)
+        turns = np.abs(np.diff(yaw))
+        if reference is not None:
+            r = i if len(reference.names) > 1 else 0
+            mr = int(reference.frames[r])
+            ref_inputs = reference.inputs[r, :m]
+            target = reference.positions[r, mr - 1] if mr else pos[0]
+            common = min(m, mr)
+            rms = float(np.sqrt(np.mean(np.sum(
+                (flight.positions[i, :common] - reference.positions[r, :common]) ** 2, axis=1))))\
+                if common else math.nan
+        else:
+            ref_inputs = flight.inputs[i, :m]
+            target = pos[-1]
+            rms = math.nan
+        still = np.zeros(m, dtype=bool)
+        still[:len(ref_inputs)] = np.all(np.abs(ref_inputs) < rest, axis=1)
+        course = target - pos[0]
+        length = np.linalg.norm(course)
+        if length > 0:
+            overshoot = max(float(np.max((pos - pos[0]) @ (course / length)) - length), 0.0)
+        else:
+            overshoot = 0.0
+        away = np.nonzero(np.linalg.norm(pos - target, axis=1) > tolerance)[0]
+        if not len(away):
+            arrived = 0.0
+        elif away[-1] == len(pos) - 1:
+            arrived = math.nan
+        else:
+            arrived = float(flight.times[away[-1]])    # pos[k] is after frame k - 1
+        out.append({
+            'path':           float(steps.sum()),
+            'drift':          float(steps[still].sum()),
+            'yaw_drift':      float(np.degrees(turns[still].sum())),
+            'final_error':    float(np.linalg.norm(pos[-1] - target)),
+            'overshoot':      overshoot,
+            'time_to_target': arrived,
+            'rms':            rms,
+        })
+    return out
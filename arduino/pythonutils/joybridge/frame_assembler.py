@@ -0,0 +1,86 @@
+"""Pair 'Joystick 1' / 'Joystick 2' text lines into one frame per cycle.
+
+The firmware prints the two sticks as separate lines. Reading "two lines and
+hoping" drops every frame once the stream is off by one line; the assembler
+instead keeps the newest half per joystick and emits as soon as both halves
+of a cycle are in. If the partner doesn't show up within `timeout` seconds
+the frame goes out anyway with the missing half taken from the previous
+cycle and flagged stale.
+"""
+import asyncio
+
+STALE_1 = 0x01
+STALE_2 = 0x02
+
+
+class FrameAssembler:
+    """Call `on_pair(joy1, joy2, stale)` for every assembled frame.
+
+    `joy1`/`joy2` are (x, y, direction) tuples; `stale` is a bit mask of
+    STALE_1/STALE_2 for halves reused from an earlier cycle.
+
+    Counters:
+      complete    both halves from the same cycle
+      stale       sent after the timeout with one half reused
+      mismatched  a joystick reported twice before its partner arrived
+      dropped     halves that could not be sent (partner never seen yet)
+    """
+
+    def __init__(self, on_pair, timeout=0.02, loop=None):
+        self.on_pair    = on_pair
+        self.timeout    = timeout
+        self.loop       = loop
+        self.pending    = {}
+        self.latest     = {1: None, 2: None}
+        self.complete   = 0
+        self.stale      = 0
+        self.mismatched = 0
+        self.dropped    = 0
+        self._timer     = None
+
+    def add(self, joystick, sample):
+        """Feed one half; `joystick` is 1 or 2, `sample` is (x, y, direction)."""
+        if joystick not in self.latest:
+            return
+        if joystick in self.pending:
+            # the other half of the previous cycle was lost
+            self.mismatched += 1
+            self._flush()
+        self.pending[joystick] = sample
+        self.latest[joystick]  = sample
+        if len(self.pending) == 2:
+            self._cancel_timer()
+            self.pending.clear()
+            self.complete += 1
+            self.on_pair(self.latest[1], self.latest[2], 0)
+        elif self._timer is None and self.timeout > 0:
+            loop = self.loop or asyncio.get_running_loop()
+            self._timer = loop.call_later(self.timeout, self._flush)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush(self):
+        """Send the pending half with the other one from the last cycle."""
+        self._cancel_timer()
+        if not self.pending:
+            return
+        (joystick,) = self.pending
+        self.pending.clear()
+        other = 2 if joystick == 1 else 1
+        if self.latest[other] is None:
+            self.dropped += 1
+            return
+        self.stale += 1
+        self.on_pair(self.latest[1], self.latest[2],
+                     STALE_2 if other == 2 else STALE_1)
+
+    def stats(self):
+        return {
+            'complete':   self.complete,
+            'stale':      self.stale,
+            'mismatched': self.mismatched,
+            'dropped':    self.dropped,
+        }
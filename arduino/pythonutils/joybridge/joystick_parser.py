@@ -0,0 +1,86 @@
+"""Shared parser for the joystick serial text protocol.
+
+Understands the lines printed by the ESP32 sketches:
+
+    Joystick 1 -> X: 1910 | Y: 1743 | Direction: Up-Left   (onlyserial2s)
+    X: 1954 | Y: 1887 | Direction: Center                   (onlyserial)
+    Raw X: 1954, Y: 1887 | ... Direction: Center            (controller.py)
+
+Works directly on the bytes/bytearray/memoryview coming from pyserial, so
+callers don't need to decode or strip each line, and fills a reusable
+JoystickFrame instead of building tuples.
+"""
+import re
+
+# Exact onlyserial2s layout, tried first with an anchored match.
+_FIRMWARE = re.compile(
+    rb'Joystick (\d) -> X: (-?\d+) \| Y: (-?\d+) \| Direction: ([\w-]+)')
+# Anything else: one search anchored on the literal "X:" rather than a
+# leading greedy ".*" that backtracks over the whole line.
+_GENERIC = re.compile(
+    rb'X:\s*(-?\d+)[\s,|]*Y:\s*(-?\d+)(?:.*?Direction:\s*([\w-]+))?')
+_PREFIX = b'Joystick '
+
+_match_firmware = _FIRMWARE.match
+_search_generic = _GENERIC.search
+
+# Direction labels are decoded once and reused.
+_directions = {}
+
+
+class JoystickFrame:
+    """One parsed sample. `joystick` is 0 when the line carries no id."""
+
+    __slots__ = ('joystick', 'x', 'y', 'direction')
+
+    def __init__(self, joystick=0, x=0, y=0, direction=None):
+        self.joystick  = joystick
+        self.x         = x
+        self.y         = y
+        self.direction = direction
+
+    def as_tuple(self):
+        return self.x, self.y, self.direction
+
+    def __repr__(self):
+        return (f"JoystickFrame(joystick={self.joystick}, x={self.x}, "
+                f"y={self.y}, direction={self.direction!r})")
+
+
+def parse_line(line, frame=None):
+    """Parse one line into `frame` (a new JoystickFrame if omitted).
+
+    Returns the frame, or None if the line isn't a joystick sample.
+    """
+    m = _match_firmware(line)
+    if m is not None:
+        joystick, x, y, raw_dir = m.groups()
+        joystick = joystick[0] - 48
+    else:
+        m = _search_generic(line)
+        if m is None:
+            return None
+        x, y, raw_dir = m.groups()
+        joystick = 0
+        if line[:9] == _PREFIX:
+            d = line[9] - 48
+            if 0 <= d <= 9:
+                joystick = d
+
+    if frame is None:
+        frame = JoystickFrame()
+
+    if raw_dir is None:
+        direction = None
+    else:
+        direction = _directions.get(raw_dir)
+        if direction is None:
+            direction = raw_dir.decode('ascii')
+            if len(_directions) < 64:   # don't let line noise grow the cache
+                _directions[raw_dir] = direction
+
+    frame.joystick  = joystick
+    frame.x         = int(x)
+    frame.y         = int(y)
+    frame.direction = direction
+    return frame
@@ -0,0 +1,117 @@
+"""Control mapping: raw ADC codes → ready-to-apply stick values.
+
+Built once per calibration. Every axis gets two 4096-entry tables indexed
+by the raw code: its normalized value in [-1, 1] (the fitted response
+curve, zero inside the direction threshold so a resting stick never
+drifts) and its direction class (-1, 0, +1). Per frame that's eight list
+lookups and one for the direction name, with no arithmetic.
+
+    mapping = ControlMapping(Calibration.load(file1, file2))
+    payload = mapping.payload(x1, y1, x2, y2)
+"""
+import numpy as np
+
+from .response import ADC_MAX, LUT_SIZE
+
+# Index = (vertical + 1) * 3 + (horizontal + 1), classes from ControlMapping
+DIRECTION_TABLE = ['up-left',   'up',     'up-right',
+                   'left',      'center', 'right',
+                   'down-left', 'down',   'down-right']
+
+
+def direction_classes(center, neg_threshold, pos_threshold, inverted=False):
+    """Per-ADC-code direction class of one axis, as resolve_direction decides it.
+
+    On an `inverted` axis (a stick mounted so that up/left reads high) the
+    thresholds apply to the other side, so the class always has the sign
+    of the normalized value.
+    """
+    offset = np.arange(LUT_SIZE) - center
+    cls = np.zeros(LUT_SIZE, dtype=np.int8)
+    if inverted:
+        cls[offset > neg_threshold] = -1
+        cls[offset < -pos_threshold] = 1
+    else:
+        cls[offset < -neg_threshold] = -1
+        cls[offset > pos_threshold] = 1
+    return cls
+
+
+class ControlMapping:
+    """Lookup tables for both sticks derived from a calibration.Calibration."""
+
+    def __init__(self, calibration, decimals=4):
+        self.calibration = calibration
+        self.center = calibration.center
+        classes, values, self.inverted = [], [], []
+        for i, lut in enumerate(calibration.lut_arrays):
+            thr = calibration.thresholds[i // 2]
+            neg, pos = ('left', 'right') if i % 2 == 0 else ('up', 'down')
+            inverted = bool(lut[-1] < lut[0])
+            cls = direction_classes(self.center[i], thr[neg], thr[pos], inverted)
+            self.inverted.append(inverted)
+            value = np.where(cls != 0, lut.astype(np.float64), 0.0).round(decimals)
+            classes.append(cls)
+            values.append(value)
+        self.class_arrays = tuple(classes)
+        self.value_arrays = tuple(values)
+        # plain lists: the fastest thing to index one sample at a time. The
+        # class lists are pre-scaled so that x + y is the DIRECTION_TABLE index
+        self.classes = tuple((c * 3).tolist() if i % 2 else (c + 4).tolist()
+                             for i, c in enumerate(classes))
+        self.values = tuple(v.tolist() for v in values)
+
+    def stick(self, n, x, y):
+        """{'dx', 'dy', 'x', 'y', 'direction'} of stick n (0 or 1) at raw (x, y)."""
+        i = 2 * n
+        return {
+            'dx': x - self.center[i],
+            'dy': y - self.center[i + 1],
+            'x': self.values[i][x],
+            'y': self.values[i + 1][y],
+            'direction': DIRECTION_TABLE[self.classes[i][x] + self.classes[i + 1][y]],
+        }
+
+    def payload(self, x1, y1, x2, y2):
+        """The payload every sink receives, from one raw sample of both sticks."""
+        cx1, cy1, cx2, cy2 = self.center
+        vx1, vy1, vx2, vy2 = self.values
+        kx1, ky1, kx2, ky2 = self.classes
+        return {
+            'mode': '2',
+            'joystick1': {'dx': x1 - cx1, 'dy': y1 - cy1, 'x': vx1[x1], 'y': vy1[y1],
+                          'direction': DIRECTION_TABLE[kx1[x1] + ky1[y1]]},
+            'joystick2': {'dx': x2 - cx2, 'dy': y2 - cy2, 'x': vx2[x2], 'y': vy2[y2],
+                          'direction': DIRECTION_TABLE[kx2[x2] + ky2[y2]]},
+        }
+
+    def page_mapping(self):
+        """The same rules for the training page, which normalizes offsets itself
+        when an older bridge sends only dx/dy (app.py serves this).
+
+        Per stick: the centre, the direction thresholds and each axis'
+        response curve with its knots as offsets from the centre.
+        """
+        sticks = {}
+        for n, name in enumerate(('joystick1', 'joystick2')):
+            axes = {}
+            for k, axis in enumerate('xy'):
+                i = 2 * n + k
+                curve = self.calibration.response[n][axis]
+                axes[axis] = {'knots': [[a - self.center[i], v] for a, v in curve['knots']],
+                              'expo': curve.get('expo', 0.0),
+                              'inverted': self.inverted[i]}
+            sticks[name] = {
+                'center': {'x': self.center[2 * n], 'y': self.center[2 * n + 1]},
+                'thresholds': dict(self.calibration.thresholds[n]),
+                'response': axes,
+            }
+        return sticks
+
+    def block(self, raw):
+        """Normalized values and direction indices for an (N, 4) array of codes."""
+        raw = np.clip(np.asarray(raw), 0, ADC_MAX)
+        values = np.stack([v[raw[:, i]] for i, v in enumerate(self.value_arrays)], axis=1)
+        c = [cl[raw[:, i]].astype(np.int16) for i, cl in enumerate(self.class_arrays)]
+        dirs = np.stack([(c[1] + 1) * 3 + c[0] + 1, (c[3] + 1) * 3 + c[2] + 1], axis=1)
+        return values, dirs
@@ -0,0 +1,225 @@
+"""Per-stage latency histograms and a local HTTP endpoint to read them.
+
+Stages, all in the host's monotonic clock unless noted:
+
+    serial    firmware micros() → bytes read on the host, relative to the
+              fastest frame seen (binary frames only; text lines carry no
+              firmware timestamp)
+    assemble  first joystick line read → both lines paired
+    throttle  pair ready → handed to the sinks (filters, rate-limit hold)
+    process   control mapping and sink dispatch
+    send      published → written to a client's socket
+    network   published → browser, estimated as half the report round trip
+              minus the browser's own hold time
+    apply     browser receive → drone pose updated in tick (browser clock)
+    total     bytes read → pose updated (host stages + network + apply)
+
+The browser reports back on the same WebSocket with
+{"type": "latency", "seq": N, "apply": ms} for a sample of frames.
+
+    GET /metrics        Prometheus text (summary quantiles per stage)
+    GET /metrics.json   {stage: {count, min, mean, p50, p90, p99, p999, max}} in ms
+    GET /reset          clear all histograms
+"""
+import asyncio
+import json
+import math
+import time
+
+STAGES = ('serial', 'assemble', 'throttle', 'process', 'send', 'network', 'apply', 'total')
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of microsecond values, HdrHistogram style.
+
+    Values below 128 µs are exact; above that each power of two is split
+    into 64 buckets, so any reported value is within ~1.6% of the truth
+    while memory stays a few hundred ints however long it runs.
+    """
+
+    SUB_BITS = 6
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.count  = 0
+        self.total  = 0
+        self.min    = None
+        self.max    = 0
+
+    @classmethod
+    def _index(cls, v):
+        if v < 2 << cls.SUB_BITS:
+            return v
+        shift = v.bit_length() - cls.SUB_BITS - 1
+        return (shift << cls.SUB_BITS) + (v >> shift)
+
+    @classmethod
+    def _value(cls, i):
+        """Highest value that lands in bucket `i`."""
+        if i < 2 << cls.SUB_BITS:
+            return i
+        shift = (i >> cls.SUB_BITS) - 1
+        m = i - (shift << cls.SUB_BITS)
+        return ((m + 1) << shift) - 1
+
+    def record(self, us):
+        v = int(us) if us > 0 else 0
+        i = self._index(v)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total += v
+        if self.min is None or v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= target:
+                return min(self._value(i), self.max)
+        return self.max
+
+    def summary(self):
+        """Counts and percentiles, values in milliseconds."""
+        if not self.count:
+            return {'count': 0}
+        out = {'count': self.count, 'min': self.min / 1000,
+               'mean': round(self.total / self.count / 1000, 3)}
+        for q in QUANTILES:
+            out[f'p{q * 100:g}'.replace('.', '')] = self.percentile(q * 100) / 1000
+        out['max'] = self.max / 1000
+        return out
+
+
+class LatencyTracker:
+    """Collects stage timings from the pipeline, the hub and the browser."""
+
+    RING = 4096        # divides 65536, so 16-bit wire seqs map consistently
+
+    def __init__(self):
+        self.stages     = {s: LatencyHistogram() for s in STAGES}
+        self.frame_rx   = 0.0      # read time of the frame being emitted
+        self._published = [None] * self.RING
+        self._fw_offset = None
+
+    def record(self, stage, seconds):
+        self.stages[stage].record(seconds * 1e6)
+
+    def firmware(self, fw_micros, t_rx):
+        """Binary frame with firmware timestamp `fw_micros` read at `t_rx`."""
+        d = t_rx * 1e6 - fw_micros
+        off = self._fw_offset
+        # the floor creeps up 1 µs per frame so clock drift and firmware
+        # restarts (micros() jumping) don't pin it forever
+        if off is None or d < off or d - off > 1e6:
+            off = d
+        else:
+            off += 1
+        self._fw_offset = off
+        self.stages['serial'].record(d - off)
+
+    def published(self, seq, t_pub):
+        self._published[seq % self.RING] = (seq & 0xFFFF, self.frame_rx, t_pub)
+
+    def _lookup(self, seq):
+        e = self._published[seq % self.RING]
+        if e is None or e[0] != seq & 0xFFFF:
+            return None
+        return e
+
+    def sent(self, seq):
+        e = self._lookup(seq)
+        if e is not None:
+            self.record('send', time.perf_counter() - e[2])
+
+    def browser_report(self, seq, apply_ms):
+        e = self._lookup(seq)
+        if e is None:
+            return
+        _, t_rx, t_pub = e
+        apply   = max(0.0, apply_ms / 1000)
+        network = max(0.0, (time.perf_counter() - t_pub - apply) / 2)
+        self.record('network', network)
+        self.record('apply', apply)
+        self.record('total', (t_pub - t_rx) + network + apply)
+
+    def on_message(self, msg):
+        """BroadcastHub.on_message hook: pick out browser latency reports."""
+        if not isinstance(msg, str) or '"latency"' not in msg:
+            return
+        try:
+            report = json.loads(msg)
+            self.browser_report(int(report['seq']), float(report['apply']))
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    def reset(self):
+        for h in self.stages.values():
+            h.reset()
+
+    def snapshot(self):
+        return {s: h.summary() for s, h in self.stages.items()}
+
+    def prometheus(self):
+        lines = ['# HELP joybridge_latency_seconds Joystick pipeline latency per stage.',
+                 '# TYPE joybridge_latency_seconds summary']
+        for s, h in self.stages.items():
+            for q in QUANTILES:
+                lines.append(f'joybridge_latency_seconds{{stage="{s}",quantile="{q:g}"}} '
+                             f'{h.percentile(q * 100) / 1e6:.6f}')
+            lines.append(f'joybridge_latency_seconds_sum{{stage="{s}"}} {h.total / 1e6:.6f}')
+            lines.append(f'joybridge_latency_seconds_count{{stage="{s}"}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Tiny HTTP server on the bridge's event loop serving `tracker`."""
+
+    def __init__(self, tracker, host='127.0.0.1', port=9108):
+        self.tracker = tracker
+        self.host    = host
+        self.port    = port
+        self.server  = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass        # skip headers
+            parts = request.split()
+            path = parts[1].decode('latin-1').split('?')[0] if len(parts) > 1 else ''
+            if path == '/metrics':
+                status, ctype, body = '200 OK', 'text/plain; version=0.0.4', self.tracker.prometheus()
+            elif path == '/metrics.json':
+                status, ctype, body = '200 OK', 'application/json', json.dumps(self.tracker.snapshot())
+            elif path == '/reset':
+                self.tracker.reset()
+                status, ctype, body = '200 OK', 'text/plain', 'reset\n'
+            else:
+                status, ctype, body = '404 Not Found', 'text/plain', 'not found\n'
+            data = body.encode()
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n'
+                         f'Content-Length: {len(data)}\r\nConnection: close\r\n\r\n'.encode() + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"[+] Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
@@ -0,0 +1,181 @@
+"""The bridge hot path: source → parser → calibration → filter → sinks.
+
+Written once here instead of in every calconv script. The serial source
+feeds text lines (paired by FrameAssembler) or binary frames, the UDP
+source (udp_source) binary frames only. Filters (deadzone,
+joybridge.smoothing) see every sample; the throttle caps the output rate;
+only frames that survive the throttle are mapped to normalized stick
+values (mapping.ControlMapping) and handed to the sinks. With a
+metrics.LatencyTracker attached, each stage's time is recorded.
+"""
+import asyncio
+import time
+
+from .frame_assembler import FrameAssembler
+from .joystick_parser import JoystickFrame, parse_line
+from .mapping import ControlMapping
+from .reporting import ACK_PREFIX, Negotiator
+from .response import ADC_MAX
+from .serial_reader import SerialLineReader, Throttle
+from .smoothing import from_calibration
+from .udp_source import UdpFrameReceiver
+
+
+class Deadzone:
+    """Zero any axis whose offset from centre is inside ±`radius`."""
+
+    def __init__(self, radius):
+        self.radius = radius
+
+    def __call__(self, axes, t=None):
+        r = self.radius
+        return [0 if -r < v < r else v for v in axes]
+
+
+def build_filters(calibration, smoothing='auto', deadzone=0):
+    """Smoothing (see joybridge.smoothing.from_calibration), then the deadzone."""
+    filters = []
+    smoother = from_calibration(calibration, smoothing)
+    if smoother is not None:
+        filters.append(smoother)
+    if deadzone > 0:
+        filters.append(Deadzone(deadzone))
+    return filters
+
+
+def _adc(v):
+    """Clamp a (possibly filtered or glitched) reading to a valid ADC code."""
+    return 0 if v < 0 else ADC_MAX if v > ADC_MAX else int(v + 0.5)
+
+
+class Pipeline:
+    """Turn raw joystick samples into payloads for every sink.
+
+    Filters are callables f(axes, t) taking and returning the four centred
+    axes [dx1, dy1, dx2, dy2] of the sample read at `t` (s). Sinks get the
+    payload dict the browser expects: {'mode': '2', 'joystick1': {'dx',
+    'dy', 'x', 'y', 'direction'}, 'joystick2': {...}, 't': ms}, where x/y
+    are the normalized [-1, 1] intensities and t is when the sample was
+    read (time.perf_counter() in ms; the browser's jitter buffer paces
+    playback by it).
+    """
+
+    def __init__(self, calibration, filters=(), sinks=(), max_rate=0,
+                 pair_timeout=0.02, tracker=None):
+        self.calibration = calibration
+        self.mapping     = ControlMapping(calibration)
+        self.filters     = list(filters)
+        self.sinks       = list(sinks)
+        self.tracker     = tracker
+        self.throttle    = Throttle(self._emit, max_rate)
+        self.assembler   = FrameAssembler(self._on_pair, pair_timeout)
+        self._frame      = JoystickFrame()
+        self._t_first    = None     # read time of the first line of a pair
+        self.on_control  = None     # on_control(line) for the firmware's "#JB" answers
+        self.clock       = time.perf_counter    # read times; flight_model replays on capture time
+
+    # — source side —
+
+    def on_line(self, raw):
+        t = self.clock()
+        if parse_line(raw, self._frame) is not None:
+            if self._t_first is None:
+                self._t_first = t
+            self.assembler.add(self._frame.joystick, self._frame.as_tuple())
+        elif self.on_control is not None and raw.startswith(ACK_PREFIX):
+            self.on_control(raw)
+
+    def on_frame(self, f):
+        # binary frames already hold both sticks of one cycle
+        t = self.clock()
+        if self.tracker is not None:
+            self.tracker.firmware(f.timestamp, t)
+        if self.filters:
+            self.throttle.push(self._filter(f.x1, f.y1, f.x2, f.y2, t) + (t, t))
+        else:
+            self.throttle.push((f.x1, f.y1, f.x2, f.y2, t, t))
+
+    def _on_pair(self, joy1, joy2, stale):
+        t_rx, self._t_first = self._t_first, None
+        t = self.clock()
+        if self.filters:
+            raw = self._filter(joy1[0], joy1[1], joy2[0], joy2[1], t_rx or t)
+            self.throttle.push(raw + (t_rx or t, t))
+        else:
+            self.throttle.push((joy1[0], joy1[1], joy2[0], joy2[1], t_rx or t, t))
+
+    # — filter → throttle → mapping → sinks —
+
+    def _filter(self, x1, y1, x2, y2, t):
+        cx1, cy1, cx2, cy2 = self.mapping.center
+        axes = [x1-cx1, y1-cy1, x2-cx2, y2-cy2]
+        for f in self.filters:
+            axes = f(axes, t)
+        return (_adc(axes[0]+cx1), _adc(axes[1]+cy1), _adc(axes[2]+cx2), _adc(axes[3]+cy2))
+
+    def _emit(self, raw):
+        tracker = self.tracker
+        if tracker is not None:
+            t0 = time.perf_counter()
+            tracker.record('assemble', raw[5] - raw[4])
+            tracker.record('throttle', t0 - raw[5])
+            tracker.frame_rx = raw[4]
+        x1, y1, x2, y2 = raw[0], raw[1], raw[2], raw[3]
+        if (x1 | y1 | x2 | y2) & ~ADC_MAX:     # some reading outside 0..4095
+            x1, y1, x2, y2 = _adc(x1), _adc(y1), _adc(x2), _adc(y2)
+        payload = self.mapping.payload(x1, y1, x2, y2)
+        payload['t'] = round(raw[4] * 1000, 3)
+        for sink in self.sinks:
+            sink.send(payload)
+        if tracker is not None:
+            tracker.record('process', time.perf_counter() - t0)
+
+    async def run(self, ser, tap=None, report=None):
+        """Start the sinks and pump `ser` until the port closes or we're cancelled.
+
+        `ser` may be a real port or a capture.ReplaySerial; `tap` gets the
+        raw bytes (e.g. CaptureWriter.write). With a reporting.ReportMode
+        as `report`, the firmware is asked to switch to it once reading
+        has started (replays have nothing to ask).
+        """
+        for sink in self.sinks:
+            await sink.start()
+        negotiation = None
+        try:
+            closed = SerialLineReader(ser, self.on_line, self.on_frame, tap=tap).start()
+            if report is not None and hasattr(ser, 'write'):
+                negotiator = Negotiator(ser, report)
+                self.on_control = negotiator.on_line
+                negotiation = asyncio.ensure_future(negotiator.run())
+            await closed
+        finally:
+            if negotiation is not None:
+                negotiation.cancel()
+            await self._stop_sinks(f"Frames: {self.assembler.stats()}")
+
+    async def run_udp(self, device=None, host='0.0.0.0', port=0, idle_timeout=0):
+        """Like run(), fed by frame datagrams (udp_source) instead of a serial port.
+
+        `device` ('host[:port]') is the board to send HELLOs to; without it
+        the board has to be streaming to host:port already.
+        """
+        receiver = UdpFrameReceiver(self.on_frame, device, host, port, idle_timeout)
+        for sink in self.sinks:
+            await sink.start()
+        try:
+            closed = await receiver.start()
+            print(f"[+] Listening for UDP frames on {host}:{receiver.port}"
+                  + (f", asking {device} to stream" if device else ""))
+            await closed
+        finally:
+            receiver.stop()
+            await self._stop_sinks(f"UDP: {receiver.stats.snapshot()}, {receiver.errors} bad")
+
+    async def _stop_sinks(self, summary):
+        for sink in self.sinks:
+            await sink.stop()
+        print(f"[+] {summary}")
+        for sink in self.sinks:
+            stats = sink.stats()
+            if stats:
+                print(f"[+] {sink.name}: {stats}")
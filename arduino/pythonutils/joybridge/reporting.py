@@ -0,0 +1,161 @@
+"""Tell the firmware how often to report, over the same serial port.
+
+The onlyserial2s sketch takes text commands and answers each with its
+current settings as a "#JB ..." line (see the comment at the top of the
+sketch):
+
+    MODE FIXED <hz>                  every sample
+    MODE CHANGE <hz> <thr> <hb_ms>   only samples that moved >= thr counts,
+                                     plus a heartbeat every hb_ms
+    MODE IDLE <hz> <thr> <hb_ms>     every sample while the sticks move,
+                                     only the heartbeat once they're still
+
+Given --report fixed|change|idle, the bridge sends that mode when it
+connects and retries until the firmware answers; firmware that doesn't
+know the commands never answers and just keeps streaming, which still
+works. The default, keep, sends nothing: the mode stays set on the board
+for every reader, so changing it is left to whoever asks.
+
+    mode = ReportMode('idle', rate=500, threshold=threshold_from_calibration(cal))
+    await Negotiator(ser, mode).run()      # with Pipeline feeding it "#JB" lines
+"""
+import asyncio
+import time
+
+MODES             = ('fixed', 'change', 'idle')
+ACK_PREFIX        = b'#JB '
+DEFAULT_THRESHOLD = 24      # counts, when the calibration has no noise figures
+DEFAULT_HEARTBEAT = 1000    # ms
+
+
+class ReportMode:
+    """One reporting setting; rate 0 keeps the firmware's current rate."""
+
+    def __init__(self, mode, rate=0, threshold=DEFAULT_THRESHOLD, heartbeat=DEFAULT_HEARTBEAT,
+                 binary=None):
+        if mode not in MODES:
+            raise ValueError(f"unknown report mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode      = mode
+        self.rate      = int(rate)
+        self.threshold = int(threshold)
+        self.heartbeat = int(heartbeat)
+        self.binary    = binary     # as reported by the firmware, None if unknown
+
+    def command(self):
+        if self.mode == 'fixed':
+            return f"MODE FIXED {self.rate}\n".encode()
+        return (f"MODE {self.mode.upper()} {self.rate} {self.threshold} "
+                f"{self.heartbeat}\n").encode()
+
+    @classmethod
+    def parse_ack(cls, line):
+        """ReportMode from a "#JB MODE <mode> <hz> <thr> <hb_ms> <format>" line, or None."""
+        parts = line.decode('ascii', 'replace').split()
+        if len(parts) < 7 or parts[1] != 'MODE' or parts[2].lower() not in MODES:
+            return None
+        try:
+            return cls(parts[2].lower(), int(parts[3]), int(parts[4]), int(parts[5]),
+                       binary=parts[6] == 'binary')
+        except ValueError:
+            return None
+
+    def matches(self, other):
+        """Whether the firmware's answer `other` is what we asked for."""
+        if other is None or other.mode != self.mode:
+            return False
+        if self.rate and other.rate != self.rate:
+            return False
+        return self.mode == 'fixed' or (other.threshold == self.threshold
+                                        and other.heartbeat == self.heartbeat)
+
+    def __str__(self):
+        rate = f"{self.rate} Hz" if self.rate else "firmware rate"
+        if self.mode == 'fixed':
+            return f"fixed, {rate}"
+        return f"{self.mode}, {rate}, threshold {self.threshold}, heartbeat {self.heartbeat} ms"
+
+
+def threshold_from_calibration(calibration):
+    """Change threshold above the stick noise: twice the largest 3-sigma err at rest."""
+    errs = [c['center'].get(k, 0) for c in calibration.raw for k in ('err_x', 'err_y')]
+    if not any(errs):
+        return DEFAULT_THRESHOLD
+    return max(8, 2 * max(errs))
+
+
+def report_mode(mode, rate=0, threshold=0, heartbeat=DEFAULT_HEARTBEAT, calibration=None):
+    """ReportMode for the --report options, or None for 'keep'; threshold 0 = from noise."""
+    if mode == 'keep':
+        return None
+    if not threshold:
+        threshold = (threshold_from_calibration(calibration) if calibration is not None
+                     else DEFAULT_THRESHOLD)
+    return ReportMode(mode, rate, threshold, heartbeat)
+
+
+class Negotiator:
+    """Send `mode` until the firmware confirms it, without blocking the loop.
+
+    Feed it every "#JB" line the port produces (`on_line`); `run()`
+    returns the confirmed ReportMode, or None if the firmware never
+    answered within `timeout` (ESP32 boards reset when the port opens,
+    so the first second or so goes unanswered).
+    """
+
+    def __init__(self, ser, mode, timeout=3.0, retry=0.5):
+        self.ser     = ser
+        self.mode    = mode
+        self.timeout = timeout
+        self.retry   = retry
+        self.current = None
+        self._answer = None
+
+    def on_line(self, raw):
+        ack = ReportMode.parse_ack(raw)
+        if ack is None:
+            return
+        self.current = ack
+        if self._answer is not None and not self._answer.done():
+            self._answer.set_result(ack)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while loop.time() < deadline:
+            self._answer = loop.create_future()
+            self.ser.write(self.mode.command())
+            try:
+                ack = await asyncio.wait_for(self._answer, self.retry)
+            except asyncio.TimeoutError:
+                continue
+            if self.mode.matches(ack):
+                print(f"[+] Firmware reporting: {ack}")
+                return ack
+            print(f"[!] Firmware answered {ack} to {self.mode.command().decode().strip()}")
+            return ack
+        print(f"[!] Firmware didn't answer the report mode request; "
+              f"it keeps streaming at its own rate")
+        return None
+
+
+def request_mode(ser, mode, timeout=3.0, retry=0.5):
+    """Blocking version for the calibrate/record commands; returns the ack or None.
+
+    Bytes read while waiting are dropped, so call it before collecting samples.
+    """
+    deadline = time.monotonic() + timeout
+    buf = b''
+    while time.monotonic() < deadline:
+        ser.write(mode.command())
+        until = min(time.monotonic() + retry, deadline)
+        while time.monotonic() < until:
+            buf += ser.read(ser.in_waiting or 1)
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                at = line.find(ACK_PREFIX)     # binary frames may precede it
+                if at >= 0:
+                    ack = ReportMode.parse_ack(line[at:].rstrip(b'\r'))
+                    if ack is not None:
+                        return ack
+            buf = buf[-256:]
+    return None
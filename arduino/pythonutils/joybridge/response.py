@@ -0,0 +1,105 @@
+"""Outlier-robust calibration statistics and per-axis response curves.
+
+Each axis gets a piecewise-linear response through its measured extremes,
+centre and deadzone, optionally bent by an RC-style expo curve, and is
+then baked into a 4096-entry lookup table (one entry per 12-bit ADC
+code). Mapping a raw reading to a normalized [-1, 1] stick value at
+runtime is a single index into that table.
+
+    lut = axis_lut(fit_axis(center=1890, low=120, high=3950, deadzone=25))
+    value = lut[raw_x]
+"""
+import numpy as np
+
+ADC_MAX    = 4095
+LUT_SIZE   = ADC_MAX + 1
+MAD_SCALE  = 1.4826     # MAD → standard deviation for normally distributed noise
+MIN_SPAN   = 200        # an extreme closer than this to the centre isn't trusted
+
+
+def robust_stats(values, k=3.5):
+    """Median/MAD outlier rejection over one axis of samples.
+
+    Returns {'mean', 'median', 'sigma', 'n', 'rejected'} where mean and
+    sigma are taken over the inliers (within k robust sigmas of the median).
+    """
+    a = np.asarray(values, dtype=np.float64)
+    if a.size == 0:
+        raise ValueError("no samples")
+    med = float(np.median(a))
+    mad = float(np.median(np.abs(a - med))) * MAD_SCALE
+    keep = np.abs(a - med) <= k * max(mad, 1.0)
+    inl = a[keep]
+    return {
+        'mean':     float(inl.mean()),
+        'median':   med,
+        'sigma':    float(inl.std()),
+        'n':        int(a.size),
+        'rejected': int(a.size - inl.size),
+    }
+
+
+def position_stats(samples):
+    """Calibration entry for one stick position from an (N, 2) sample array.
+
+    Keeps the x/y/err_x/err_y fields the rest of the code reads; err is
+    three robust sigmas instead of the glitch-prone (max - min) / 2.
+    """
+    a = np.asarray(samples, dtype=np.float64).reshape(-1, 2)
+    sx, sy = robust_stats(a[:, 0]), robust_stats(a[:, 1])
+    return {
+        'x': int(round(sx['mean'])),
+        'y': int(round(sy['mean'])),
+        'err_x': int(np.ceil(3 * sx['sigma'])),
+        'err_y': int(np.ceil(3 * sy['sigma'])),
+        'n': sx['n'],
+        'rejected': max(sx['rejected'], sy['rejected']),
+    }
+
+
+def fit_axis(center, low, high, deadzone=0, expo=0.0):
+    """Response curve for one axis as knots [[adc, value], ...].
+
+    `low` is the ADC reading that should map to -1 (up/left) and `high`
+    the one for +1 (down/right); either may be above the centre if the
+    stick is mounted inverted. An extreme that wasn't captured properly
+    (on the wrong side or within MIN_SPAN of the centre) falls back to
+    the ADC rail on that side.
+    """
+    center = min(max(center, 0), ADC_MAX)
+    inverted = low > high
+    lo_rail, hi_rail = (ADC_MAX, 0) if inverted else (0, ADC_MAX)
+    if abs(low - center) < MIN_SPAN or (low > center) != inverted:
+        low = lo_rail
+    if abs(high - center) < MIN_SPAN or (high < center) != inverted:
+        high = hi_rail
+    # a noisy centre capture mustn't swallow the stick's travel
+    dz = min(abs(deadzone), abs(low - center) / 4, abs(high - center) / 4)
+    s = -1 if inverted else 1
+    knots = [[low, -1.0], [center - s * dz, 0.0], [center + s * dz, 0.0], [high, 1.0]]
+    knots.sort()
+    return {'knots': knots, 'expo': float(expo)}
+
+
+def fit_stick(cal, deadzone=None, expo=0.0):
+    """Fit both axes of one stick from a calibration dict.
+
+    The deadzone defaults to the measured centre noise (err_x / err_y).
+    """
+    c = cal['center']
+    dzx = c.get('err_x', 0) if deadzone is None else deadzone
+    dzy = c.get('err_y', 0) if deadzone is None else deadzone
+    return {
+        'x': fit_axis(c['x'], cal['left']['x'], cal['right']['x'], dzx, expo),
+        'y': fit_axis(c['y'], cal['up']['y'],   cal['down']['y'],  dzy, expo),
+    }
+
+
+def axis_lut(curve):
+    """Bake a fitted curve into a float32 array indexed by raw ADC code."""
+    xp, fp = zip(*curve['knots'])
+    v = np.interp(np.arange(LUT_SIZE), xp, fp).astype(np.float32)
+    e = curve.get('expo', 0.0)
+    if e:
+        v = (1 - e) * v + e * v ** 3
+    return v
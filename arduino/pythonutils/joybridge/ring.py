@@ -0,0 +1,165 @@
+"""Shared-memory ring of joystick frames: one writer, any number of readers.
+
+A fixed array of fixed-layout slots in `multiprocessing.shared_memory`, so
+a worker process can hand frames to the supervisor without pickling and
+without allocating per frame on the write side. There are no locks: the
+writer only ever appends, readers keep their own cursor and read at their
+own pace, and a reader that falls more than `capacity` frames behind
+skips ahead (and counts what it lost).
+
+Layout, little-endian:
+
+    header  u64  frames written so far
+            u8   doorbell armed (see supervisor.RingSink)
+            3x
+            u32  capacity in slots
+    slot    u64  sequence number (written first)
+            f64  sample time, time.perf_counter() (the payload's t)
+            4×i16  dx1, dy1, dx2, dy2
+            4×f64  x1, y1, x2, y2 (normalized, see mapping.ControlMapping)
+            2×u8   direction codes (ws_frames.DIRECTIONS)
+            6x
+            u64  sequence number again (written last)
+
+A slot is consistent if both sequence numbers match the one the reader
+expects; a reader that loses the race with the writer retries or moves on.
+The capacity is stored rather than derived from the mapping's length:
+Windows and macOS round an attached segment up to a whole page, so the
+attaching side can see a longer buffer than the creator asked for.
+"""
+import struct
+from multiprocessing import shared_memory
+
+from .ws_frames import DIRECTIONS
+
+_HEADER   = struct.Struct('<QB3xI')
+_COUNT    = struct.Struct('<Q')
+_SLOT     = struct.Struct('<Qd4h4d2B6xQ')
+_BODY     = struct.Struct('<Qd4h4d2B6x')
+_TRAIL_AT = _BODY.size
+
+_DIRECTION_CODES = {d: i for i, d in enumerate(DIRECTIONS)}
+
+
+class FrameRing:
+    """The shared ring itself. Create it in the parent, attach by name in workers."""
+
+    def __init__(self, name=None, capacity=256, create=False):
+        if create:
+            size = _HEADER.size + capacity * _SLOT.size
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _HEADER.pack_into(self.shm.buf, 0, 0, 1, capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.buf      = self.shm.buf
+        self.name     = self.shm.name
+        self.capacity = _HEADER.unpack_from(self.buf, 0)[2]
+        self.created  = create
+        # a restarted writer continues the sequence its predecessor left
+        self._written = self.written()
+
+    def written(self):
+        return _COUNT.unpack_from(self.buf, 0)[0]
+
+    def _slot(self, seq):
+        return _HEADER.size + (seq % self.capacity) * _SLOT.size
+
+    # — writer —
+
+    def write(self, t, dx1, dy1, dx2, dy2, x1, y1, x2, y2, d1, d2):
+        seq = self._written
+        off = self._slot(seq)
+        buf = self.buf
+        _COUNT.pack_into(buf, off, seq)
+        _BODY.pack_into(buf, off, seq, t, dx1, dy1, dx2, dy2, x1, y1, x2, y2, d1, d2)
+        _COUNT.pack_into(buf, off + _TRAIL_AT, seq)
+        self._written = seq + 1
+        _COUNT.pack_into(buf, 0, seq + 1)
+
+    def take_doorbell(self):
+        """True (once) if a reader asked to be woken for the next frame."""
+        if self.buf[8]:
+            self.buf[8] = 0
+            return True
+        return False
+
+    # — readers —
+
+    def arm(self):
+        """Ask the writer to ring the doorbell after its next frame."""
+        self.buf[8] = 1
+
+    def read(self, seq):
+        """The frame with sequence number `seq` as a tuple, or None if it was overwritten."""
+        off = self._slot(seq)
+        buf = self.buf
+        trail = _COUNT.unpack_from(buf, off + _TRAIL_AT)[0]
+        rec = _BODY.unpack_from(buf, off)
+        lead = _COUNT.unpack_from(buf, off)[0]
+        if trail == lead == rec[0] == seq:
+            return rec
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.created:
+            self.shm.unlink()
+
+
+class RingReader:
+    """One consumer's cursor into a FrameRing."""
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.next = ring.written()
+        self.received = 0
+        self.lost = 0
+
+    def latest(self):
+        """Newest frame not seen yet (older unread ones are skipped), or None."""
+        written = self.ring.written()
+        if written <= self.next:
+            return None
+        rec = None
+        seq = written - 1
+        while rec is None and seq >= self.next and seq > written - self.ring.capacity:
+            rec = self.ring.read(seq)
+            seq -= 1
+        self.received += written - self.next
+        self.next = written
+        return rec
+
+    def frames(self):
+        """Every frame written since the last call, oldest first."""
+        written = self.ring.written()
+        start = max(self.next, written - self.ring.capacity + 1)
+        self.lost += start - self.next
+        for seq in range(start, written):
+            rec = self.ring.read(seq)
+            if rec is None:
+                self.lost += 1
+                continue
+            self.received += 1
+            yield rec
+        self.next = written
+
+
+def frame_payload(rec):
+    """Ring frame → the payload dict sinks and hubs expect."""
+    _, _, dx1, dy1, dx2, dy2, x1, y1, x2, y2, d1, d2 = rec
+    return {
+        'mode': '2',
+        'joystick1': {'dx': dx1, 'dy': dy1, 'x': x1, 'y': y1, 'direction': DIRECTIONS[d1]},
+        'joystick2': {'dx': dx2, 'dy': dy2, 'x': x2, 'y': y2, 'direction': DIRECTIONS[d2]},
+        't': round(rec[1] * 1000, 3),
+    }
+
+
+def write_payload(ring, payload, t):
+    """Store `payload`; its own 't' (ms) wins over `t` (s) when present."""
+    j1, j2 = payload['joystick1'], payload['joystick2']
+    if 't' in payload:
+        t = payload['t'] / 1000
+    ring.write(t, j1['dx'], j1['dy'], j2['dx'], j2['dy'], j1['x'], j1['y'], j2['x'], j2['y'],
+               _DIRECTION_CODES.get(j1['direction'], 0), _DIRECTION_CODES.get(j2['direction'], 0))
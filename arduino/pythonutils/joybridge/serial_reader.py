@@ -0,0 +1,133 @@
+"""Event-driven serial line reader for the asyncio loop.
+
+Replaces the `readline()` + `time.sleep(0.05)` polling loops: bytes are taken
+off the port as soon as the driver has them, split into lines here and handed
+to a callback on the event loop thread, so a joystick line is published the
+moment its newline arrives. Binary frames (see binary_frames) are
+recognised on the same port.
+"""
+import asyncio
+import threading
+
+import serial
+
+from .binary_frames import StreamDecoder
+
+
+class SerialLineReader:
+    """Frame a byte stream into lines and call `on_line(bytes)` for each one.
+
+    On POSIX the port's file descriptor is registered with the event loop
+    (`loop.add_reader`). Where that isn't possible (Windows COM ports) a
+    background thread does blocking reads and hands chunks to the loop.
+    Lines are passed without the trailing CR/LF; binary frames, if the
+    firmware sends them, go to `on_frame(DualFrame)`. `tap(bytes)`, if
+    given, sees every raw chunk first (used by the capture recorder).
+    """
+
+    def __init__(self, ser, on_line, on_frame=None, loop=None, tap=None):
+        self.ser     = ser
+        self.decoder = StreamDecoder(on_line, on_frame)
+        self.tap     = tap
+        self.loop    = loop
+        self.closed  = None
+        self._fd     = None
+        self._thread = None
+        self._stop   = threading.Event()
+
+    def start(self):
+        """Begin reading; returns a future resolved when the port closes."""
+        self.loop   = self.loop or asyncio.get_running_loop()
+        self.closed = self.loop.create_future()
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, OSError, NotImplementedError):
+            fd = None
+
+        if fd is not None:
+            self.ser.timeout = 0
+            self._fd = fd
+            self.loop.add_reader(fd, self._on_readable)
+        else:
+            self.ser.timeout = 0.1
+            self._thread = threading.Thread(target=self._read_thread, daemon=True)
+            self._thread.start()
+        return self.closed
+
+    def stop(self, exc=None):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        self._stop.set()
+        if self.closed is not None and not self.closed.done():
+            if exc is None:
+                self.closed.set_result(None)
+            else:
+                self.closed.set_exception(exc)
+
+    def _on_readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self.stop(e)
+            return
+        if data:
+            self.feed(data)
+
+    def _read_thread(self):
+        while not self._stop.is_set():
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                self.loop.call_soon_threadsafe(self.stop, e)
+                return
+            if data:
+                self.loop.call_soon_threadsafe(self.feed, data)
+            elif not getattr(self.ser, 'is_open', True):
+                # a replayed capture ran out
+                self.loop.call_soon_threadsafe(self.stop)
+                return
+
+    def feed(self, data):
+        """Hand raw bytes to the decoder; callbacks fire for complete frames."""
+        if self.tap is not None:
+            self.tap(data)
+        self.decoder.feed(data)
+
+
+class Throttle:
+    """Publish the latest value at most `max_rate` times per second.
+
+    A value pushed inside the rate window is held and sent when the window
+    ends (only the newest one survives), so the output is never older than
+    one interval. `max_rate <= 0` publishes every value immediately.
+    """
+
+    def __init__(self, publish, max_rate=0, loop=None):
+        self.publish  = publish
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.loop     = loop
+        self._last    = float('-inf')
+        self._pending = None
+        self._timer   = None
+
+    def push(self, value):
+        if not self.interval:
+            self.publish(value)
+            return
+        loop = self.loop or asyncio.get_running_loop()
+        now  = loop.time()
+        if now - self._last >= self.interval and self._timer is None:
+            self._last = now
+            self.publish(value)
+            return
+        self._pending = value
+        if self._timer is None:
+            self.loop  = loop
+            self._timer = loop.call_at(self._last + self.interval, self._flush)
+
+    def _flush(self):
+        self._timer = None
+        value, self._pending = self._pending, None
+        self._last = self.loop.time()
+        self.publish(value)
@@ -0,0 +1,207 @@
+"""Output stages of the pipeline.
+
+A sink gets every payload through `send()` on the event loop thread and may
+set itself up/tear down in `start()`/`stop()`. pynput is only imported when
+the key sink is used, so the bridge runs headless on Linux.
+"""
+import asyncio
+import json
+import time
+
+from websockets.asyncio.server import serve
+
+from .broadcast_hub import BroadcastHub, same_payload
+from .udp_source import HELLO
+from .ws_frames import BINARY_SUBPROTOCOL, SERVER_OPTIONS, pack_payload
+
+
+class Sink:
+    name = 'sink'
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def send(self, payload):
+        raise NotImplementedError
+
+    def stats(self):
+        return None
+
+
+class WebSocketSink(Sink):
+    """Serve payloads to browsers (the old calconv4 behaviour)."""
+
+    name = 'ws'
+
+    def __init__(self, host='0.0.0.0', port=8765, delta=False, tracker=None):
+        self.host    = host
+        self.port    = port
+        self.hub     = BroadcastHub(delta=delta, encode_binary=pack_payload)
+        self.server  = None
+        self.tracker = tracker
+        if tracker is not None:
+            self.hub.on_sent    = tracker.sent
+            self.hub.on_message = tracker.on_message
+
+    async def _handler(self, ws):
+        print(f"[+] WS client connected ({ws.subprotocol or 'json'})")
+        try:
+            await self.hub.serve_client(ws, binary=ws.subprotocol == BINARY_SUBPROTOCOL)
+        finally:
+            print("[+] WS client disconnected")
+
+    async def start(self):
+        self.server = await serve(self._handler, self.host, self.port, **SERVER_OPTIONS)
+        print(f"[+] WS server listening on ws://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def send(self, payload):
+        seq = self.hub.seq
+        self.hub.publish(payload)
+        if self.tracker is not None and self.hub.seq != seq:
+            self.tracker.published(self.hub.seq, time.perf_counter())
+
+    def stats(self):
+        return self.hub.stats()
+
+
+class IpcSink(Sink):
+    """Hand payloads to the web server's /ws/joystick over loopback UDP.
+
+    serve.py's workers each subscribe by sending HELLO to (host, port)
+    about once a second while they have browsers connected; every new
+    payload goes to every current subscriber as one datagram: the 16-byte
+    joystick.bin.v3 frame followed by the same frame as JSON text, so the
+    web server relays either form without knowing the layout. Anything
+    else a subscriber sends is a browser message (latency reports) and goes
+    to the tracker.
+    """
+
+    name = 'ipc'
+
+    SUBSCRIBER_TIMEOUT = 5.0    # s without HELLO before a worker is dropped
+
+    def __init__(self, host='127.0.0.1', port=8766, tracker=None):
+        self.host        = host
+        self.port        = port
+        self.tracker     = tracker
+        self.transport   = None
+        self.subscribers = {}   # addr → monotonic time of its last HELLO
+        self.seq         = 0
+        self.last        = None
+        self.sent        = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _IpcProtocol(self), local_addr=(self.host, self.port))
+        print(f"[+] IPC for the web server on udp://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def received(self, data, addr):
+        if data == HELLO:
+            if addr not in self.subscribers:
+                print(f"[+] Web server worker {addr[0]}:{addr[1]} subscribed")
+            self.subscribers[addr] = time.monotonic()
+        elif self.tracker is not None:
+            self.tracker.on_message(data.decode('utf-8', 'replace'))
+
+    def send(self, payload):
+        if not self.subscribers or same_payload(payload, self.last):
+            return
+        self.last = payload
+        self.seq += 1
+        t = payload.get('t')
+        if t is None:
+            t = round(time.perf_counter() * 1000, 3)
+        data = pack_payload(payload, self.seq) + json.dumps(
+            dict(payload, seq=self.seq, t=t)).encode()
+        if self.tracker is not None:
+            self.tracker.published(self.seq, time.perf_counter())
+        expired = time.monotonic() - self.SUBSCRIBER_TIMEOUT
+        for addr, seen in list(self.subscribers.items()):
+            if seen < expired:
+                del self.subscribers[addr]
+                continue
+            self.transport.sendto(data, addr)
+            self.sent += 1
+
+    def stats(self):
+        return {'subscribers': len(self.subscribers), 'published': self.seq, 'sent': self.sent}
+
+
+class _IpcProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sink):
+        self.sink = sink
+
+    def datagram_received(self, data, addr):
+        self.sink.received(data, addr)
+
+    def error_received(self, exc):
+        pass        # a worker that went away; it stops sending HELLO and expires
+
+
+class KeySink(Sink):
+    """Hold keyboard keys for the stick directions (the old calconv5 behaviour)."""
+
+    name = 'keys'
+
+    def __init__(self):
+        from pynput.keyboard import Key, Controller
+        self.keyboard  = Controller()
+        self.last_keys = set()
+        self.key_map_1 = {
+            'up': 'w', 'down': 's', 'left': 'a', 'right': 'd',
+            'up-left': 'w', 'up-right': 'w',
+            'down-left': 's', 'down-right': 's'
+        }
+        self.key_map_2 = {
+            'up': Key.up, 'down': Key.down, 'left': Key.left, 'right': Key.right,
+            'up-left': Key.up, 'up-right': Key.up,
+            'down-left': Key.down, 'down-right': Key.down
+        }
+
+    def send(self, payload):
+        keys = set()
+        d1 = payload['joystick1']['direction']
+        d2 = payload['joystick2']['direction']
+        if d1 in self.key_map_1: keys.add(self.key_map_1[d1])
+        if d2 in self.key_map_2: keys.add(self.key_map_2[d2])
+        self.press(keys)
+
+    def press(self, keys):
+        for k in self.last_keys - keys:
+            self.keyboard.release(k)
+        for k in keys - self.last_keys:
+            self.keyboard.press(k)
+        self.last_keys = keys
+
+    async def stop(self):
+        self.press(set())
+
+
+class PrintSink(Sink):
+    """Print every payload; handy on a headless box."""
+
+    name = 'print'
+
+    def send(self, payload):
+        print(json.dumps(payload))
+
+
+SINKS = {
+    'ws':    WebSocketSink,
+    'ipc':   IpcSink,
+    'keys':  KeySink,
+    'print': PrintSink,
+}
@@ -0,0 +1,211 @@
+"""Noise smoothing for the raw stick axes: One-Euro and constant-velocity Kalman.
+
+Both filters hold their state as arrays over all four axes (x1, y1, x2,
+y2) and update them together with in-place ufuncs, one step per sample.
+They work on centred ADC offsets, see every sample (before the throttle)
+and take the sample time, so they behave the same at 100 Hz or 1 kHz.
+
+  one-euro  low-pass whose cutoff rises with speed: heavy smoothing at
+            rest, little lag while the stick moves. Per axis: min_cutoff
+            (Hz, jitter at rest), beta (cutoff gain per count/s, lag in
+            motion), d_cutoff (Hz, for the speed estimate).
+  kalman    position + velocity per axis, white-noise acceleration model.
+            Per axis: r (measurement variance, counts², from the noise
+            measured at calibration) and q (acceleration spectral density,
+            counts²/s³; larger follows faster, smaller smooths more).
+
+Parameters live next to the calibration, in each stick's file:
+
+    "filter": {"kind": "one-euro",
+               "one-euro": {"x": {"min_cutoff": 1.0, "beta": 0.002, "d_cutoff": 1.0},
+                            "y": {...}},
+               "kalman":   {"x": {"q": 1e5, "r": 16.0}, "y": {...}}}
+
+`calibrate_joystick` writes defaults (default_params); edit them to trade
+lag for jitter, and run bench_filters.py on a capture to see the effect.
+"""
+import math
+
+import numpy as np
+
+KINDS  = ('one-euro', 'kalman')
+MIN_DT = 1e-4       # samples that arrived in one USB read share a timestamp
+
+ONE_EURO_DEFAULTS = {'min_cutoff': 1.0, 'beta': 0.002, 'd_cutoff': 1.0}
+KALMAN_DEFAULTS   = {'q': 1e5, 'r': 16.0}
+
+
+def default_params(cal):
+    """The "filter" entry calibrate_joystick stores, from one stick's calibration.
+
+    Kalman's measurement variance comes from the noise measured at the
+    centre (err is three sigmas); everything else starts at the defaults.
+    """
+    centre = cal.get('center', {})
+    kalman = {}
+    for axis in 'xy':
+        sigma = max(centre.get(f'err_{axis}', 0) / 3, 1.0)
+        kalman[axis] = dict(KALMAN_DEFAULTS, r=round(sigma * sigma, 2))
+    return {'kind': 'one-euro',
+            'one-euro': {axis: dict(ONE_EURO_DEFAULTS) for axis in 'xy'},
+            'kalman': kalman}
+
+
+def axis_params(calibration, kind):
+    """{name: array over (x1, y1, x2, y2)} for `kind`, defaults where unset."""
+    defaults = ONE_EURO_DEFAULTS if kind == 'one-euro' else KALMAN_DEFAULTS
+    per_axis = []
+    for cal in calibration.raw:
+        stick = cal.get('filter', {}).get(kind, {})
+        for axis in 'xy':
+            per_axis.append(dict(defaults, **stick.get(axis, {})))
+    return {name: np.array([p[name] for p in per_axis], dtype=np.float64)
+            for name in defaults}
+
+
+class _Smoother:
+    """Shared step/run plumbing; subclasses implement _step(z, dt) on self.z."""
+
+    def __init__(self):
+        self.z = np.zeros(4)
+        self.t = None
+
+    def reset(self):
+        self.t = None
+
+    def __call__(self, axes, t):
+        """Pipeline filter: smoothed [dx1, dy1, dx2, dy2] at time `t` (s)."""
+        z = self.z
+        z[0], z[1], z[2], z[3] = axes
+        if self.t is None:
+            self._init(z)
+        else:
+            dt = t - self.t
+            self._step(z, dt if dt > MIN_DT else MIN_DT)
+        self.t = t
+        return self.out.tolist()
+
+    def run(self, samples, times):
+        """Smooth an (N, 4) array of centred samples taken at `times`, in order."""
+        samples = np.asarray(samples, dtype=np.float64)
+        out = np.empty_like(samples)
+        for i, (row, t) in enumerate(zip(samples, times)):
+            out[i] = self(row, t)
+        return out
+
+
+class OneEuro(_Smoother):
+    """One-Euro filter (Casiez et al. 2012) over all four axes at once."""
+
+    kind = 'one-euro'
+
+    def __init__(self, min_cutoff, beta, d_cutoff):
+        super().__init__()
+        self.min_cutoff = np.asarray(min_cutoff, dtype=np.float64) * np.ones(4)
+        self.beta       = np.asarray(beta, dtype=np.float64) * np.ones(4)
+        self.d_tau      = 1 / (2 * math.pi * (np.asarray(d_cutoff, dtype=np.float64) * np.ones(4)))
+        self.out        = np.zeros(4)       # smoothed position
+        self.speed      = np.zeros(4)       # smoothed derivative
+        self._a         = np.empty(4)
+        self._d         = np.empty(4)
+
+    def _init(self, z):
+        self.out[:] = z
+        self.speed[:] = 0
+
+    def _step(self, z, dt):
+        a, d = self._a, self._d
+        # speed estimate, low-passed at d_cutoff
+        np.subtract(z, self.out, out=d)
+        d /= dt
+        np.add(self.d_tau, dt, out=a)
+        np.divide(dt, a, out=a)
+        d -= self.speed
+        d *= a
+        self.speed += d
+        # cutoff = min_cutoff + beta·|speed|, alpha = dt / (dt + 1/(2π·cutoff))
+        np.abs(self.speed, out=a)
+        a *= self.beta
+        a += self.min_cutoff
+        a *= 2 * math.pi * dt
+        np.divide(a, a + 1, out=a)
+        np.subtract(z, self.out, out=d)
+        d *= a
+        self.out += d
+
+
+class ConstantVelocityKalman(_Smoother):
+    """Per-axis [position, velocity] Kalman filter, vectorized over the axes."""
+
+    kind = 'kalman'
+
+    def __init__(self, q, r):
+        super().__init__()
+        self.q   = np.asarray(q, dtype=np.float64) * np.ones(4)
+        self.r   = np.asarray(r, dtype=np.float64) * np.ones(4)
+        self.out = np.zeros(4)      # position estimate
+        self.vel = np.zeros(4)
+        # covariance [[p00, p01], [p01, p11]] per axis
+        self.p00 = np.empty(4)
+        self.p01 = np.empty(4)
+        self.p11 = np.empty(4)
+        self._k0 = np.empty(4)
+        self._k1 = np.empty(4)
+        self._e  = np.empty(4)
+
+    def _init(self, z):
+        self.out[:] = z
+        self.vel[:] = 0
+        self.p00[:] = self.r
+        self.p01[:] = 0
+        self.p11[:] = self.q      # ~1 s of unknown acceleration
+
+    def _step(self, z, dt):
+        p00, p01, p11, q = self.p00, self.p01, self.p11, self.q
+        k0, k1, e = self._k0, self._k1, self._e
+        # predict: x = F x, P = F P Fᵀ + Q
+        dt2 = dt * dt
+        np.multiply(self.vel, dt, out=e)
+        self.out += e
+        np.multiply(p11, dt, out=e)
+        p00 += dt * (2 * p01 + e) + q * (dt2 * dt / 3)
+        p01 += e + q * (dt2 / 2)
+        p11 += q * dt
+        # update with the measured position
+        np.add(p00, self.r, out=e)
+        np.divide(p00, e, out=k0)
+        np.divide(p01, e, out=k1)
+        np.subtract(z, self.out, out=e)
+        self.out += k0 * e
+        self.vel += k1 * e
+        np.multiply(k1, p01, out=e)
+        p11 -= e
+        np.multiply(k0, p01, out=e)
+        p01 -= e
+        np.multiply(k0, p00, out=e)
+        p00 -= e
+
+
+def build(kind, **params):
+    """A smoother of `kind` with per-axis parameter arrays (or scalars)."""
+    if kind == 'one-euro':
+        return OneEuro(**params)
+    if kind == 'kalman':
+        return ConstantVelocityKalman(**params)
+    raise ValueError(f"unknown smoothing {kind!r}, expected one of {', '.join(KINDS)}")
+
+
+def from_calibration(calibration, kind='auto'):
+    """The smoother the calibration files ask for, or None.
+
+    kind='auto' follows filter.kind in joystick 1's file (no filter entry:
+    no smoothing); 'off' disables it; a KINDS name forces that filter with
+    the per-axis parameters from the files.
+    """
+    if kind == 'auto':
+        kind = calibration.raw[0].get('filter', {}).get('kind', 'off')
+    if kind == 'off':
+        return None
+    if kind not in KINDS:
+        raise ValueError(f"unknown smoothing {kind!r}, expected one of {', '.join(KINDS)}")
+    return build(kind, **axis_params(calibration, kind))
@@ -0,0 +1,325 @@
+"""Several controller rigs behind one WebSocket server.
+
+    joybridge serve --device rig1=/dev/ttyUSB0 --device rig2=/dev/ttyUSB1
+    joybridge serve --discover
+
+Every device runs in its own worker process: a normal Pipeline (reader,
+parser, calibration, throttle) whose only sink writes finished frames into
+a shared-memory FrameRing, so the parsing loops never contend for one GIL
+and nothing is pickled. A pipe per worker only carries one-byte wakeups
+(and EOF when the worker dies); the supervisor's event loop then reads the
+newest frame from the ring and publishes it to that device's BroadcastHub.
+Browsers pick a device by URL path, ws://host:8765/rig2; the bare path '/'
+is the first device.
+
+A worker that exits with an error (port unplugged, firmware reset) is
+restarted after `restart_delay`, doubling up to `max_restart_delay` while
+it keeps failing; one that exits cleanly (a replayed capture ran out) or
+with EXIT_CONFIG (missing calibration, bad options) is left alone.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+from websockets.asyncio.server import serve
+
+from .broadcast_hub import BroadcastHub
+from .calibration import Calibration
+from .capture import ReplaySerial
+from .pipeline import Pipeline, build_filters
+from .reporting import DEFAULT_HEARTBEAT, report_mode
+from .ring import FrameRing, RingReader, frame_payload, write_payload
+from .sinks import Sink
+from .udp_source import parse_address
+from .ws_frames import BINARY_SUBPROTOCOL, SERVER_OPTIONS, pack_payload
+
+CAPTURE_SUFFIX = '.jbcap'
+UDP_SCHEME     = 'udp://'
+EXIT_CONFIG    = 3      # worker exit code: restarting won't help
+STABLE_RUN     = 30.0   # s a worker must have run for its restart delay to start over
+
+
+class DeviceSpec:
+    """One rig: `ID=PORT[,CAL1,CAL2]`.
+
+    A PORT ending in .jbcap is replayed; udp://HOST[:PORT] streams from a
+    WiFi board (udp_source).
+    """
+
+    def __init__(self, device_id, port, calibration1, calibration2):
+        self.id           = device_id
+        self.port         = port
+        self.calibration1 = calibration1
+        self.calibration2 = calibration2
+
+    @classmethod
+    def parse(cls, text, calibration1, calibration2):
+        device_id, sep, rest = text.partition('=')
+        if not sep or not device_id or not rest:
+            raise ValueError(f"expected ID=PORT[,CAL1,CAL2], got {text!r}")
+        parts = rest.split(',')
+        if parts[0].startswith(UDP_SCHEME):
+            parse_address(parts[0][len(UDP_SCHEME):])
+        if len(parts) == 3:
+            return cls(device_id, *parts)
+        if len(parts) == 1:
+            return cls(device_id, parts[0], calibration1, calibration2)
+        raise ValueError(f"expected ID=PORT[,CAL1,CAL2], got {text!r}")
+
+    def __repr__(self):
+        return f"DeviceSpec({self.id}={self.port})"
+
+
+def discover_ports():
+    """USB serial ports (those with a USB vendor id), e.g. Arduinos and CH340s."""
+    return [p.device for p in serial.tools.list_ports.comports() if p.vid is not None]
+
+
+class RingSink(Sink):
+    """Worker side: write each payload into the ring, wake the supervisor if it asked."""
+
+    name = 'ring'
+
+    def __init__(self, ring, conn):
+        self.ring = ring
+        self.conn = conn
+
+    def send(self, payload):
+        write_payload(self.ring, payload, time.perf_counter())
+        if self.ring.take_doorbell():
+            self.conn.send_bytes(b'\x01')
+
+
+def device_worker(spec, ring_name, conn, options):
+    """Process entry point: run one device's pipeline until its port closes."""
+    if options.get('quiet'):
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        cal = Calibration.load(spec.calibration1, spec.calibration2)
+        filters = build_filters(cal, options.get('smoothing', 'auto'), options.get('deadzone', 0))
+        report = report_mode(options.get('report', 'keep'), options.get('report_rate', 0),
+                             options.get('report_threshold', 0),
+                             options.get('heartbeat', DEFAULT_HEARTBEAT), cal)
+    except FileNotFoundError as e:
+        print(f"[!] {spec.id}: {e.filename} not found")
+        sys.exit(EXIT_CONFIG)
+    except ValueError as e:
+        print(f"[!] {spec.id}: {e}")
+        sys.exit(EXIT_CONFIG)
+    ring = FrameRing(ring_name)
+    pipeline = Pipeline(cal, filters, [RingSink(ring, conn)],
+                        max_rate=options.get('max_rate', 0),
+                        pair_timeout=options.get('pair_timeout', 0.02))
+    ser = None
+    if spec.port.startswith(UDP_SCHEME):
+        # keeps saying HELLO, so a board that reboots or wanders off comes back by itself
+        run = pipeline.run_udp(spec.port[len(UDP_SCHEME):])
+    elif spec.port.endswith(CAPTURE_SUFFIX):
+        ser = ReplaySerial(spec.port, options.get('speed', 1.0), options.get('loop', 1))
+    else:
+        try:
+            ser = serial.Serial(spec.port, options.get('baud', 115200), timeout=1)
+        except serial.SerialException as e:
+            print(f"[!] {spec.id}: cannot open {spec.port}: {e}")
+            sys.exit(1)
+    if ser is not None:
+        run = pipeline.run(ser, report=report)
+    try:
+        asyncio.run(run)
+    except KeyboardInterrupt:
+        pass
+    except (serial.SerialException, OSError) as e:
+        print(f"[!] {spec.id}: {'serial port' if ser else 'UDP socket'} lost: {e}")
+        sys.exit(1)
+    finally:
+        if ser is not None:
+            ser.close()
+        conn.close()
+        ring.close()
+
+
+class _Device:
+    __slots__ = ('spec', 'hub', 'process', 'conn', 'thread', 'ring', 'reader',
+                 'restarts', 'failures', 'started', 'done')
+
+    def __init__(self, spec, hub):
+        self.spec     = spec
+        self.hub      = hub
+        self.process  = None
+        self.conn     = None
+        self.thread   = None
+        self.ring     = None
+        self.reader   = None
+        self.restarts = 0
+        self.failures = 0       # crashes in a row, for the backoff
+        self.started  = 0.0
+        self.done     = None
+
+
+class Supervisor:
+    """Worker processes for each device, fanned into per-device hubs on one server."""
+
+    def __init__(self, devices, host='0.0.0.0', port=8765, delta=False,
+                 options=None, restart_delay=1.0, max_restart_delay=30.0, ring_capacity=256):
+        if not devices:
+            raise ValueError("no devices")
+        self.host          = host
+        self.port          = port
+        self.options       = dict(options or {})
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.ring_capacity = ring_capacity
+        self.devices       = {}
+        for spec in devices:
+            if spec.id in self.devices:
+                raise ValueError(f"duplicate device id {spec.id!r}")
+            hub = BroadcastHub(delta=delta, encode_binary=pack_payload)
+            self.devices[spec.id] = _Device(spec, hub)
+        self.default       = devices[0].id
+        self.server        = None
+        self.loop          = None
+        self.on_payload    = None    # on_payload(device_id, payload), for tools
+        self._ctx          = multiprocessing.get_context('spawn')
+        self._closing      = False
+
+    # — workers —
+
+    def _spawn(self, dev):
+        if dev.ring is None:
+            # outlives worker restarts; a new worker continues the sequence
+            dev.ring = FrameRing(capacity=self.ring_capacity, create=True)
+            dev.reader = RingReader(dev.ring)
+        dev.ring.arm()
+        parent, child = self._ctx.Pipe(duplex=False)
+        dev.process = self._ctx.Process(target=device_worker, name=f'joybridge-{dev.spec.id}',
+                                        args=(dev.spec, dev.ring.name, child, self.options),
+                                        daemon=True)
+        dev.process.start()
+        dev.started = time.monotonic()
+        child.close()      # so the parent's end sees EOF when the worker dies
+        dev.conn = parent
+        if dev.done is None or dev.done.done():
+            dev.done = self.loop.create_future()
+        try:
+            self.loop.add_reader(parent.fileno(), self._drain, dev)
+        except NotImplementedError:
+            # Windows proactor loop: block on the pipe in a thread instead
+            dev.thread = threading.Thread(target=self._pipe_thread, args=(dev, parent),
+                                          daemon=True)
+            dev.thread.start()
+
+    def _drain(self, dev):
+        """Swallow queued wakeups, then publish the ring's newest frame (latest-value)."""
+        conn = dev.conn
+        try:
+            while conn.poll():
+                conn.recv_bytes()
+        except (EOFError, OSError):
+            self.loop.remove_reader(conn.fileno())
+            self._ring_ready(dev)
+            self._exited(dev)
+            return
+        self._ring_ready(dev)
+
+    def _pipe_thread(self, dev, conn):
+        try:
+            while True:
+                conn.recv_bytes()
+                self.loop.call_soon_threadsafe(self._ring_ready, dev)
+        except (EOFError, OSError):
+            self.loop.call_soon_threadsafe(self._exited, dev)
+
+    def _ring_ready(self, dev):
+        # re-arm before reading: a frame written in between is either read
+        # now or rings the doorbell again, never left waiting
+        dev.ring.arm()
+        rec = dev.reader.latest()
+        if rec is not None:
+            self._publish(dev, frame_payload(rec))
+
+    def _publish(self, dev, payload):
+        dev.hub.publish(payload)
+        if self.on_payload is not None:
+            self.on_payload(dev.spec.id, payload)
+
+    def _exited(self, dev):
+        dev.conn.close()
+        self._reap(dev)
+
+    def _reap(self, dev):
+        # the pipe closes a moment before the process is gone; never block the loop on it
+        dev.process.join(0)
+        code = dev.process.exitcode
+        if code is None:
+            self.loop.call_later(0.05, self._reap, dev)
+            return
+        if self._closing or code in (0, EXIT_CONFIG):
+            if code == EXIT_CONFIG and not self._closing:
+                print(f"[!] {dev.spec.id}: configuration error, not restarting")
+            if not dev.done.done():
+                dev.done.set_result(code)
+            return
+        if time.monotonic() - dev.started >= STABLE_RUN:
+            dev.failures = 0
+        delay = min(self.restart_delay * 2 ** dev.failures, self.max_restart_delay)
+        if delay < self.max_restart_delay:
+            dev.failures += 1
+        dev.restarts += 1
+        print(f"[!] {dev.spec.id}: worker exited ({code}), restarting in {delay:g}s")
+        self.loop.call_later(delay, self._respawn, dev)
+
+    def _respawn(self, dev):
+        if not self._closing:
+            self._spawn(dev)
+
+    # — WebSocket side —
+
+    async def _handler(self, ws):
+        device_id = ws.request.path.split('?')[0].strip('/') or self.default
+        dev = self.devices.get(device_id)
+        if dev is None:
+            await ws.close(1008, f'unknown device {device_id}')
+            return
+        print(f"[+] WS client on {device_id} ({ws.subprotocol or 'json'})")
+        await dev.hub.serve_client(ws, binary=ws.subprotocol == BINARY_SUBPROTOCOL)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await serve(self._handler, self.host, self.port, **SERVER_OPTIONS)
+        for dev in self.devices.values():
+            self._spawn(dev)
+        print(f"[+] Supervising {len(self.devices)} devices on ws://{self.host}:{self.port}/<id>: "
+              + ', '.join(f"{d.spec.id}={d.spec.port}" for d in self.devices.values()))
+
+    async def wait(self):
+        """Until every worker has exited cleanly (only happens with replays)."""
+        await asyncio.gather(*(d.done for d in self.devices.values()))
+
+    async def stop(self):
+        self._closing = True
+        for dev in self.devices.values():
+            if dev.process is not None and dev.process.is_alive():
+                dev.process.terminate()
+        for dev in self.devices.values():
+            if dev.process is not None:
+                await self.loop.run_in_executor(None, dev.process.join)
+            if dev.conn is not None and not dev.conn.closed:
+                if dev.thread is None:
+                    self.loop.remove_reader(dev.conn.fileno())
+                dev.conn.close()
+            if dev.ring is not None:
+                dev.ring.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def stats(self):
+        return {dev_id: dict(d.hub.stats(), restarts=d.restarts,
+                             received=d.reader.received if d.reader else 0,
+                             lost=d.reader.lost if d.reader else 0)
+                for dev_id, d in self.devices.items()}
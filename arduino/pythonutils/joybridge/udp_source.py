@@ -0,0 +1,201 @@
+"""Joystick frames over UDP from the ESP32's SoftAP, instead of USB serial.
+
+Each datagram carries one or more binary frames (binary_frames, 16 bytes
+each, CRC but no COBS: the datagram already delimits them). The firmware
+only streams to a host that asked for it: the receiver sends HELLO to the
+board every HELLO_INTERVAL, and the board streams to the address the last
+HELLO came from until they stop (esp32_with_wifi.ino).
+
+    receiver = UdpFrameReceiver(pipeline.on_frame, device='192.168.4.1')
+    closed = await receiver.start()
+
+The receiver binds an ephemeral port by default; the board answers to
+wherever the HELLO came from, so several receivers can share one host.
+
+WiFi loses and reorders datagrams. Frames reach `on_frame` in sequence
+order only: a frame older than one already delivered would move the
+sticks backwards, so it is dropped (and counted as late, not lost).
+LinkStats keeps RFC 3550 style loss and inter-arrival jitter figures.
+"""
+import asyncio
+import time
+
+from .binary_frames import RAW_SIZE, DualFrame, unpack_raw
+
+UDP_PORT       = 4210           # the board's port
+DEVICE_ADDR    = '192.168.4.1'  # the board itself, ESP32 SoftAP default
+HELLO          = b'JB HELLO\n'
+HELLO_INTERVAL = 1.0            # s; the firmware gives up on a host after 5 s of silence
+RESTART_GAP    = 1_000_000      # µs the firmware clock may run backwards before we call it a reboot
+
+
+class LinkStats:
+    """Sequence, loss and jitter bookkeeping for one stream of frames."""
+
+    WINDOW = 64     # recent sequence numbers remembered for duplicate detection
+
+    def __init__(self):
+        self.reset()
+        self.restarts = 0
+
+    def reset(self):
+        self.first      = None      # extended sequence numbers
+        self.highest    = None
+        self.received   = 0         # distinct frames, late ones included
+        self.delivered  = 0
+        self.late       = 0
+        self.duplicates = 0
+        self.jitter     = 0.0       # µs, smoothed |transit difference|
+        self._seen      = 0         # bit i: highest - i was received
+        self._transit   = None
+        self._timestamp = None
+
+    def accept(self, seq, timestamp, arrival):
+        """Record one frame; True if it is newer than everything delivered so far.
+
+        `seq` is the frame's 16-bit sequence number, `timestamp` its
+        firmware micros() and `arrival` the host time in seconds.
+        """
+        if self._timestamp is not None:
+            back = (self._timestamp - timestamp) & 0xFFFFFFFF
+            if RESTART_GAP < back < 0x80000000:     # the clock jumped back: firmware reboot
+                self.restarts += 1
+                self.reset()
+        if self.highest is None:
+            self.first = ext = seq
+            self._seen = 1
+        else:
+            ext = self.highest + ((seq - self.highest + 0x8000) & 0xFFFF) - 0x8000
+            behind = self.highest - ext
+            if behind >= 0 and behind < self.WINDOW and self._seen >> behind & 1:
+                self.duplicates += 1
+                return False
+        self.received += 1
+        # RFC 3550 6.4.1 over every arrival, late ones too: J += (|D(i-1, i)| - J) / 16, µs
+        transit = arrival * 1e6 - timestamp
+        if self._transit is not None:
+            d = transit - self._transit
+            if abs(d) < 0x80000000:     # not across a micros() wrap
+                self.jitter += (abs(d) - self.jitter) / 16
+        self._transit = transit
+        if self.highest is not None and ext <= self.highest:
+            if behind < self.WINDOW:
+                self._seen |= 1 << behind
+            self.late += 1
+            self.first = min(self.first, ext)
+            return False
+        if self.highest is not None:
+            self._seen = (self._seen << -behind | 1) & ((1 << self.WINDOW) - 1)
+        self.highest = ext
+        self.delivered += 1
+        self._timestamp = timestamp
+        return True
+
+    @property
+    def expected(self):
+        return 0 if self.highest is None else self.highest - self.first + 1
+
+    @property
+    def lost(self):
+        return max(self.expected - self.received, 0)
+
+    def snapshot(self):
+        expected = self.expected
+        return {
+            'received': self.received,
+            'lost': self.lost,
+            'loss_pct': round(self.lost / expected * 100, 2) if expected else 0.0,
+            'late': self.late,
+            'duplicates': self.duplicates,
+            'jitter_ms': round(self.jitter / 1000, 3),
+            'restarts': self.restarts,
+        }
+
+
+def parse_address(text, default_port=UDP_PORT):
+    """'host[:port]' → (host, port)."""
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        return text, default_port
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ValueError(f"bad UDP address {text!r}, expected HOST[:PORT]") from None
+
+
+class UdpFrameReceiver(asyncio.DatagramProtocol):
+    """Listen for frame datagrams and hand in-order frames to `on_frame(DualFrame)`.
+
+    With `device` ('host[:port]') set, HELLO is sent there every
+    HELLO_INTERVAL so the board keeps streaming to us. `idle_timeout`
+    seconds without a frame close the receiver (0 = never), like a serial
+    port that went away.
+    The DualFrame passed to `on_frame` is reused.
+    """
+
+    def __init__(self, on_frame, device=None, host='0.0.0.0', port=0, idle_timeout=0):
+        self.on_frame     = on_frame
+        self.host         = host
+        self.port         = port
+        self.device       = parse_address(device) if device else None
+        self.idle_timeout = idle_timeout
+        self.stats        = LinkStats()
+        self.errors       = 0
+        self.closed       = None
+        self.transport    = None
+        self._frame       = DualFrame()
+        self._last        = None
+        self._timer       = None
+
+    async def start(self):
+        """Bind and begin receiving; returns a future resolved when the receiver stops."""
+        loop = asyncio.get_running_loop()
+        self.closed = loop.create_future()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(self.host, self.port))
+        self.port = self.transport.get_extra_info('sockname')[1]
+        self._last = time.monotonic()
+        if self.device or self.idle_timeout:
+            self._tick()
+        return self.closed
+
+    def stop(self, exc=None):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.transport is not None:
+            self.transport.close()
+        if self.closed is not None and not self.closed.done():
+            if exc is None:
+                self.closed.set_result(None)
+            else:
+                self.closed.set_exception(exc)
+
+    def _tick(self):
+        if self.idle_timeout and time.monotonic() - self._last > self.idle_timeout:
+            print(f"[!] No UDP frames for {self.idle_timeout:g}s")
+            self.stop()
+            return
+        if self.device:
+            self.transport.sendto(HELLO, self.device)
+        self._timer = asyncio.get_running_loop().call_later(HELLO_INTERVAL, self._tick)
+
+    def datagram_received(self, data, addr):
+        arrival = time.perf_counter()
+        self._last = time.monotonic()
+        frame = self._frame
+        for off in range(0, len(data) - RAW_SIZE + 1, RAW_SIZE):
+            if unpack_raw(data[off:off + RAW_SIZE], frame) is None:
+                self.errors += 1
+                continue
+            if self.stats.accept(frame.seq, frame.timestamp, arrival):
+                self.on_frame(frame)
+        if len(data) % RAW_SIZE:
+            self.errors += 1
+
+    def error_received(self, exc):
+        # ICMP port unreachable while the board is still booting; keep listening
+        self.errors += 1
+
+    def connection_lost(self, exc):
+        self.stop(exc)
@@ -0,0 +1,97 @@
+"""Binary WebSocket encoding of the joystick payload.
+
+Browsers that offer the `joystick.bin.v3` subprotocol get one 16-byte binary
+message per frame instead of ~190 bytes of JSON; everyone else keeps JSON.
+Layout, little-endian:
+
+    0   u8   format version (3)
+    1   u8   direction of joystick 1 (high nibble) and 2 (low nibble)
+    2   u16  sequence number
+    4   i16  joystick1 x, normalized [-1, 1] × 32767
+    6   i16  joystick1 y
+    8   i16  joystick2 x
+    10  i16  joystick2 y
+    12  u32  sample time, the bridge's monotonic clock in µs (wraps after
+             ~71 minutes; only differences between frames mean anything)
+
+Version 2 was the same without the sample time, which the browser's jitter
+buffer needs; version 1 carried the raw dx/dy offsets instead. Neither is
+served any more (such pages fall back to JSON, which has all fields).
+
+Decoded with a DataView in templates/training.html (decodeBinaryFrame).
+"""
+import struct
+import time
+
+BINARY_SUBPROTOCOL = 'joystick.bin.v3'
+FORMAT_VERSION     = 3
+Q15                = 32767
+JSON_SUBPROTOCOL   = 'joystick.json'
+
+# Index = wire value; keep in sync with DIRECTION_NAMES in training.html
+DIRECTIONS = ['center', 'up', 'down', 'left', 'right',
+              'up-left', 'up-right', 'down-left', 'down-right']
+_DIRECTION_CODES = {d: i for i, d in enumerate(DIRECTIONS)}
+
+_FRAME = struct.Struct('<BBHhhhhI')
+FRAME_SIZE = _FRAME.size
+
+
+def _q15(v):
+    v = round(v * Q15)
+    return -Q15 if v < -Q15 else Q15 if v > Q15 else v
+
+
+def _direction_code(d):
+    if not d:
+        return 0
+    return _DIRECTION_CODES.get(d.lower(), 0)
+
+
+def pack_payload(payload, seq):
+    """Encode a {'joystick1': {...}, 'joystick2': {...}, 't': ms} payload."""
+    j1, j2 = payload['joystick1'], payload['joystick2']
+    t = payload.get('t')
+    if t is None:
+        t = time.perf_counter() * 1000
+    return _FRAME.pack(
+        FORMAT_VERSION,
+        _direction_code(j1.get('direction')) << 4 | _direction_code(j2.get('direction')),
+        seq & 0xFFFF,
+        _q15(j1['x']), _q15(j1['y']),
+        _q15(j2['x']), _q15(j2['y']),
+        int(t * 1000) & 0xFFFFFFFF)
+
+
+def unpack_payload(data):
+    """Inverse of pack_payload, for tools and benchmarks."""
+    _, dirs, seq, x1, y1, x2, y2, t_us = _FRAME.unpack_from(data)
+    return {
+        'seq': seq,
+        't': t_us / 1000,
+        'joystick1': {'x': x1 / Q15, 'y': y1 / Q15, 'direction': DIRECTIONS[dirs >> 4]},
+        'joystick2': {'x': x2 / Q15, 'y': y2 / Q15, 'direction': DIRECTIONS[dirs & 0x0F]},
+    }
+
+
+def select_subprotocol(connection, subprotocols):
+    """websockets.asyncio `select_subprotocol` hook: binary if offered, else JSON.
+
+    Clients that offer nothing are still accepted (plain JSON), so older
+    pages and the diagnostic tool keep working.
+    """
+    if BINARY_SUBPROTOCOL in subprotocols:
+        return BINARY_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in subprotocols:
+        return JSON_SUBPROTOCOL
+    return None
+
+
+# websockets.asyncio.server.serve() settings shared by every joystick server
+# (WebSocketSink, Supervisor); the legacy websockets.serve() calls the hook
+# with other arguments and never picks the binary subprotocol
+SERVER_OPTIONS = {
+    'origins':            None,     # disable origin checks in dev
+    'select_subprotocol': select_subprotocol,
+    'compression':        None,     # no permessage-deflate: it can't shrink 16-byte frames
+}
@@ -0,0 +1,83 @@
+import binascii
+
+import pytest
+
+from joybridge.binary_frames import (DualFrame, StreamDecoder, WIRE_SIZE, cobs_decode,
+                                     cobs_encode, crc16, pack_frame, pack_raw, unpack_frame,
+                                     unpack_raw)
+
+
+def test_crc16_is_ccitt_false():
+    assert crc16(b'123456789') == 0x29B1
+    assert crc16(b'123456789') == binascii.crc_hqx(b'123456789', 0xFFFF)
+
+
+@pytest.mark.parametrize('data', [b'', b'\x00', b'\x00\x00', b'\x11\x00\x22', bytes(range(1, 255)),
+                                  bytes(range(256)), b'\xff' * 300])
+def test_cobs_round_trip(data):
+    encoded = cobs_encode(data)
+    assert b'\x00' not in encoded
+    assert cobs_decode(encoded) == data
+
+
+def test_cobs_decode_rejects_malformed():
+    assert cobs_decode(b'\x05\x01') is None
+
+
+def frame(seq, x=100):
+    return DualFrame(seq, 1000 * seq, x, 200, 300, 400, 0)
+
+
+def test_frame_round_trip():
+    f = frame(7, x=4095)
+    raw = pack_raw(f)
+    assert len(raw) == 16
+    g = unpack_raw(raw)
+    assert (g.seq, g.timestamp, g.x1, g.y1, g.x2, g.y2) == (7, 7000, 4095, 200, 300, 400)
+    wire = pack_frame(f)
+    assert wire[-1:] == b'\x00' and len(wire) == WIRE_SIZE + 1
+    assert unpack_frame(wire[:-1]).seq == 7
+
+
+def test_frame_with_bad_crc_is_rejected():
+    raw = bytearray(pack_raw(frame(1)))
+    raw[5] ^= 0x40
+    assert unpack_raw(bytes(raw)) is None
+
+
+def decode(chunks):
+    lines, frames = [], []
+    dec = StreamDecoder(lines.append, lambda f: frames.append((f.seq, f.x1)))
+    for chunk in chunks:
+        dec.feed(chunk)
+    return dec, lines, frames
+
+
+def test_text_only():
+    dec, lines, frames = decode([b'Joystick 1 -> X: 1 | Y: 2\r\nJoy', b'stick 2 -> X: 3 | Y: 4\n'])
+    assert [bytes(l) for l in lines] == [b'Joystick 1 -> X: 1 | Y: 2', b'Joystick 2 -> X: 3 | Y: 4']
+    assert frames == [] and not dec.binary
+
+
+def test_text_then_binary_byte_by_byte():
+    stream = b'boot ok\n' + b''.join(pack_frame(frame(s, x=s)) for s in range(5))
+    dec, lines, frames = decode([stream[i:i + 1] for i in range(len(stream))])
+    assert [bytes(l) for l in lines] == [b'boot ok']
+    assert frames == [(s, s) for s in range(5)]
+    assert dec.binary and dec.frames == 5 and dec.lost == 0
+
+
+def test_sequence_gap_counts_lost_frames():
+    stream = b''.join(pack_frame(frame(s)) for s in (1, 2, 5, 6))
+    dec, _, frames = decode([stream])
+    assert [s for s, _ in frames] == [1, 2, 5, 6]
+    assert dec.lost == 2
+
+
+def test_corrupt_frame_is_counted_and_skipped():
+    bad = bytearray(pack_frame(frame(2)))
+    bad[3] ^= 0x01
+    stream = pack_frame(frame(1)) + bytes(bad) + pack_frame(frame(3))
+    dec, _, frames = decode([stream])
+    assert [s for s, _ in frames] == [1, 3]
+    assert dec.errors >= 1
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from bench_flight import fly_per_frame, synth_stream
+from joybridge import flight_model as fm
+
+
+@pytest.fixture(scope='module')
+def streams():
+    return [synth_stream(10, 120, seed) for seed in range(3)]
+
+
+def test_matches_per_frame_loop(streams):
+    flight = fm.simulate(streams, fm.FPS)
+    for i, s in enumerate(streams):
+        n = int(flight.frames[i])
+        pose = fly_per_frame(s, fm.FPS, n)
+        assert np.abs(pose[:, :3] - flight.positions[i, :n]).max() < 1e-9
+        assert np.abs(pose[:, 3] - flight.headings[i, :n]).max() < 1e-9
+
+
+def test_no_jitter_buffer_holds_newest(streams):
+    s = streams[0]
+    now = s.recv[0] + np.arange(200) * (1000 / fm.FPS)
+    inputs = fm.sample_inputs(s, now, jitter_buffer=0)
+    newest = np.searchsorted(s.recv, now, 'right') - 1
+    assert np.array_equal(inputs, s.axes[newest])
+
+
+def test_input_stream_drops_older_frames():
+    t = [0, 10, 20, 15, 20, 30]
+    axes = np.arange(24).reshape(6, 4) / 24
+    s = fm.InputStream(t, axes)
+    assert s.t.tolist() == [0, 10, 20, 20, 30]
+    assert len(s) == 5
+
+
+def test_duplicate_timestamps_stay_finite():
+    t = np.repeat(np.arange(50) * 8.0, 2)
+    axes = np.tile([0.5, -0.5, 0.25, 0.0], (100, 1))
+    s = fm.InputStream(t, axes, t + 2)
+    with np.errstate(all='raise'):
+        inputs = fm.sample_inputs(s, s.recv[0] + np.arange(100) * 5.0)
+    assert np.isfinite(inputs).all()
+
+
+def test_still_stick_stays_put():
+    t = np.arange(240) * (1000 / 120)
+    flight = fm.simulate([fm.InputStream(t, np.zeros((240, 4)))])
+    assert np.allclose(flight.positions[0], fm.START)
+    assert np.all(flight.headings == 0)
@@ -0,0 +1,60 @@
+import asyncio
+
+from joybridge.frame_assembler import STALE_1, STALE_2, FrameAssembler
+
+
+def assembler(timeout=0, loop=None):
+    pairs = []
+    asm = FrameAssembler(lambda a, b, stale: pairs.append((a, b, stale)), timeout, loop)
+    return asm, pairs
+
+
+def test_pairs_in_either_order():
+    asm, pairs = assembler()
+    asm.add(1, (1, 1, 'center'))
+    asm.add(2, (2, 2, 'center'))
+    asm.add(2, (4, 4, 'up'))
+    asm.add(1, (3, 3, 'up'))
+    assert pairs == [((1, 1, 'center'), (2, 2, 'center'), 0),
+                     ((3, 3, 'up'), (4, 4, 'up'), 0)]
+    assert asm.stats() == {'complete': 2, 'stale': 0, 'mismatched': 0, 'dropped': 0}
+
+
+def test_mismatch_before_partner_seen_is_dropped():
+    asm, pairs = assembler()
+    asm.add(1, (1, 1, 'center'))
+    asm.add(1, (3, 3, 'center'))
+    asm.add(2, (2, 2, 'center'))
+    assert pairs == [((3, 3, 'center'), (2, 2, 'center'), 0)]
+    assert asm.stats() == {'complete': 1, 'stale': 0, 'mismatched': 1, 'dropped': 1}
+
+
+def test_mismatch_reuses_the_previous_partner():
+    asm, pairs = assembler()
+    asm.add(1, (1, 1, 'a'))
+    asm.add(2, (2, 2, 'a'))
+    asm.add(1, (3, 3, 'b'))
+    asm.add(1, (5, 5, 'c'))
+    assert pairs[-1] == ((3, 3, 'b'), (2, 2, 'a'), STALE_2)
+    assert asm.stats() == {'complete': 1, 'stale': 1, 'mismatched': 1, 'dropped': 0}
+
+
+def test_unknown_joystick_is_ignored():
+    asm, pairs = assembler()
+    asm.add(0, (1, 1, 'a'))
+    asm.add(3, (1, 1, 'a'))
+    assert pairs == [] and asm.pending == {}
+
+
+def test_timeout_sends_stale_frame():
+    async def run():
+        asm, pairs = assembler(timeout=0.01, loop=asyncio.get_running_loop())
+        asm.add(1, (1, 1, 'a'))
+        asm.add(2, (2, 2, 'a'))
+        asm.add(2, (4, 4, 'b'))
+        await asyncio.sleep(0.05)
+        return asm, pairs
+
+    asm, pairs = asyncio.run(run())
+    assert pairs[-1] == ((1, 1, 'a'), (4, 4, 'b'), STALE_1)
+    assert asm.stats() == {'complete': 1, 'stale': 1, 'mismatched': 0, 'dropped': 0}
@@ -0,0 +1,26 @@
+import pytest
+
+from joybridge.joystick_parser import parse_line
+
+
+@pytest.mark.parametrize('line, expected', [
+    (b'Joystick 1 -> X: 1910 | Y: 1743 | Direction: Up-Left', (1, 1910, 1743, 'Up-Left')),
+    (b'Joystick 2 -> X: 0 | Y: 4095 | Direction: Down', (2, 0, 4095, 'Down')),
+    (b'X: 1954 | Y: 1887 | Direction: Center', (0, 1954, 1887, 'Center')),
+    (b'Raw X: 1954, Y: 1887 | Direction: Center', (0, 1954, 1887, 'Center')),
+])
+def test_formats(line, expected):
+    f = parse_line(line)
+    assert (f.joystick, f.x, f.y, f.direction) == expected
+
+
+@pytest.mark.parametrize('line', [b'', b'boot ok', b'Joystick 1 -> X: | Y: 3'])
+def test_noise(line):
+    assert parse_line(line) is None
+
+
+def test_frame_is_reused():
+    first = parse_line(b'Joystick 1 -> X: 1 | Y: 2 | Direction: Up')
+    again = parse_line(b'Joystick 2 -> X: 3 | Y: 4 | Direction: Down', first)
+    assert again is first
+    assert (again.joystick, again.x, again.y, again.direction) == (2, 3, 4, 'Down')
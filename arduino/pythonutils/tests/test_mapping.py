@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from joybridge.calibration import Calibration, resolve_direction
+from joybridge.mapping import DIRECTION_TABLE, ControlMapping, direction_classes
+
+CAL = {
+    'center': {'x': 2048, 'y': 2048, 'err_x': 10, 'err_y': 10},
+    'up':     {'x': 2048, 'y': 0},
+    'down':   {'x': 2048, 'y': 4095},
+    'left':   {'x': 0,    'y': 2048},
+    'right':  {'x': 4095, 'y': 2048},
+}
+
+# stick 2 off-centre and mounted the other way round: up/left read high
+FLIPPED = {
+    'center': {'x': 1900, 'y': 2200, 'err_x': 25, 'err_y': 5},
+    'up':     {'x': 1900, 'y': 4000},
+    'down':   {'x': 1900, 'y': 150},
+    'left':   {'x': 3900, 'y': 2200},
+    'right':  {'x': 60,   'y': 2200},
+}
+
+
+@pytest.fixture(scope='module')
+def cal():
+    return Calibration(CAL, FLIPPED)
+
+
+@pytest.fixture(scope='module')
+def mapping(cal):
+    return ControlMapping(cal)
+
+
+def test_direction_classes():
+    cls = direction_classes(100, 10, 20)
+    assert cls[89] == -1 and cls[90] == 0 and cls[120] == 0 and cls[121] == 1
+    flipped = direction_classes(100, 10, 20, inverted=True)
+    assert flipped[110] == 0 and flipped[111] == -1 and flipped[80] == 0 and flipped[79] == 1
+
+
+def test_rest_reads_zero(mapping):
+    p = mapping.payload(2048, 2048, 1900, 2200)
+    for stick in ('joystick1', 'joystick2'):
+        assert (p[stick]['dx'], p[stick]['dy'], p[stick]['x'], p[stick]['y']) == (0, 0, 0, 0)
+        assert p[stick]['direction'] == 'center'
+
+
+def test_extremes(mapping):
+    p = mapping.payload(4095, 0, 60, 4000)
+    assert p['joystick1']['x'] == pytest.approx(1, abs=1e-3)
+    assert p['joystick1']['y'] == pytest.approx(-1, abs=1e-3)
+    assert p['joystick1']['direction'] == 'up-right'
+    assert p['joystick2']['x'] > 0.9 and p['joystick2']['y'] < -0.9
+    assert p['joystick2']['direction'] == 'up-right'
+
+
+def test_tables_match_per_frame_normalize(cal, mapping):
+    codes = np.arange(4096)
+    for i, lut in enumerate(cal.lut_arrays):
+        value = np.array(mapping.values[i])
+        moving = mapping.class_arrays[i] != 0
+        assert np.all(value[~moving] == 0)
+        assert np.allclose(value[moving], lut[codes[moving]], atol=5e-5)
+        assert np.all(value[moving] * mapping.class_arrays[i][moving] >= 0)
+
+
+def test_directions_match_resolve_direction(cal, mapping):
+    rng = np.random.default_rng(1)
+    for x1, y1, x2, y2 in rng.integers(0, 4096, (2000, 4)).tolist():
+        p = mapping.payload(x1, y1, x2, y2)
+        for n, (x, y) in enumerate(((x1, y1), (x2, y2))):
+            dx, dy = x - cal.center[2 * n], y - cal.center[2 * n + 1]
+            if mapping.inverted[2 * n]:
+                dx = -dx
+            if mapping.inverted[2 * n + 1]:
+                dy = -dy
+            assert p[f'joystick{n + 1}']['direction'] == resolve_direction(dx, dy, cal.thresholds[n])
+
+
+def test_block_matches_payload(mapping):
+    rng = np.random.default_rng(2)
+    raw = rng.integers(0, 4096, (500, 4))
+    values, dirs = mapping.block(raw)
+    for row, v, d in zip(raw.tolist(), values, dirs):
+        p = mapping.payload(*row)
+        assert tuple(v) == (p['joystick1']['x'], p['joystick1']['y'],
+                            p['joystick2']['x'], p['joystick2']['y'])
+        assert (DIRECTION_TABLE[d[0]], DIRECTION_TABLE[d[1]]) == \
+            (p['joystick1']['direction'], p['joystick2']['direction'])
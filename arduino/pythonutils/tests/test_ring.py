@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from joybridge.ring import _TRAIL_AT, FrameRing, RingReader, frame_payload, write_payload
+
+
+@pytest.fixture
+def ring():
+    r = FrameRing(capacity=4, create=True)
+    yield r
+    r.close()
+
+
+def payload(i):
+    return {
+        'mode': '2',
+        'joystick1': {'dx': i, 'dy': -i, 'x': 0.5, 'y': -0.5, 'direction': 'up'},
+        'joystick2': {'dx': 0, 'dy': 0, 'x': 0.0, 'y': 0.0, 'direction': 'center'},
+        't': float(i),
+    }
+
+
+def test_payload_round_trip(ring):
+    write_payload(ring, payload(3), 0.0)
+    assert frame_payload(ring.read(0)) == payload(3)
+
+
+def test_reader_sees_frames_in_order(ring):
+    reader = RingReader(ring)
+    for i in range(3):
+        write_payload(ring, payload(i), 0.0)
+    assert [rec[2] for rec in reader.frames()] == [0, 1, 2]
+    assert (reader.received, reader.lost) == (3, 0)
+    assert list(reader.frames()) == []
+
+
+def test_lapped_reader_skips_ahead(ring):
+    reader = RingReader(ring)
+    for i in range(10):
+        write_payload(ring, payload(i), 0.0)
+    assert ring.read(0) is None             # overwritten by seq 8
+    assert [rec[2] for rec in reader.frames()] == [7, 8, 9]
+    assert (reader.received, reader.lost) == (3, 7)
+
+
+def test_torn_slot_is_not_returned(ring):
+    reader = RingReader(ring)
+    for i in range(3):
+        write_payload(ring, payload(i), 0.0)
+    # the writer is halfway through slot 1: body written, trailer not yet
+    ring.buf[ring._slot(1) + _TRAIL_AT] ^= 0xFF
+    assert ring.read(1) is None
+    assert [rec[2] for rec in reader.frames()] == [0, 2]
+    assert (reader.received, reader.lost) == (2, 1)
+
+
+def test_latest_skips_torn_newest(ring):
+    reader = RingReader(ring)
+    for i in range(3):
+        write_payload(ring, payload(i), 0.0)
+    ring.buf[ring._slot(2)] ^= 0xFF
+    assert reader.latest()[2] == 1
+    assert reader.received == 3
+    assert reader.latest() is None
+
+
+def test_attached_writer_continues_sequence(ring):
+    write_payload(ring, payload(0), 0.0)
+    other = FrameRing(ring.name)
+    write_payload(other, payload(1), 0.0)
+    assert ring.written() == 2 and ring.read(1)[2] == 1
+    other.close()
+
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='grows the segment through its POSIX fd')
+def test_attach_to_longer_mapping(ring):
+    # Windows and macOS hand the attaching side a page-rounded mapping;
+    # growing the segment after creation shows the worker the same thing
+    os.ftruncate(ring.shm._fd, ring.shm.size + 4096)
+    worker = FrameRing(ring.name)
+    assert len(worker.buf) > len(ring.buf)
+    assert worker.capacity == ring.capacity == 4
+    reader = RingReader(ring)
+    for i in range(6):
+        write_payload(worker, payload(i), 0.0)
+    assert [rec[2] for rec in reader.frames()] == [3, 4, 5]
+    assert (reader.received, reader.lost) == (3, 3)
+    worker.close()
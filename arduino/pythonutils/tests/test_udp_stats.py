@@ -0,0 +1,61 @@
+from joybridge.udp_source import LinkStats
+
+
+def feed(stats, seqs, step_us=8333):
+    return [stats.accept(s & 0xFFFF, (s * step_us) & 0xFFFFFFFF, s * step_us / 1e6)
+            for s in seqs]
+
+
+def test_in_order():
+    stats = LinkStats()
+    assert all(feed(stats, range(100)))
+    snap = stats.snapshot()
+    assert (snap['received'], snap['lost'], snap['late'], snap['duplicates']) == (100, 0, 0, 0)
+    assert snap['jitter_ms'] == 0
+
+
+def test_loss():
+    stats = LinkStats()
+    feed(stats, [0, 1, 2, 5, 6, 9])
+    snap = stats.snapshot()
+    assert snap['lost'] == 4
+    assert snap['loss_pct'] == 40.0
+
+
+def test_late_frame_fills_the_gap_but_is_not_delivered():
+    stats = LinkStats()
+    assert feed(stats, [0, 1, 3, 2, 4]) == [True, True, True, False, True]
+    snap = stats.snapshot()
+    assert (snap['lost'], snap['late'], snap['duplicates']) == (0, 1, 0)
+    assert stats.delivered == 4
+
+
+def test_duplicates():
+    stats = LinkStats()
+    assert feed(stats, [0, 1, 1, 2, 0, 2]) == [True, True, False, True, False, False]
+    snap = stats.snapshot()
+    assert (snap['received'], snap['lost'], snap['duplicates']) == (3, 0, 3)
+
+
+def test_sequence_wrap():
+    stats = LinkStats()
+    feed(stats, range(0xFFF0, 0x10010))
+    snap = stats.snapshot()
+    assert (snap['received'], snap['lost'], snap['late']) == (0x20, 0, 0)
+
+
+def test_jitter():
+    stats = LinkStats()
+    for s in range(64):
+        arrival = s * 0.01 + (0.002 if s % 2 else 0.0)
+        stats.accept(s, s * 10000, arrival)
+    assert 1.5 < stats.snapshot()['jitter_ms'] <= 2.0     # |D| is 2 ms every frame
+
+
+def test_firmware_restart_resets():
+    stats = LinkStats()
+    feed(stats, range(1000, 1100))
+    feed(stats, range(5))
+    snap = stats.snapshot()
+    assert snap['restarts'] == 1
+    assert (snap['received'], snap['lost']) == (5, 0)
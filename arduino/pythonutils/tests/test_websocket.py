@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from websockets.asyncio.client import connect
+
+from joybridge.sinks import WebSocketSink
+from joybridge.supervisor import DeviceSpec, Supervisor
+from joybridge.ws_frames import BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL, unpack_payload
+
+PAYLOAD = {
+    'mode': '2',
+    'joystick1': {'dx': 100, 'dy': 0, 'x': 0.5, 'y': 0.0, 'direction': 'right'},
+    'joystick2': {'dx': 0, 'dy': -100, 'x': 0.0, 'y': -0.25, 'direction': 'up'},
+    't': 12.5,
+}
+
+
+def port_of(server):
+    return server.sockets[0].getsockname()[1]
+
+
+async def until(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def run_sink(client):
+    async def run():
+        sink = WebSocketSink('127.0.0.1', 0)
+        await sink.start()
+        try:
+            return await client(sink, f'ws://127.0.0.1:{port_of(sink.server)}')
+        finally:
+            await sink.stop()
+
+    return asyncio.run(run())
+
+
+def test_binary_subprotocol_negotiated():
+    async def client(sink, uri):
+        async with connect(uri, subprotocols=[BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL]) as ws:
+            await until(lambda: sink.hub.clients)
+            sink.send(PAYLOAD)
+            return ws.subprotocol, await asyncio.wait_for(ws.recv(), 2)
+
+    subprotocol, frame = run_sink(client)
+    assert subprotocol == BINARY_SUBPROTOCOL
+    assert isinstance(frame, bytes)
+    got = unpack_payload(frame)
+    assert got['joystick1']['direction'] == 'right' and got['joystick2']['direction'] == 'up'
+    assert abs(got['joystick1']['x'] - 0.5) < 1e-4 and abs(got['joystick2']['y'] + 0.25) < 1e-4
+
+
+def test_plain_client_gets_json():
+    async def client(sink, uri):
+        async with connect(uri) as ws:
+            await until(lambda: sink.hub.clients)
+            sink.send(PAYLOAD)
+            return ws.subprotocol, await asyncio.wait_for(ws.recv(), 2)
+
+    subprotocol, frame = run_sink(client)
+    assert subprotocol is None
+    got = json.loads(frame)
+    assert got['joystick1'] == PAYLOAD['joystick1'] and got['joystick2'] == PAYLOAD['joystick2']
+    assert got['seq'] == 1 and got['t'] == 12.5
+
+
+def test_supervisor_routes_by_path(monkeypatch):
+    monkeypatch.setattr(Supervisor, '_spawn', lambda self, dev: None)
+    devices = [DeviceSpec('rig1', 'COM1', None, None), DeviceSpec('rig2', 'COM2', None, None)]
+
+    async def run():
+        sup = Supervisor(devices, '127.0.0.1', 0)
+        await sup.start()
+        uri = f'ws://127.0.0.1:{port_of(sup.server)}'
+        try:
+            async with connect(uri + '/rig2') as ws:
+                hub = sup.devices['rig2'].hub
+                await until(lambda: hub.clients)
+                assert not sup.devices['rig1'].hub.clients
+                hub.publish(PAYLOAD)
+                frame = json.loads(await asyncio.wait_for(ws.recv(), 2))
+            async with connect(uri + '/rig9') as ws:
+                await asyncio.wait_for(ws.wait_closed(), 2)
+                return frame, ws.close_code
+        finally:
+            sup.server.close()
+            await sup.server.wait_closed()
+
+    frame, code = asyncio.run(run())
+    assert frame['joystick1'] == PAYLOAD['joystick1'] and frame['t'] == 12.5
+    assert code == 1008
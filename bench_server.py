@@ -0,0 +1,216 @@
+"""Load test: the Flask development server (app.py) against serve.py.
+
+    python bench_server.py [--clients 8] [--seconds 5] [--workers N]
+
+Starts both servers on local ports with the repo's cert.pem/key.pem and
+runs the same request mixes against each from --clients threads:
+
+  page    /training and /api/v2/calibration, as a headset opening the page
+  assets  the built drone GLB, the HDR sky and drone.obj, Accept-Encoding
+          gzip, br (what a browser sends)
+
+each over three kinds of connection: keep-alive (one TLS connection per
+client, reused), resumed (a new connection per request, resuming the TLS
+session) and cold (a new connection and full handshake per request). It
+reports requests/s, MB/s on the wire and time to first byte (request
+sent → first response byte, handshake included for new connections).
+
+Client and servers share the machine, so absolute numbers depend on its
+cores; the comparison is what matters.
+"""
+import argparse
+import json
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import threading
+import time
+
+# ————— CONFIG —————
+ROOT      = os.path.dirname(os.path.abspath(__file__))
+HOST      = '127.0.0.1'
+DEV_PORT  = 5081
+PROD_PORT = 5082
+MODES     = ('keep-alive', 'resumed', 'cold')
+
+
+def asset_paths():
+    with open(os.path.join(ROOT, 'static', 'build', 'manifest.json')) as f:
+        manifest = json.load(f)
+    glb = ['/assets/' + manifest['models/drone.glb']] if 'models/drone.glb' in manifest else []
+    return glb + ['/static/blue_lagoon_night_1k.hdr', '/static/models/drone.obj']
+
+
+MIXES = {
+    'page':   lambda: ['/training?controlType=joystick', '/api/v2/calibration'],
+    'assets': asset_paths,
+}
+
+
+def start_dev(port):
+    code = (f"from app import app; app.run(ssl_context=('cert.pem', 'key.pem'), "
+            f"host='{HOST}', port={port})")
+    return subprocess.Popen([sys.executable, '-c', code], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_prod(port, workers):
+    return subprocess.Popen([sys.executable, 'serve.py', '--host', HOST, '--port', str(port),
+                             '--workers', str(workers)], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_listening(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), 0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def read_response(sock, buf):
+    """Read one response; (status, wire bytes, first-byte time, close?, leftover)."""
+    first = None
+    while b'\r\n\r\n' not in buf:
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionError('closed before the headers')
+        if first is None:
+            first = time.perf_counter()
+        buf += data
+    if first is None:
+        first = time.perf_counter()
+    head, _, buf = buf.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(':')
+        headers[k.strip().lower()] = v.strip()
+    close = 'close' in headers.get('connection', '').lower() or lines[0].startswith('HTTP/1.0') \
+        and 'keep-alive' not in headers.get('connection', '').lower()
+    length = headers.get('content-length')
+    if length is None:
+        while True:             # no length: the body runs to the end of the connection
+            data = sock.recv(65536)
+            if not data:
+                break
+            buf += data
+        return status, len(head) + len(buf), first, True, b''
+    length = int(length)
+    while len(buf) < length:
+        data = sock.recv(max(65536, length - len(buf)))
+        if not data:
+            raise ConnectionError('closed mid-body')
+        buf += data
+    return status, len(head) + length, first, close, buf[length:]
+
+
+class Client(threading.Thread):
+    def __init__(self, port, paths, mode, stop_at, index):
+        super().__init__(daemon=True)
+        self.port    = port
+        self.paths   = paths
+        self.mode    = mode
+        self.stop_at = stop_at
+        self.index   = index
+        self.ttfb    = []
+        self.bytes   = 0
+        self.errors  = 0
+        self.ctx = ssl.create_default_context()
+        self.ctx.check_hostname = False
+        self.ctx.verify_mode = ssl.CERT_NONE
+
+    def connect(self, session):
+        sock = socket.create_connection((HOST, self.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.ctx.wrap_socket(sock, session=session)
+
+    def run(self):
+        sock, session, buf, i = None, None, b'', self.index
+        while time.perf_counter() < self.stop_at:
+            path = self.paths[i % len(self.paths)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                if sock is None:
+                    sock = self.connect(session if self.mode != 'cold' else None)
+                    buf = b''
+                keep = self.mode == 'keep-alive'
+                sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {HOST}:{self.port}\r\n"
+                             f"Accept-Encoding: gzip, br\r\n"
+                             f"{'' if keep else 'Connection: close' + chr(13) + chr(10)}\r\n"
+                             .encode())
+                status, size, first, close, buf = read_response(sock, buf)
+            except (OSError, ConnectionError, ssl.SSLError):
+                self.errors += 1
+                if sock is not None:
+                    sock.close()
+                sock = None
+                continue
+            if status >= 400:
+                self.errors += 1
+            self.ttfb.append(first - t0)
+            self.bytes += size
+            if close or not keep:
+                session = sock.session
+                sock.close()
+                sock = None
+        if sock is not None:
+            sock.close()
+
+
+def run_load(port, paths, mode, clients, seconds):
+    stop_at = time.perf_counter() + seconds
+    threads = [Client(port, paths, mode, stop_at, i) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    ttfb = sorted(x for t in threads for x in t.ttfb)
+    n = len(ttfb)
+    pct = lambda q: ttfb[min(int(q * n), n - 1)] * 1000 if n else float('nan')
+    return {'rps': n / wall, 'mbps': sum(t.bytes for t in threads) / wall / 1e6,
+            'p50': pct(0.5), 'p95': pct(0.95), 'errors': sum(t.errors for t in threads)}
+
+
+def main(args):
+    servers = [('dev (app.py)', DEV_PORT, start_dev(DEV_PORT)),
+               (f'serve.py x{args.workers}', PROD_PORT, start_prod(PROD_PORT, args.workers))]
+    try:
+        for name, port, _ in servers:
+            if not wait_listening(port):
+                print(f"[!] {name} didn't start on port {port}")
+                return 1
+        print(f"{os.cpu_count()} CPU(s), {args.clients} clients, {args.seconds:g}s per run")
+        print(f"{'mix':7s} {'connection':11s} {'server':16s} {'req/s':>8s} {'MB/s':>7s} "
+              f"{'TTFB p50':>9s} {'p95':>8s} {'errors':>7s}")
+        for mix, paths in MIXES.items():
+            paths = paths()
+            for mode in MODES:
+                for name, port, _ in servers:
+                    run_load(port, paths, mode, args.clients, 0.5)       # warm caches
+                    r = run_load(port, paths, mode, args.clients, args.seconds)
+                    print(f"{mix:7s} {mode:11s} {name:16s} {r['rps']:8.1f} {r['mbps']:7.1f} "
+                          f"{r['p50']:7.1f}ms {r['p95']:6.1f}ms {r['errors']:7d}")
+    finally:
+        for _, _, proc in servers:
+            proc.terminate()
+            proc.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--clients', type=int, default=8)
+    ap.add_argument('--seconds', type=float, default=5)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                    help='serve.py worker processes')
+    sys.exit(main(ap.parse_args()))
@@ -0,0 +1,170 @@
+"""Build compressed, content-hashed web assets from the source models.
+
+    pip install -r requirements-build.txt     # numpy, and brotli for the .br files
+    python build_assets.py [--no-quantize] [--no-lod]
+
+static/models/drone.obj + drone.mtl → static/build/drone.<hash>.glb, with
+.gz and .br (if the brotli package is installed) next to it, and
+static/build/manifest.json mapping 'models/drone.glb' to the hashed name.
+app.py's asset_url() reads the manifest and /assets/ serves the files with
+a one-year immutable Cache-Control; a changed model gets a new URL.
+
+Each model also gets simplified levels (drone.lod1.glb, drone.lod2.glb, ...)
+for the lod-model component in training.html. The build prints their
+triangle counts and a seeded point-to-plane surface error against the
+full mesh, so quality can be compared between builds.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from mesh_tools import (build_primitives, decimate_to, decode_glb, encode_glb, load_mtl,
+                        load_obj, surface_error, triangle_count)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ————— CONFIG —————
+ROOT      = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ROOT, 'static', 'build')
+MANIFEST  = os.path.join(BUILD_DIR, 'manifest.json')
+MODELS    = {
+    # logical name          (obj, mtl)
+    'models/drone.glb': ('static/models/drone.obj', 'static/models/drone.mtl'),
+}
+LOD_RATIOS = (0.25, 0.06)   # triangle budget of lod1, lod2, ... vs the full mesh
+
+
+def kb(n):
+    return f"{n / 1024:,.0f} KB"
+
+
+def write_hashed(name, data, manifest):
+    """Write data + precompressed variants under a content-hash name."""
+    stem, ext = os.path.splitext(os.path.basename(name))
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    hashed = f"{stem}.{digest}{ext}"
+    # drop artifacts of earlier builds of the same asset (not drone.lod1.* for drone)
+    previous = re.compile(re.escape(stem) + r'\.[0-9a-f]{12}' + re.escape(ext) + r'(\.gz|\.br)?$')
+    for old in os.listdir(BUILD_DIR):
+        if previous.match(old) and not old.startswith(hashed):
+            os.remove(os.path.join(BUILD_DIR, old))
+    path = os.path.join(BUILD_DIR, hashed)
+    with open(path, 'wb') as f:
+        f.write(data)
+    sizes = {'raw': len(data)}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz)
+    sizes['gzip'] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(br)
+        sizes['br'] = len(br)
+    manifest[name] = hashed
+    return hashed, sizes
+
+
+def lod_name(name, level):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.lod{level}{ext}"
+
+
+def build_lods(name, prims, quantize, manifest):
+    """Write the simplified levels of one model and report their quality."""
+    full = triangle_count(prims)
+    floor = surface_error(prims, prims)
+    print(f"    LOD0 {full:,} triangles, sampling noise floor "
+          f"mean {floor['mean'] * 100:.3f}% / max {floor['hausdorff'] * 100:.2f}% of the diagonal")
+    for level, ratio in enumerate(LOD_RATIOS, 1):
+        t0 = time.perf_counter()
+        cell, lod = decimate_to(prims, ratio)
+        t_lod = time.perf_counter() - t0
+        err = surface_error(prims, lod)
+        glb = encode_glb(lod, quantize=quantize)
+        hashed, sizes = write_hashed(lod_name(name, level), glb, manifest)
+        tris = triangle_count(lod)
+        print(f"    LOD{level} {tris:,} triangles ({tris / full:.0%}), "
+              f"{sum(len(p['positions']) for p in lod):,} vertices, cell {cell:.3g}, "
+              f"{t_lod * 1000:,.0f} ms → build/{hashed} "
+              f"({kb(min(sizes.values()))} compressed)")
+        print(f"         surface error mean {err['mean'] * 100:.3f}%, rms {err['rms'] * 100:.3f}%, "
+              f"max {err['hausdorff'] * 100:.2f}% of the diagonal")
+
+
+def build_model(name, obj_path, mtl_path, quantize, manifest, lods=True):
+    obj_path = os.path.join(ROOT, obj_path)
+    mtl_path = os.path.join(ROOT, mtl_path)
+    src_size = os.path.getsize(obj_path) + os.path.getsize(mtl_path)
+
+    t0 = time.perf_counter()
+    obj = load_obj(obj_path)
+    mtl = load_mtl(mtl_path)
+    t_obj = time.perf_counter() - t0
+
+    prims = build_primitives(obj, mtl)
+    glb = encode_glb(prims, quantize=quantize)
+
+    t0 = time.perf_counter()
+    gltf, arrays = decode_glb(glb)
+    t_glb = time.perf_counter() - t0
+
+    # worst-case position error introduced by quantization
+    node = gltf['nodes'][0]
+    err = 0.0
+    for p, gp in zip(prims, gltf['meshes'][0]['primitives']):
+        pos = arrays[gp['attributes']['POSITION']].astype(np.float64)
+        if quantize:
+            pos = pos * node['scale'][0] + node['translation']
+        err = max(err, float(np.abs(pos - p['positions']).max()))
+
+    hashed, sizes = write_hashed(name, glb, manifest)
+    corners = sum(p['corners'] for p in prims)
+    verts = sum(len(p['positions']) for p in prims)
+    tris = sum(len(p['indices']) for p in prims)
+    n_mtl = len(obj['groups'])
+    print(f"[+] {name} → build/{hashed}")
+    print(f"    {tris:,} triangles, {corners:,} corners → {verts:,} vertices, "
+          f"{n_mtl} materials → {len(prims)}")
+    print(f"    size: OBJ+MTL {kb(src_size)} → GLB {kb(sizes['raw'])}, "
+          f"gzip {kb(sizes['gzip'])}"
+          + (f", br {kb(sizes['br'])}" if 'br' in sizes else " (no brotli module, .br skipped)")
+          + f"  ({src_size / min(sizes.values()):.0f}x smaller over the wire)")
+    print(f"    parse: OBJ text {t_obj * 1000:,.0f} ms → GLB {t_glb * 1000:,.1f} ms "
+          f"(Python, as a proxy for the browser's main thread)")
+    if quantize:
+        print(f"    max quantization error {err:.2e} units")
+    if lods:
+        build_lods(name, prims, quantize, manifest)
+
+
+def main(args):
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    manifest = {}
+    if os.path.exists(MANIFEST):
+        with open(MANIFEST) as f:
+            manifest = json.load(f)
+    for name, (obj_path, mtl_path) in MODELS.items():
+        build_model(name, obj_path, mtl_path, not args.no_quantize, manifest,
+                    lods=not args.no_lod)
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"[+] Manifest → {os.path.relpath(MANIFEST, ROOT)}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--no-quantize', action='store_true',
+                    help='store float positions/normals (no KHR_mesh_quantization)')
+    ap.add_argument('--no-lod', action='store_true',
+                    help='skip the simplified levels of detail')
+    main(ap.parse_args())
@@ -0,0 +1,428 @@
+"""OBJ/MTL loading and binary glTF (GLB) writing for the asset build.
+
+Only what our Blender exports use: v/vt/vn/f (polygons are fan-triangulated
+like three.js' OBJLoader does), usemtl groups and the Phong-style MTL
+parameters. See build_assets.py for the command line.
+"""
+import json
+import struct
+
+import numpy as np
+
+# glTF constants
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+GLB_MAGIC, GLB_JSON, GLB_BIN = 0x46546C67, 0x4E4F534A, 0x004E4942
+
+
+# ————— OBJ / MTL —————
+
+def load_mtl(path):
+    """{material name: {'Kd': (r, g, b), 'Ns': .., 'd': .., ...}}"""
+    materials, cur = {}, None
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            key, args = parts[0], parts[1:]
+            if key == 'newmtl':
+                cur = materials[' '.join(args)] = {}
+            elif cur is None:
+                continue
+            elif key in ('Ka', 'Kd', 'Ks', 'Ke'):
+                cur[key] = tuple(float(a) for a in args[:3])
+            elif key in ('Ns', 'Ni', 'd'):
+                cur[key] = float(args[0])
+            elif key == 'Tr':
+                cur['d'] = 1.0 - float(args[0])
+            elif key.startswith('map_'):
+                cur[key] = args[-1]
+    return materials
+
+
+def load_obj(path):
+    """Parse an OBJ into arrays.
+
+    Returns {'v': (V, 3) float32, 'vt': (T, 2), 'vn': (N, 3),
+    'groups': {material: (K, 3) int array of (v, vt, vn) corner indices}},
+    three corners per triangle, -1 where an index is missing.
+    """
+    v, vt, vn = [], [], []
+    groups, corners = {}, None
+    material = None
+
+    def index(tok, n):
+        if not tok:
+            return -1
+        i = int(tok)
+        return i - 1 if i > 0 else n + i
+
+    with open(path) as f:
+        for line in f:
+            if line.startswith('v '):
+                v.append(line.split()[1:4])
+            elif line.startswith('vn '):
+                vn.append(line.split()[1:4])
+            elif line.startswith('vt '):
+                vt.append(line.split()[1:3])
+            elif line.startswith('f '):
+                if corners is None:
+                    corners = groups.setdefault(material, [])
+                poly = []
+                for tok in line.split()[1:]:
+                    p = tok.split('/')
+                    poly.append((index(p[0], len(v)),
+                                 index(p[1], len(vt)) if len(p) > 1 else -1,
+                                 index(p[2], len(vn)) if len(p) > 2 else -1))
+                for i in range(1, len(poly) - 1):
+                    corners.extend((poly[0], poly[i], poly[i + 1]))
+            elif line.startswith('usemtl '):
+                material = line[7:].strip()
+                corners = None
+    return {
+        'v':  np.array(v, dtype=np.float32).reshape(-1, 3),
+        'vt': np.array(vt, dtype=np.float32).reshape(-1, 2),
+        'vn': np.array(vn, dtype=np.float32).reshape(-1, 3),
+        'groups': {m: np.array(c, dtype=np.int64).reshape(-1, 3) for m, c in groups.items()},
+    }
+
+
+# ————— Materials —————
+
+def pbr_material(name, mtl):
+    """Phong MTL parameters → glTF metallic-roughness material."""
+    kd = list(mtl.get('Kd', (0.8, 0.8, 0.8)))
+    d  = mtl.get('d', 1.0)
+    ns = mtl.get('Ns', 250.0)
+    # Blinn-Phong exponent → GGX roughness, the usual approximation
+    roughness = min(1.0, max(0.04, (2.0 / (ns + 2.0)) ** 0.5))
+    out = {
+        'name': name,
+        'pbrMetallicRoughness': {
+            'baseColorFactor': [round(c, 4) for c in kd] + [round(d, 4)],
+            'metallicFactor': 0.0,
+            'roughnessFactor': round(roughness, 3),
+        },
+    }
+    ke = mtl.get('Ke', (0, 0, 0))
+    if any(ke):
+        out['emissiveFactor'] = [round(min(c, 1.0), 4) for c in ke]
+    if d < 1.0:
+        out['alphaMode'] = 'BLEND'
+    return out
+
+
+def merge_materials(obj, mtl):
+    """Group OBJ materials that end up identical in glTF.
+
+    Returns [(gltf_material, [obj material names])].
+    """
+    merged = {}
+    for name in obj['groups']:
+        m = pbr_material(name or 'default', mtl.get(name, {}))
+        key = json.dumps({k: v for k, v in m.items() if k != 'name'}, sort_keys=True)
+        if key in merged:
+            merged[key][1].append(name)
+        else:
+            merged[key] = (m, [name])
+    return list(merged.values())
+
+
+# ————— Mesh building —————
+
+def build_primitives(obj, mtl, keep_uvs=None):
+    """Indexed, deduplicated triangle lists, one per merged material.
+
+    UVs are dropped unless some material has a texture map (the drone has
+    none), which lets many more corners collapse into one vertex.
+    """
+    if keep_uvs is None:
+        keep_uvs = any(k.startswith('map_') for m in mtl.values() for k in m)
+    prims = []
+    for material, names in merge_materials(obj, mtl):
+        corners = np.concatenate([obj['groups'][n] for n in names])
+        cols = [0, 1, 2] if keep_uvs else [0, 2]
+        uniq, inverse = np.unique(corners[:, cols], axis=0, return_inverse=True)
+        prim = {
+            'material': material,
+            'positions': obj['v'][uniq[:, 0]],
+            'indices': inverse.reshape(-1, 3).astype(np.uint32),
+            'corners': len(corners),
+        }
+        if len(obj['vn']) and (uniq[:, -1] >= 0).all():
+            prim['normals'] = obj['vn'][uniq[:, -1]]
+        if keep_uvs and len(obj['vt']) and (uniq[:, 1] >= 0).all():
+            prim['uvs'] = obj['vt'][uniq[:, 1]]
+        prims.append(prim)
+    return prims
+
+
+# ————— Level of detail —————
+
+def _normal_bucket(normals):
+    """Dominant axis and sign of each normal (0..5), to keep hard edges."""
+    axis = np.abs(normals).argmax(axis=1)
+    neg = normals[np.arange(len(normals)), axis] < 0
+    return axis * 2 + neg
+
+
+def cluster_decimate(prims, cell):
+    """Vertex-clustering simplification on a uniform grid of size `cell`.
+
+    All vertices in a grid cell collapse to their mean (computed over every
+    primitive, so material seams stay closed); triangles that end up with
+    two corners in one cell disappear. Vertices whose normals point in
+    different directions stay apart so hard edges keep their shading.
+    """
+    lo = np.min([p['positions'].min(axis=0) for p in prims], axis=0)
+    pos = np.concatenate([p['positions'] for p in prims])
+    keys = np.floor((pos - lo) / cell).astype(np.int64)
+    _, cell_id = np.unique(keys, axis=0, return_inverse=True)
+    cell_id = cell_id.ravel()
+    n_cells = cell_id.max() + 1
+    counts = np.bincount(cell_id, minlength=n_cells)
+    centers = np.stack([np.bincount(cell_id, pos[:, k], n_cells) for k in range(3)], axis=1)
+    centers /= counts[:, None]
+
+    out, base = [], 0
+    for p in prims:
+        n = len(p['positions'])
+        cid = cell_id[base:base + n]
+        base += n
+        tri_cells = cid[p['indices']]
+        keep = ((tri_cells[:, 0] != tri_cells[:, 1]) & (tri_cells[:, 1] != tri_cells[:, 2])
+                & (tri_cells[:, 0] != tri_cells[:, 2]))
+        # a cluster vertex is (cell, normal direction)
+        vkey = cid * 6 + (_normal_bucket(p['normals']) if 'normals' in p else 0)
+        uniq, vid = np.unique(vkey, return_inverse=True)
+        vid = vid.ravel()
+        tris = vid[p['indices'][keep]]
+        # several source triangles often collapse onto the same one; rotate
+        # each so its smallest index leads, which keeps the winding (and so
+        # both sides of a collapsed thin plate)
+        r = tris.argmin(axis=1)[:, None]
+        canon = np.take_along_axis(tris, (np.arange(3)[None, :] + r) % 3, axis=1)
+        _, first = np.unique(canon, axis=0, return_index=True)
+        tris = tris[np.sort(first)]
+        used, tris = np.unique(tris, return_inverse=True)
+        prim = {
+            'material': p['material'],
+            'positions': centers[uniq[used] // 6],
+            'indices': tris.reshape(-1, 3).astype(np.uint32),
+            'corners': p['corners'],
+        }
+        if 'normals' in p:
+            nrm = np.stack([np.bincount(vid, p['normals'][:, k], len(uniq)) for k in range(3)], axis=1)
+            prim['normals'] = nrm[used]
+        if len(prim['indices']):
+            out.append(prim)
+    return out
+
+
+def triangle_count(prims):
+    return sum(len(p['indices']) for p in prims)
+
+
+def decimate_to(prims, ratio, iterations=24):
+    """Cluster-decimate to about `ratio` of the triangles (bisection on the cell size)."""
+    lo = np.min([p['positions'].min(axis=0) for p in prims], axis=0)
+    hi = np.max([p['positions'].max(axis=0) for p in prims], axis=0)
+    diag = float(np.linalg.norm(hi - lo))
+    target = ratio * triangle_count(prims)
+    a, b = np.log(diag / 4096), np.log(diag / 8)
+    best = None
+    for _ in range(iterations):
+        mid = (a + b) / 2
+        out = cluster_decimate(prims, float(np.exp(mid)))
+        n = triangle_count(out)
+        if best is None or abs(n - target) < abs(triangle_count(best[1]) - target):
+            best = (float(np.exp(mid)), out)
+        if abs(n - target) <= 0.01 * target:
+            break
+        if n > target:
+            a = mid
+        else:
+            b = mid
+    return best
+
+
+def sample_surface(prims, n, seed=0):
+    """n area-weighted random surface points and their face normals.
+
+    The generator is seeded, so the same mesh always gives the same points.
+    """
+    tris = np.concatenate([p['positions'][p['indices']] for p in prims])
+    cross = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    area = np.linalg.norm(cross, axis=1)
+    rng = np.random.default_rng(seed)
+    pick = rng.choice(len(tris), size=n, p=area / area.sum())
+    u, v = rng.random(n), rng.random(n)
+    flip = u + v > 1
+    u[flip], v[flip] = 1 - u[flip], 1 - v[flip]
+    t = tris[pick]
+    points = t[:, 0] + u[:, None] * (t[:, 1] - t[:, 0]) + v[:, None] * (t[:, 2] - t[:, 0])
+    return points, cross[pick] / area[pick, None]
+
+
+def _point_to_plane(a, b, b_normals, chunk=1024):
+    """Distance from each point of a to the tangent plane at its nearest point of b."""
+    out = np.empty(len(a))
+    bb = (b * b).sum(axis=1)
+    for i in range(0, len(a), chunk):
+        blk = a[i:i + chunk]
+        nn = (bb[None, :] - 2 * blk @ b.T).argmin(axis=1)
+        out[i:i + chunk] = np.abs(((blk - b[nn]) * b_normals[nn]).sum(axis=1))
+    return out
+
+
+def surface_error(ref, lod, samples=10000, seed=0):
+    """Symmetric point-to-plane deviation between two meshes.
+
+    Distances are relative to ref's bounding-box diagonal and measured from
+    seeded area-weighted samples of each surface to the other, so the
+    numbers are reproducible between builds. Returns {'mean', 'rms',
+    'hausdorff'}; compare against surface_error(ref, ref) for the
+    sampling noise floor.
+    """
+    lo = np.min([p['positions'].min(axis=0) for p in ref], axis=0)
+    hi = np.max([p['positions'].max(axis=0) for p in ref], axis=0)
+    diag = float(np.linalg.norm(hi - lo))
+    a, na = sample_surface(ref, samples, seed)
+    b, nb = sample_surface(lod, samples, seed + 1)
+    d = np.concatenate([_point_to_plane(a, b, nb), _point_to_plane(b, a, na)]) / diag
+    return {'mean': float(d.mean()), 'rms': float(np.sqrt((d * d).mean())),
+            'hausdorff': float(d.max())}
+
+
+# ————— GLB —————
+
+class _BufferBuilder:
+    def __init__(self):
+        self.data = bytearray()
+        self.views = []
+        self.accessors = []
+
+    def add(self, array, component_type, type_, target, count, byte_stride=None,
+            normalized=False, min_=None, max_=None):
+        while len(self.data) % 4:
+            self.data.append(0)
+        raw = np.ascontiguousarray(array).tobytes()
+        view = {'buffer': 0, 'byteOffset': len(self.data), 'byteLength': len(raw),
+                'target': target}
+        if byte_stride:
+            view['byteStride'] = byte_stride
+        self.views.append(view)
+        self.data += raw
+        acc = {'bufferView': len(self.views) - 1, 'componentType': component_type,
+               'count': count, 'type': type_}
+        if normalized:
+            acc['normalized'] = True
+        if min_ is not None:
+            acc['min'], acc['max'] = min_, max_
+        self.accessors.append(acc)
+        return len(self.accessors) - 1
+
+
+def encode_glb(prims, quantize=True, generator='build_assets.py'):
+    """Serialize primitives to GLB bytes.
+
+    With `quantize`, positions are 16-bit integers dequantized by one
+    uniform node scale/translation and normals are normalized bytes
+    (KHR_mesh_quantization, supported by three.js' GLTFLoader).
+    """
+    buf = _BufferBuilder()
+    lo = np.min([p['positions'].min(axis=0) for p in prims], axis=0)
+    hi = np.max([p['positions'].max(axis=0) for p in prims], axis=0)
+    # uniform scale keeps normals valid under the node transform
+    step = float((hi - lo).max()) / 65535 or 1.0
+    node = {'mesh': 0, 'name': 'mesh'}
+    if quantize:
+        node['translation'] = [float(c) for c in lo]
+        node['scale'] = [step, step, step]
+
+    materials, gltf_prims = [], []
+    for p in prims:
+        attrs = {}
+        n = len(p['positions'])
+        if quantize:
+            q = np.zeros((n, 4), dtype=np.uint16)     # padded to a 4-byte stride
+            q[:, :3] = np.round((p['positions'] - lo) / step)
+            attrs['POSITION'] = buf.add(q, UNSIGNED_SHORT, 'VEC3', ARRAY_BUFFER, n, 8,
+                                        min_=q[:, :3].min(axis=0).tolist(),
+                                        max_=q[:, :3].max(axis=0).tolist())
+        else:
+            pos = p['positions'].astype(np.float32)
+            attrs['POSITION'] = buf.add(pos, FLOAT, 'VEC3', ARRAY_BUFFER, n,
+                                        min_=pos.min(axis=0).tolist(),
+                                        max_=pos.max(axis=0).tolist())
+        if 'normals' in p:
+            nrm = p['normals'] / np.maximum(np.linalg.norm(p['normals'], axis=1, keepdims=True), 1e-12)
+            if quantize:
+                qn = np.zeros((n, 4), dtype=np.int8)
+                qn[:, :3] = np.round(nrm * 127)
+                attrs['NORMAL'] = buf.add(qn, BYTE, 'VEC3', ARRAY_BUFFER, n, 4, normalized=True)
+            else:
+                attrs['NORMAL'] = buf.add(nrm.astype(np.float32), FLOAT, 'VEC3', ARRAY_BUFFER, n)
+        if 'uvs' in p:
+            uv = p['uvs'].copy()
+            uv[:, 1] = 1.0 - uv[:, 1]                  # OBJ origin is bottom-left
+            attrs['TEXCOORD_0'] = buf.add(uv.astype(np.float32), FLOAT, 'VEC2', ARRAY_BUFFER, n)
+        idx = p['indices'].ravel()
+        if n < 65536:
+            indices = buf.add(idx.astype(np.uint16), UNSIGNED_SHORT, 'SCALAR',
+                              ELEMENT_ARRAY_BUFFER, len(idx))
+        else:
+            indices = buf.add(idx.astype(np.uint32), UNSIGNED_INT, 'SCALAR',
+                              ELEMENT_ARRAY_BUFFER, len(idx))
+        materials.append(p['material'])
+        gltf_prims.append({'attributes': attrs, 'indices': indices,
+                           'material': len(materials) - 1})
+
+    gltf = {
+        'asset': {'version': '2.0', 'generator': generator},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [node],
+        'meshes': [{'primitives': gltf_prims}],
+        'materials': materials,
+        'accessors': buf.accessors,
+        'bufferViews': buf.views,
+        'buffers': [{'byteLength': len(buf.data)}],
+    }
+    if quantize:
+        gltf['extensionsUsed'] = gltf['extensionsRequired'] = ['KHR_mesh_quantization']
+
+    js = json.dumps(gltf, separators=(',', ':')).encode()
+    js += b' ' * (-len(js) % 4)
+    bin_ = bytes(buf.data) + b'\0' * (-len(buf.data) % 4)
+    total = 12 + 8 + len(js) + 8 + len(bin_)
+    return (struct.pack('<III', GLB_MAGIC, 2, total)
+            + struct.pack('<II', len(js), GLB_JSON) + js
+            + struct.pack('<II', len(bin_), GLB_BIN) + bin_)
+
+
+_DTYPES = {BYTE: np.int8, UNSIGNED_BYTE: np.uint8, SHORT: np.int16,
+           UNSIGNED_SHORT: np.uint16, UNSIGNED_INT: np.uint32, FLOAT: np.float32}
+_WIDTH  = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}
+
+
+def decode_glb(data):
+    """Read GLB bytes back into (gltf json, [accessor arrays]) for checks."""
+    magic, version, _ = struct.unpack_from('<III', data)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("not a glTF 2.0 binary")
+    jlen, _ = struct.unpack_from('<II', data, 12)
+    gltf = json.loads(data[20:20 + jlen])
+    blen, _ = struct.unpack_from('<II', data, 20 + jlen)
+    bin_ = memoryview(data)[28 + jlen:28 + jlen + blen]
+    arrays = []
+    for acc in gltf['accessors']:
+        view = gltf['bufferViews'][acc['bufferView']]
+        dt = np.dtype(_DTYPES[acc['componentType']])
+        width = _WIDTH[acc['type']]
+        stride = view.get('byteStride', dt.itemsize * width)
+        raw = np.frombuffer(bin_, dtype=dt, count=view['byteLength'] // dt.itemsize,
+                            offset=view['byteOffset'] + acc.get('byteOffset', 0))
+        arrays.append(raw.reshape(-1, stride // dt.itemsize)[:acc['count'], :width])
+    return gltf, arrays
@@ -0,0 +1,336 @@
+"""Production entry point for the web app: uvicorn workers, TLS, the joystick relay.
+
+    python serve.py [--host 0.0.0.0] [--port 5000] [--workers N] [--no-tls]
+
+`python app.py` runs Flask's development server. This runs the same app
+under uvicorn (pip install -r requirements-serve.txt), which does the
+HTTP/1.1, TLS and WebSocket work, and adds only what the site needs on
+top of it:
+
+  /static/            text-like files (COMPRESSIBLE) are gzip/brotli encoded
+                      once per file version and cached in CACHE_DIR for all
+                      workers; revalidation and Range are Werkzeug's.
+                      /assets/ is app.built_asset, with its build-time
+                      .br/.gz and one-year immutable caching
+  /ws/joystick        the joystick stream as a WebSocket on the page's own
+                      origin and certificate, relayed from `joybridge run
+                      --sink ipc` over loopback UDP (JoystickRelay).
+                      Pages from other origins are refused
+  everything else     the Flask app through WSGI on a small thread pool
+                      (home, training, /api/v2/calibration)
+
+Each uvicorn worker process subscribes to the bridge on its own.
+
+bench_server.py load-tests this against the development server.
+"""
+import argparse
+import asyncio
+import gzip
+import mimetypes
+import os
+import socket
+import stat
+import sys
+import threading
+from urllib.parse import urlsplit
+
+from flask import abort, request, send_file, send_from_directory
+from werkzeug.security import safe_join
+
+from app import app
+
+try:
+    import uvicorn
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    sys.exit("[!] serve.py needs uvicorn and a2wsgi: pip install -r requirements-serve.txt")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ————— CONFIG —————
+ROOT           = os.path.dirname(os.path.abspath(__file__))
+CERT_FILE      = os.path.join(ROOT, 'cert.pem')
+KEY_FILE       = os.path.join(ROOT, 'key.pem')
+CACHE_DIR      = os.path.join(ROOT, '.cache', 'serve')     # private: see private_dir()
+KEEPALIVE      = 15         # s an idle connection is kept open
+MAX_HEADER     = 16 * 1024  # bytes of request line + headers
+MAX_BODY       = 1 << 20    # bytes of request body passed to the Flask app
+WSGI_THREADS   = 8          # per worker
+COMPRESS_MIN   = 1024       # bytes; smaller files go out as they are
+GZIP_LEVEL     = 6
+BROTLI_QUALITY = 9          # 11 is ~25x slower for ~35% less on drone.obj
+COMPRESSIBLE   = {'.html', '.htm', '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt',
+                  '.xml', '.obj', '.mtl', '.gltf', '.hdr'}
+
+JOYSTICK_PATH  = '/ws/joystick'
+JOYSTICK_IPC   = '127.0.0.1:8766'   # joybridge run --sink ipc [--ipc-port]
+IPC_ENV        = 'JOYSTICK_IPC'     # how main() hands --joystick-ipc to the workers
+IPC_HELLO      = b'JB HELLO\n'       # subscribes for 5 s, as with the WiFi board
+IPC_INTERVAL   = 1.0        # s between HELLOs while a browser is connected
+WS_PROTOCOLS   = ('joystick.bin.v3', 'joystick.json')   # preference order, see ws_frames.py
+WS_MAX_MESSAGE = 64 * 1024  # bytes in a message from the browser
+
+STATIC_DIR     = app.static_folder
+
+mimetypes.add_type('model/obj', '.obj')
+mimetypes.add_type('model/mtl', '.mtl')
+
+app.config.setdefault('MAX_CONTENT_LENGTH', MAX_BODY)
+
+
+def private_dir(path):
+    """Create `path` for this user only; refuse one someone else owns or can write to.
+
+    The compressed variants in it are served as they are, so nobody else
+    may be able to plant files there.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        sys.exit(f"[!] {path} is not a directory")
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        sys.exit(f"[!] {path} must be owned by this user and private (chmod 700)")
+    return path
+
+
+def compress_file(path, cached, encoding):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, cached)         # atomic: another worker may be writing the same file
+
+
+def compressed(path, st, encoding):
+    """Path of the cached `encoding` of this version of `path`, compressing it if needed."""
+    key = f"{os.path.relpath(path, ROOT).replace(os.sep, '_')}.{st.st_mtime_ns:x}.{st.st_size:x}"
+    cached = os.path.join(CACHE_DIR, f"{key}.{'br' if encoding == 'br' else 'gz'}")
+    if not os.path.exists(cached):
+        compress_file(path, cached, encoding)
+    return cached
+
+
+def static_file(filename):
+    """Flask's /static/ view, plus a gzip/brotli variant of text-like files."""
+    path = safe_join(STATIC_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    st = os.stat(path)
+    ext = os.path.splitext(path)[1].lower()
+    encoding = None
+    # ranges count bytes of the identity file, as in app.built_asset
+    if ext in COMPRESSIBLE and st.st_size >= COMPRESS_MIN and 'Range' not in request.headers:
+        accepted = request.accept_encodings
+        encoding = next((e for e in (('br',) if brotli else ()) + ('gzip',) if e in accepted), None)
+    if encoding is None:
+        response = send_from_directory(STATIC_DIR, filename)
+    else:
+        response = send_file(compressed(path, st, encoding),
+                             mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                             etag=f'{st.st_mtime_ns:x}-{st.st_size:x}-{encoding}',
+                             last_modified=st.st_mtime)
+        response.headers['Content-Encoding'] = encoding
+    if ext in COMPRESSIBLE:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+app.view_functions['static'] = static_file
+
+
+class _Client:
+    __slots__ = ('binary', 'slot', 'ready')
+
+    def __init__(self, binary):
+        self.binary = binary
+        self.slot   = None          # newest ASGI message not sent yet
+        self.ready  = asyncio.Event()
+
+
+class JoystickRelay(asyncio.DatagramProtocol):
+    """This worker's end of the bridge's ipc sink, fanned out to its /ws/joystick sockets.
+
+    Each datagram is a 16-byte joystick.bin.v3 frame followed by the same
+    frame as JSON; both messages are built once per datagram. Every client
+    has a one-frame slot that new datagrams overwrite and a sender task
+    drains, so a stalled tab skips frames and never holds up the others.
+    The bridge only streams while we keep sending HELLO, which we do while
+    any client is connected.
+    """
+
+    def __init__(self, bridge):
+        host, _, port = bridge.rpartition(':')
+        self.bridge    = (host, int(port))
+        self.peer      = None       # the bridge's resolved address, the only accepted sender
+        self.clients   = set()
+        self.last      = None       # (binary message, text message) for clients that join
+        self.transport = None
+        self.timer     = None
+        self.skipped   = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        info = await loop.getaddrinfo(*self.bridge, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+        self.peer = info[0][4]
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=('127.0.0.1', 0))
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.transport is not None:
+            self.transport.close()
+
+    def add(self, binary):
+        client = _Client(binary)
+        self.clients.add(client)
+        if self.last is not None:
+            client.slot = self.last[0 if binary else 1]
+            client.ready.set()
+        if self.timer is None:
+            self._hello()
+        return client
+
+    def remove(self, client):
+        self.clients.discard(client)
+
+    async def drain(self, client, send):
+        """Send `client` the newest frame whenever there is one (its sender task)."""
+        while True:
+            await client.ready.wait()
+            client.ready.clear()
+            message, client.slot = client.slot, None
+            try:
+                await send(message)
+            except Exception:
+                return      # closed under us; joystick_socket sees the disconnect
+
+    def forward(self, message):
+        """A browser's message (latency reports) back to the bridge."""
+        if self.transport is not None:
+            self.transport.sendto(message, self.peer)
+
+    def _hello(self):
+        if not self.clients:
+            self.timer = None
+            self.last = None        # stale by the time anyone reconnects
+            return
+        self.transport.sendto(IPC_HELLO, self.peer)
+        self.timer = asyncio.get_running_loop().call_later(IPC_INTERVAL, self._hello)
+
+    def datagram_received(self, data, addr):
+        if addr[:2] != self.peer or len(data) < 16:
+            return      # any local process can reach this port; only the bridge is relayed
+        self.last = messages = ({'type': 'websocket.send', 'bytes': data[:16]},
+                                {'type': 'websocket.send', 'text': data[16:].decode()})
+        for client in self.clients:
+            if client.slot is not None:
+                self.skipped += 1
+            client.slot = messages[0 if client.binary else 1]
+            client.ready.set()
+
+    def error_received(self, exc):
+        pass        # the bridge isn't running yet; HELLO keeps trying
+
+
+relay = JoystickRelay(os.environ.get(IPC_ENV, JOYSTICK_IPC))
+wsgi  = WSGIMiddleware(app, workers=WSGI_THREADS)
+
+
+def same_origin(scope):
+    """False if a browser opened the socket from a page on another origin.
+
+    Browsers always send Origin on a WebSocket upgrade; clients that don't
+    (bench tools, scripts) aren't pages a user wandered onto.
+    """
+    headers = dict(scope['headers'])
+    origin = headers.get(b'origin')
+    if origin is None:
+        return True
+    parts = urlsplit(origin.decode('latin-1'))
+    host = headers.get(b'host', b'').decode('latin-1')
+    return parts.scheme in ('http', 'https') and parts.netloc.lower() == host.lower()
+
+
+async def joystick_socket(scope, receive, send):
+    """Relay joystick frames to one browser until it leaves; what it sends goes to the bridge.
+
+    No extensions are negotiated (main() turns permessage-deflate off): it
+    would only add latency and CPU to 16-byte frames.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if not same_origin(scope):
+        return await send({'type': 'websocket.close', 'code': 1008})     # uvicorn answers 403
+    offered = scope.get('subprotocols') or ()
+    protocol = next((p for p in WS_PROTOCOLS if p in offered), None)
+    await send({'type': 'websocket.accept', 'subprotocol': protocol})
+    client = relay.add(protocol == WS_PROTOCOLS[0])
+    sender = asyncio.create_task(relay.drain(client, send))
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            data = message.get('bytes')
+            relay.forward(data if data is not None else message.get('text', '').encode())
+    finally:
+        sender.cancel()
+        relay.remove(client)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await relay.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            relay.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def asgi(scope, receive, send):
+    """The site: /ws/joystick here, every HTTP request through the Flask app."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'websocket':
+        if scope['path'] == JOYSTICK_PATH:
+            return await joystick_socket(scope, receive, send)
+        return await send({'type': 'websocket.close', 'code': 1008})
+    await wsgi(scope, receive, send)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--host', default='0.0.0.0')
+    ap.add_argument('--port', type=int, default=5000)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--cert', default=CERT_FILE)
+    ap.add_argument('--key', default=KEY_FILE)
+    ap.add_argument('--no-tls', action='store_true', help='plain HTTP, e.g. behind a proxy')
+    ap.add_argument('--joystick-ipc', default=JOYSTICK_IPC, metavar='HOST:PORT',
+                    help='where `joybridge run --sink ipc` listens, relayed at ' + JOYSTICK_PATH)
+    args = ap.parse_args()
+    private_dir(CACHE_DIR)
+    os.environ[IPC_ENV] = args.joystick_ipc     # read by every worker's import of serve
+    tls = {} if args.no_tls else {'ssl_certfile': args.cert, 'ssl_keyfile': args.key}
+    print(f"[+] Serving {'http' if args.no_tls else 'https'}://{args.host}:{args.port} "
+          f"with {args.workers} worker(s)")
+    uvicorn.run('serve:asgi', app_dir=ROOT, host=args.host, port=args.port,
+                workers=args.workers, lifespan='on', timeout_keep_alive=KEEPALIVE,
+                h11_max_incomplete_event_size=MAX_HEADER, ws_max_size=WS_MAX_MESSAGE,
+                ws_per_message_deflate=False, server_header=False, **tls)
+
+
+if __name__ == '__main__':
+    main()